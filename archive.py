@@ -0,0 +1,190 @@
+import os
+import re
+from datetime import date
+
+from concurrency import ConflictError, FileLock
+from job_record import FIELDNAMES, Status
+from journal import write_csv_atomic
+from storage import CsvStorage
+
+# Archive file names: 2024-03.csv for a month, 2024.csv for a year
+PERIOD_PATTERN = re.compile(r"^(\d{4})(?:-(\d{2}))?$")
+PERIODS = ("month", "year")
+
+
+class ArchivePolicy:
+    # Which Done jobs leave the active jobs file, and how the archive is split.
+    # A Done job is archived once its Sign off Date (or, without one, its
+    # Production Date) is more than keep_done_days old, so recently finished
+    # work stays in the apps. Jobs without either date are never archived.
+    # Archives are split by Production Date, the date the filters and the
+    # report select on, per month or per year.
+
+    def __init__(self, keep_done_days=90, period="month"):
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {', '.join(PERIODS)}, not {period!r}")
+        if keep_done_days < 0:
+            raise ValueError("keep_done_days cannot be negative")
+        self.keep_done_days = keep_done_days
+        self.period = period
+
+    def is_due(self, job, today):
+        if job.status is not Status.DONE:
+            return False
+        finished = job.sign_off_date or job.production_date
+        return finished is not None and (today - finished).days > self.keep_done_days
+
+    def period_of(self, job):
+        day = job.production_date or job.sign_off_date
+        return f"{day.year:04d}" if self.period == "year" else f"{day.year:04d}-{day.month:02d}"
+
+
+class KnownJobNumbers:
+    # Job Numbers taken in the store or the archive, as the existing argument
+    # of schema.validate_rows, so new jobs cannot reuse an archived number.
+    # The archive is only read for numbers the store does not have.
+
+    def __init__(self, store, archive):
+        self.store = store
+        self.archive = archive
+
+    def __contains__(self, job_number):
+        return job_number in self.store or job_number in self.archive
+
+
+def period_range(period):
+    # First and last day of an archive period
+    match = PERIOD_PATTERN.match(period)
+    year = int(match.group(1))
+    if match.group(2) is None:
+        return date(year, 1, 1), date(year, 12, 31)
+    month = int(match.group(2))
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return date(year, month, 1), date.fromordinal(next_month.toordinal() - 1)
+
+
+class JobArchive:
+    # Done jobs moved out of the jobs file, one CSV per period in a directory
+    # next to it (jobs.csv.archive/2024-03.csv). The active store only holds
+    # open and recently finished work; nothing here is read until a lookup,
+    # filter or report asks for a period, and each period is parsed once
+    # (and cached like jobs.csv) unless another workstation rewrites it.
+    #
+    # Jobs are written here before they are removed from the store, so a
+    # crash in between leaves a job in both places; the store's copy wins.
+
+    def __init__(self, file_path):
+        self.directory = file_path + ".archive"
+        self.lock = FileLock(self.directory + ".lock")
+        self.loaded = {}  # period -> ((mtime, size) read, {Job Number: job})
+
+    def periods(self):
+        # Newest first
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        periods = [name[:-4] for name in names if name.endswith(".csv") and PERIOD_PATTERN.match(name[:-4])]
+        return sorted(periods, reverse=True)
+
+    def path(self, period):
+        return os.path.join(self.directory, period + ".csv")
+
+    def load(self, period):
+        # {Job Number: job} for one period, read on first use
+        path = self.path(period)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return {}
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self.loaded.get(period)
+        if cached is None or cached[0] != stamp:
+            jobs = {job["Job Number"]: job for fieldnames, rows, progress in CsvStorage(path).read_chunks()
+                    for job in rows}
+            cached = self.loaded[period] = (stamp, jobs)
+        return cached[1]
+
+    def jobs(self, start_date=None, end_date=None, exclude=()):
+        # Archived jobs, newest period first. Only the periods overlapping
+        # start_date..end_date (Production Dates, inclusive) are read.
+        # exclude holds Job Numbers to skip, e.g. the ones in the store.
+        for period in self.periods():
+            first, last = period_range(period)
+            if (start_date and last < start_date) or (end_date and first > end_date):
+                continue
+            for job_number, job in self.load(period).items():
+                if job_number not in exclude:
+                    yield job
+
+    def find(self, job_number):
+        # Reads periods newest first until the job turns up
+        for period in self.periods():
+            job = self.load(period).get(job_number)
+            if job is not None:
+                return job
+        return None
+
+    def __contains__(self, job_number):
+        return self.find(job_number) is not None
+
+    def add(self, jobs_by_period):
+        # Merge jobs into their period files. A job already archived is only
+        # replaced by the same job, e.g. archived again after a crash left it
+        # in the store too; a different job under an archived Job Number
+        # raises ValueError before anything is written.
+        with self.lock:
+            conflicts = []
+            for jobs in jobs_by_period.values():
+                for job in jobs:
+                    archived = self.find(job["Job Number"])
+                    if archived is not None and dict(archived) != dict(job):
+                        conflicts.append(job["Job Number"])
+            if conflicts:
+                raise ValueError(f"Job Numbers already used by archived jobs: {', '.join(conflicts[:20])}")
+            os.makedirs(self.directory, exist_ok=True)
+            for period, jobs in jobs_by_period.items():
+                merged = dict(self.load(period))
+                merged.update((job["Job Number"], job) for job in jobs)
+                write_csv_atomic(self.path(period), FIELDNAMES, merged.values())
+                self.loaded.pop(period, None)
+
+    def discard(self, jobs_by_period):
+        # Take jobs written by add() back out, e.g. when they could not be
+        # removed from the store after all. A period left empty is deleted.
+        with self.lock:
+            for period, jobs in jobs_by_period.items():
+                kept = dict(self.load(period))
+                for job in jobs:
+                    kept.pop(job["Job Number"], None)
+                if kept:
+                    write_csv_atomic(self.path(period), FIELDNAMES, kept.values())
+                elif os.path.exists(self.path(period)):
+                    os.remove(self.path(period))
+                self.loaded.pop(period, None)
+
+
+def archive_done_jobs(store, archive, policy, today=None):
+    # Move the Done jobs the policy says are due out of the store and into
+    # the archive. Returns the jobs moved. Raises ConflictError, leaving the
+    # store as it was and the jobs out of the archive, if another workstation
+    # changed one of them meanwhile; running it again later picks them up
+    # with their changes. Raises ValueError, also leaving
+    # the store as it was, if a due job reuses the Job Number of a different
+    # archived job.
+    today = today or date.today()
+    store.sync()
+    due = [job for job in store if policy.is_due(job, today)]
+    if not due:
+        return []
+    jobs_by_period = {}
+    for job in due:
+        jobs_by_period.setdefault(policy.period_of(job), []).append(job.copy())
+    versions = {job["Job Number"]: store.version(job["Job Number"]) for job in due}
+    archive.add(jobs_by_period)
+    try:
+        return store.remove_many(list(versions), versions)
+    except ConflictError:
+        # The archived copies are out of date; the store keeps the jobs
+        archive.discard(jobs_by_period)
+        raise
@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar import JobColumns
+from generate_jobs import make_jobs
+from job_record import Job
+
+
+def loop_filter(jobs, location, client, status):
+    # The per-dict loop apply_filter in work.py used to run
+    filtered_jobs = []
+    for job in jobs:
+        if (not location or job['Location'] == location) and \
+           (not client or job['Name'] == client) and \
+           (not status or job['Status'] == status):
+            filtered_jobs.append(job)
+    return filtered_jobs
+
+
+def loop_sort(data):
+    # The strptime/int() sort sort_and_display_data in work2.py used to run
+    not_done_jobs = []
+    done_jobs = []
+    for record in data:
+        record = dict(record)
+        production_date = datetime.strptime(record["Production Date"], '%Y-%m-%d')
+        record["Days In Shop"] = str((datetime.now() - production_date).days)
+        if record["Status"] == "Not Done":
+            not_done_jobs.append(record)
+        else:
+            done_jobs.append(record)
+    not_done_jobs.sort(key=lambda x: int(x["Days In Shop"]), reverse=True)
+    done_jobs.sort(key=lambda x: int(x["Days In Shop"]), reverse=True)
+    return not_done_jobs + done_jobs
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main(sizes=(10000, 100000, 1000000)):
+    print(f"{'rows':>9} {'loop filter':>12} {'mask filter':>12} {'loop sort':>12} {'lexsort':>12} {'build':>12}")
+    for size in sizes:
+        jobs = make_jobs(size)  # String dicts, as csv.DictReader used to give
+        records = [Job.from_row(job) for job in jobs]
+        build = timed(JobColumns, records)
+        columns = JobColumns(records)
+        location = jobs[0]["Location"]
+
+        results = (
+            timed(loop_filter, jobs, location, "", "Not Done"),
+            timed(columns.select, Location=location, Status="Not Done"),
+            timed(loop_sort, jobs),
+            timed(columns.select),
+            build,
+        )
+        print(f"{size:>9} " + " ".join(f"{seconds * 1000:>10.1f}ms" for seconds in results))
+
+
+if __name__ == '__main__':
+    main(tuple(int(size) for size in sys.argv[1:]) or (10000, 100000, 1000000))
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar import JobColumns
+from generate_jobs import make_jobs
+from job_record import Job
+from report import write_report
+
+
+def main(sizes=(1000, 10000)):
+    for size in sizes:
+        jobs = make_jobs(size)
+        for i, job in enumerate(jobs):
+            if i % 7 == 0:
+                job["Notes"] = "Customer asked for a callback before delivery; check the paint code against the original order"
+            job["Status"] = "Not Done"
+        selected, days_in_shop = JobColumns(map(Job.from_row, jobs)).select(Status="Not Done")
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "report.pdf")
+            start = time.perf_counter()
+            write_report(selected, days_in_shop, file_path)
+            seconds = time.perf_counter() - start
+            print(f"{size:>7} rows: {seconds:.2f}s, {os.path.getsize(file_path) / 1024:.0f} KiB")
+
+
+if __name__ == '__main__':
+    main(tuple(int(size) for size in sys.argv[1:]) or (1000, 10000))
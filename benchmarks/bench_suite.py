@@ -0,0 +1,334 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Widgets are populated without a screen
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from columnar import JobColumns
+from generate_jobs import write_jobs_csv
+from job_cache import cache_path
+from jobstore import JobStore
+from rollups import JobRollups
+from search_index import SearchIndex
+
+SIZES = (1000, 10000, 100000)
+SEARCH_QUERIES = ("client 1", "paint", "555", "location 3 rush", "100042")
+
+
+class Skip(Exception):
+    # Raised by a benchmark that cannot run here (e.g. no Tk display)
+    pass
+
+
+def measure(func, runs=1, memory=True):
+    # Returns wall time over all runs, ops/s and the peak traced memory of
+    # one extra run. Memory is traced separately because tracemalloc slows
+    # the code under it down.
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    seconds = time.perf_counter() - start
+    result = {"runs": runs, "seconds": seconds, "ops_per_sec": runs / seconds if seconds else None}
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+class Fixture:
+    # A jobs.csv of a given size in a scratch directory, plus a loaded store
+    # with its columns and search index, like the apps have after startup
+
+    def __init__(self, directory, size, seed):
+        self.source = os.path.join(directory, f"jobs-{size}.csv")
+        write_jobs_csv(self.source, size, seed)
+        self.size = size
+        self.directory = directory
+        self.copies = 0
+
+    def fresh_copy(self):
+        # Writes go to a copy so every benchmark starts from the same file
+        self.copies += 1
+        path = os.path.join(self.directory, f"work-{self.size}-{self.copies}.csv")
+        shutil.copyfile(self.source, path)
+        return path
+
+    def store(self):
+        store = JobStore(self.fresh_copy())
+        columns = JobColumns().attach(store)
+        search_index = SearchIndex().attach(store, background=False)
+        store.load()
+        return store, columns, search_index
+
+
+def bench_load(fixture, runs):
+    # Loading the store at startup, parsing the CSV
+    def load():
+        if os.path.exists(cache_path(fixture.source)):
+            os.remove(cache_path(fixture.source))
+        JobStore(fixture.source).load()
+
+    return measure(load, runs)
+
+
+def bench_load_cached(fixture, runs):
+    # Startup with an unchanged CSV, read from jobs.csv.cache
+    JobStore(fixture.source).load()
+    return measure(lambda: JobStore(fixture.source).load(), runs)
+
+
+def bench_index(fixture, runs):
+    # Columns and search index built after a load
+    store = JobStore(fixture.source).load()
+    return measure(lambda: (JobColumns(store), SearchIndex().build(store)), runs)
+
+
+def bench_sort(fixture, runs):
+    # The logic behind sort_and_display_data: Not Done first, oldest first
+    store, columns, search_index = fixture.store()
+    return measure(lambda: columns.select(), runs)
+
+
+def bench_column_sort(fixture, runs):
+    # A header click: each op pages through a column's cached order, after
+    # an edit that moves one job in it
+    store, columns, search_index = fixture.store()
+    fields = ["Price", "Production Date", "Name", "Job Number"]
+    for field in fields:
+        columns.select_page(0, 500, sort_by=field)
+    job_numbers = iter(list(store.jobs)[:runs + 1])
+
+    def sort():
+        store.update(next(job_numbers), {"Price": "12.34"})
+        for field in fields:
+            columns.select_page(500, 500, sort_by=field, descending=True)
+
+    return measure(sort, runs)
+
+
+def bench_filter(fixture, runs):
+    # apply_filter on the busiest location, a client and a status
+    store, columns, search_index = fixture.store()
+    job = next(iter(store))
+    return measure(lambda: columns.select(Name=job["Name"], Location=job["Location"], Status="Not Done"), runs)
+
+
+def bench_search(fixture, runs):
+    store, columns, search_index = fixture.store()
+
+    def search():
+        for query in SEARCH_QUERIES:
+            job_numbers = search_index.search(query)
+            columns.select(job_numbers=job_numbers)
+
+    result = measure(search, runs)
+    result["ops_per_sec"] = result["ops_per_sec"] * len(SEARCH_QUERIES)
+    return result
+
+
+def bench_rollups(fixture, runs):
+    # Dashboard totals: one full build, then a status toggle and a summary per op
+    store, columns, search_index = fixture.store()
+    rollups = JobRollups().attach(store)
+    job_numbers = iter(list(store.jobs)[:runs + 1])
+
+    def toggle_and_summarize():
+        job_number = next(job_numbers)
+        status = "Done" if store.get(job_number)["Status"] == "Not Done" else "Not Done"
+        store.update(job_number, {"Status": status})
+        rollups.summary()
+
+    result = measure(toggle_and_summarize, runs)
+    result["build_seconds"] = measure(lambda: JobRollups(store), memory=False)["seconds"]
+    return result
+
+
+def bench_update(fixture, runs):
+    # update_job_data / mark_job: one job toggled and journaled per op
+    store, columns, search_index = fixture.store()
+    job_numbers = iter(list(store.jobs)[:runs + 1])
+
+    def toggle():
+        job_number = next(job_numbers)
+        status = "Done" if store.get(job_number)["Status"] == "Not Done" else "Not Done"
+        store.update(job_number, {"Status": status}, expected_version=store.version(job_number))
+
+    return measure(toggle, runs)
+
+
+def bench_bulk_update(fixture, runs):
+    # End-of-day close-out: 200 jobs marked Done as one batch per op
+    store, columns, search_index = fixture.store()
+    job_numbers = list(store.jobs)
+    status = {"value": "Done"}
+
+    def close_out():
+        batch = {job_number: {"Status": status["value"]} for job_number in job_numbers[:200]}
+        store.update_many(batch, {job_number: store.version(job_number) for job_number in batch})
+        status["value"] = "Not Done" if status["value"] == "Done" else "Done"
+
+    return measure(close_out, runs)
+
+
+def bench_add(fixture, runs):
+    # validate_and_add_job: one new job inserted and journaled per op
+    store, columns, search_index = fixture.store()
+    template = dict(next(iter(store)))
+    counter = iter(range(runs + 1))
+
+    def add():
+        store.insert(dict(template, **{"Job Number": f"NEW{next(counter)}", "Status": "Not Done"}))
+
+    return measure(add, runs)
+
+
+def bench_print_pdf(fixture, runs):
+    try:
+        from report import write_report
+    except ImportError as error:
+        raise Skip(str(error))
+    store, columns, search_index = fixture.store()
+    jobs, days_in_shop = columns.select(Status="Not Done")
+    file_path = os.path.join(fixture.directory, "report.pdf")
+    return measure(lambda: write_report(jobs, days_in_shop, file_path), runs, memory=False)
+
+
+def bench_tk_populate(fixture, runs):
+    # Fill the work.py Treeview with every job
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        from treeview_sync import JobTreeviewSync, COLUMNS
+        root = tk.Tk()
+    except Exception as error:
+        raise Skip(f"Tk unavailable: {error}")
+    try:
+        root.withdraw()
+        store, columns, search_index = fixture.store()
+        jobs, days_in_shop = columns.select()
+
+        def populate():
+            treeview = ttk.Treeview(root, columns=COLUMNS, show="headings")
+            sync = JobTreeviewSync(treeview)
+            sync.show(jobs, days_in_shop)
+            root.update_idletasks()
+            treeview.destroy()
+
+        return measure(populate, runs, memory=False)
+    finally:
+        root.destroy()
+
+
+def bench_qt_populate(fixture, runs):
+    # Fill the work2.py table model and let the view lay out and paint
+    try:
+        from PyQt5.QtWidgets import QApplication, QTableView
+        from job_model import JobTableModel
+    except ImportError as error:
+        raise Skip(f"PyQt5 unavailable: {error}")
+    app = QApplication.instance() or QApplication([])
+    store, columns, search_index = fixture.store()
+    jobs, days_in_shop = columns.select()
+    view = QTableView()
+    view.resize(1200, 800)
+    view.horizontalHeader().setResizeContentsPrecision(200)  # As in work2.py
+    view.show()
+
+    def populate():
+        model = JobTableModel()
+        view.setModel(model)
+        model.set_jobs(jobs, days_in_shop)
+        view.resizeColumnsToContents()
+        view.grab()  # Forces a paint of the visible rows
+        app.processEvents()
+
+    try:
+        return measure(populate, runs, memory=False)
+    finally:
+        view.close()
+
+
+# name -> (function, runs)
+BENCHMARKS = {
+    "load": (bench_load, 3),
+    "load_cached": (bench_load_cached, 3),
+    "index": (bench_index, 1),
+    "sort": (bench_sort, 10),
+    "column_sort": (bench_column_sort, 20),
+    "filter": (bench_filter, 20),
+    "search": (bench_search, 10),
+    "rollups": (bench_rollups, 200),
+    "update": (bench_update, 200),
+    "bulk_update": (bench_bulk_update, 10),
+    "add": (bench_add, 200),
+    "print_pdf": (bench_print_pdf, 1),
+    "tk_populate": (bench_tk_populate, 1),
+    "qt_populate": (bench_qt_populate, 3),
+}
+
+
+def run(sizes, names, seed=0, label=None, progress=None):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            fixture = Fixture(directory, size, seed)
+            for name in names:
+                function, runs = BENCHMARKS[name]
+                entry = {"rows": size, "benchmark": name}
+                try:
+                    entry.update(function(fixture, runs))
+                except Skip as reason:
+                    entry["skipped"] = str(reason)
+                results.append(entry)
+                if progress:
+                    progress(entry)
+    return {
+        "label": label,
+        "time": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Time the job app's hot paths and report JSON")
+    parser.add_argument("sizes", nargs="*", type=int, default=list(SIZES),
+                        help="row counts to generate (default: 1000 10000 100000; add 1000000 for the full run)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", help="name for this run, e.g. a version or branch")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    options = parser.parse_args(args)
+
+    def progress(entry):
+        detail = entry.get("skipped") or f"{entry['seconds'] * 1000:.1f}ms, {entry['ops_per_sec']:.1f} ops/s"
+        print(f"{entry['rows']:>9} {entry['benchmark']:<12} {detail}", file=sys.stderr)
+
+    report = run(options.sizes, [name for name in BENCHMARKS if name in options.only],
+                 options.seed, options.label, progress)
+    text = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, mode='w') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
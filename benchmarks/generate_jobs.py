@@ -0,0 +1,82 @@
+import argparse
+import csv
+import os
+import random
+import sys
+from datetime import date, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobstore import FIELDNAMES
+
+
+# Phrases for long Notes, as staff tend to write them
+NOTE_PHRASES = [
+    "Customer asked for a callback before delivery",
+    "check the paint code against the original order",
+    "second coat needed on the left door",
+    "parts on back order from the supplier",
+    "quoted price includes pickup and delivery",
+    "do not release until the balance is paid",
+    "customer will drop off the spare keys on Friday",
+]
+
+
+def skewed_weights(count, skew):
+    # Zipf-like weights: a few clients and locations get most of the jobs
+    return [1 / (rank + 1) ** skew for rank in range(count)]
+
+
+def make_notes(rng, long_notes):
+    if rng.random() >= long_notes:
+        return rng.choice(["", "", "Rush job", "Waiting on parts"])
+    return "; ".join(rng.choice(NOTE_PHRASES) for _ in range(rng.randint(3, 12)))
+
+
+def make_jobs(count, seed=0, skew=1.1, long_notes=0.1):
+    # Synthetic jobs shaped like jobs.csv. skew=0 spreads jobs evenly over
+    # clients and locations; long_notes is the share of jobs with long Notes.
+    rng = random.Random(seed)
+    today = date.today()
+    clients = [f"Client {i}" for i in range(max(count // 20, 1))]
+    locations = [f"Location {i}" for i in range(25)]
+    client_weights = list(accumulate(skewed_weights(len(clients), skew)))
+    location_weights = list(accumulate(skewed_weights(len(locations), skew)))
+    jobs = []
+    for i in range(count):
+        production_date = today - timedelta(days=rng.randint(0, 120))
+        jobs.append({
+            "Sign off Date": (production_date - timedelta(days=rng.randint(0, 14))).isoformat(),
+            "Name": rng.choices(clients, cum_weights=client_weights)[0],
+            "Phone Number": f"{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+            "Location": rng.choices(locations, cum_weights=location_weights)[0],
+            "Production Date": production_date.isoformat(),
+            "Price": str(rng.randint(50, 5000)),
+            "Notes": make_notes(rng, long_notes),
+            "Job Number": str(100000 + i),
+            "Status": "Not Done" if rng.random() < 0.3 else "Done",
+        })
+    return jobs
+
+
+def write_jobs_csv(file_path, count, seed=0, skew=1.1, long_notes=0.1):
+    with open(file_path, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(make_jobs(count, seed, skew, long_notes))
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Write a synthetic jobs.csv")
+    parser.add_argument("file", nargs="?", default="jobs.csv")
+    parser.add_argument("count", nargs="?", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skew", type=float, default=1.1, help="0 for evenly spread clients and locations")
+    parser.add_argument("--long-notes", type=float, default=0.1, help="share of jobs with long Notes")
+    options = parser.parse_args(args)
+    write_jobs_csv(options.file, options.count, options.seed, options.skew, options.long_notes)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,231 @@
+from bisect import insort
+from datetime import date
+
+import numpy as np
+
+from job_record import FIELD_SLOTS
+
+ORDINAL_EPOCH = date(1970, 1, 1).toordinal()  # date.toordinal() of datetime64 day 0
+NO_DATE = ORDINAL_EPOCH - 1  # Ordinal stand-in for a missing date; never a real toordinal()
+
+# Fields stored as integer category codes
+CATEGORICAL_FIELDS = ("Name", "Location", "Status")
+
+NO_PRICE = float("-inf")  # Sorts jobs without a price before any price
+
+
+def sort_key(field, job):
+    # What a header click sorts a column by: dates and prices by value (blank
+    # or unparseable ones first), Job Numbers numerically, text ignoring case
+    value = getattr(job, FIELD_SLOTS[field])
+    if field in ("Production Date", "Sign off Date"):
+        return NO_DATE if value is None else value.toordinal()
+    if field == "Price":
+        return NO_PRICE if value is None else value
+    if field == "Status":
+        return job["Status"]
+    if field == "Job Number":
+        # Zero-padded so 99 sorts before 100; other Job Numbers after those
+        return value.zfill(20) if value.isdigit() else "~" + value.casefold()
+    return value.casefold()
+
+
+def production_dates(jobs):
+    # Job records already hold parsed dates, so this is integer arithmetic
+    ordinals = np.fromiter((NO_DATE if job.production_date is None else job.production_date.toordinal()
+                            for job in jobs), dtype=np.int64, count=len(jobs))
+    dates = (ordinals - ORDINAL_EPOCH).astype('datetime64[D]')
+    dates[ordinals == NO_DATE] = np.datetime64('NaT')
+    return dates
+
+
+class Categories:
+    # Maps each distinct string to a small integer code
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, values):
+        return np.array([self.code(value) for value in values], dtype=np.int32)
+
+
+class JobColumns:
+    # Column-oriented view of the job set. Name, Location and Status are held
+    # as category codes and Production Date as datetime64, so filters become
+    # boolean masks and the job list sorts with a single lexsort.
+    #
+    # Sorting by another column uses a permutation of every row in that
+    # column's order, built on the first sort by it and then kept up to date
+    # one job at a time, so re-sorting or paging a 100k job list is a mask
+    # lookup rather than a sort.
+
+    def __init__(self, jobs=()):
+        self.build(jobs)
+
+    def build(self, jobs):
+        self.jobs = list(jobs)
+        self.rows = {job["Job Number"]: i for i, job in enumerate(self.jobs)}
+        self.categories = {field: Categories() for field in CATEGORICAL_FIELDS}
+        self.codes = {field: self.categories[field].encode([job[field] for job in self.jobs])
+                      for field in CATEGORICAL_FIELDS}
+        self.production_dates = production_dates(self.jobs)
+        self.days = None  # Days In Shop as of days_today, worked out on first use
+        self.days_today = None
+        self.sort_keys = {}  # field -> sort_key() of each row, for the columns sorted by so far
+        self.permutations = {}  # field -> rows in sort_keys order, ties by row
+        self.permutation_arrays = {}  # field -> permutations[field] as an array, until it next changes
+
+    def attach(self, store):
+        # Keep the columns in step with a JobStore
+        store.add_listener(lambda event, job, job_number: self.on_store_change(store, event, job, job_number))
+        self.build(store)
+        return self
+
+    def on_store_change(self, store, event, job, job_number):
+        if event == "load":
+            self.build(store)
+        elif event == "insert":
+            self.append(job)
+        elif event == "update":
+            self.update(job_number, job)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def append(self, job):
+        self.rows[job["Job Number"]] = len(self.jobs)
+        self.jobs.append(job)
+        for field in CATEGORICAL_FIELDS:
+            self.codes[field] = np.append(self.codes[field], np.int32(self.categories[field].code(job[field])))
+        self.production_dates = np.append(self.production_dates, production_dates([job]))
+        if self.days is not None:
+            self.days = np.append(self.days, self.age(self.production_dates[-1]))
+        row = len(self.jobs) - 1
+        for field, keys in self.sort_keys.items():
+            keys.append(sort_key(field, job))
+            insort(self.permutations[field], row, key=keys.__getitem__)
+            self.permutation_arrays.pop(field, None)
+
+    def update(self, job_number, job):
+        # job_number is the number the job had before the update
+        row = self.rows.pop(job_number)
+        self.rows[job["Job Number"]] = row
+        self.jobs[row] = job
+        for field in CATEGORICAL_FIELDS:
+            self.codes[field][row] = self.categories[field].code(job[field])
+        self.production_dates[row] = production_dates([job])[0]
+        if self.days is not None:
+            self.days[row] = self.age(self.production_dates[row])
+        for field, keys in self.sort_keys.items():
+            key = sort_key(field, job)
+            if key != keys[row]:
+                permutation = self.permutations[field]
+                permutation.remove(row)
+                keys[row] = key
+                insort(permutation, row, key=lambda other: (keys[other], other))
+                self.permutation_arrays.pop(field, None)
+
+    def mask(self, Name=None, Location=None, Status=None, job_numbers=None, start_date=None, end_date=None):
+        # Empty or None criteria match everything, like JobStore.find;
+        # job_numbers, if given, restricts the mask to those jobs (e.g. search hits)
+        # and start_date/end_date bound the Production Date (inclusive)
+        criteria = {"Name": Name, "Location": Location, "Status": Status}
+        if job_numbers is None:
+            mask = np.ones(len(self.jobs), dtype=bool)
+        else:
+            mask = np.zeros(len(self.jobs), dtype=bool)
+            mask[[self.rows[job_number] for job_number in job_numbers if job_number in self.rows]] = True
+        for field, value in criteria.items():
+            if not value:
+                continue
+            code = self.categories[field].codes.get(value)
+            if code is None:
+                return np.zeros(len(self.jobs), dtype=bool)
+            mask &= self.codes[field] == code
+        if start_date:
+            mask &= self.production_dates >= np.datetime64(start_date, 'D')
+        if end_date:
+            mask &= self.production_dates <= np.datetime64(end_date, 'D')
+        return mask
+
+    def days_in_shop(self, today=None):
+        # Ages are cached for the day they were worked out for; when the day
+        # moves on, the jobs that have a date all age by the same amount
+        today = today or date.today()
+        if self.days is None:
+            days = np.datetime64(today, 'D') - self.production_dates
+            # Unparseable dates count as 0 days rather than garbage
+            self.days = np.where(np.isnat(days), 0, days.astype(np.int64))
+        elif today != self.days_today:
+            self.days[~np.isnat(self.production_dates)] += (today - self.days_today).days
+        self.days_today = today
+        return self.days
+
+    def age(self, production_date):
+        # Days In Shop of one datetime64 date as of days_today
+        if np.isnat(production_date):
+            return 0
+        return (np.datetime64(self.days_today, 'D') - production_date).astype(np.int64)
+
+    def permutation(self, field):
+        # Every row, in field's sort_key order
+        array = self.permutation_arrays.get(field)
+        if array is None:
+            if field not in self.sort_keys:
+                keys = self.sort_keys[field] = [sort_key(field, job) for job in self.jobs]
+                self.permutations[field] = sorted(range(len(keys)), key=keys.__getitem__)
+            array = self.permutation_arrays[field] = np.array(self.permutations[field], dtype=np.intp)
+        return array
+
+    def order(self, mask=None, today=None, sort_by=None, descending=False):
+        # Not Done jobs first, then by Days In Shop descending, unless sort_by
+        # names a column to sort by instead
+        days = self.days_in_shop(today)
+        not_done = self.categories["Status"].codes.get("Not Done", -1)
+        rows = np.arange(len(self.jobs)) if mask is None else np.flatnonzero(mask)
+        if sort_by is None:
+            done_rank = (self.codes["Status"] != not_done).astype(np.int8)
+            ordered = rows[np.lexsort((-days[rows], done_rank[rows]))]
+        elif sort_by == "Days In Shop":
+            # Done jobs show no Days In Shop, so they sort with the blanks
+            shown = np.where(self.codes["Status"] == not_done, days, np.iinfo(np.int64).min)
+            ordered = rows[np.argsort(shown[rows], kind='stable')]
+        else:
+            ordered = self.permutation(sort_by)
+            if mask is not None:
+                ordered = ordered[mask[ordered]]
+        if descending:
+            ordered = ordered[::-1]
+        return ordered, days
+
+    def criteria_mask(self, Name=None, Location=None, Status=None, job_numbers=None, start_date=None, end_date=None):
+        # None when nothing is filtered
+        if Name or Location or Status or job_numbers is not None or start_date or end_date:
+            return self.mask(Name=Name, Location=Location, Status=Status, job_numbers=job_numbers,
+                             start_date=start_date, end_date=end_date)
+        return None
+
+    def select(self, Name=None, Location=None, Status=None, job_numbers=None, start_date=None, end_date=None, today=None,
+               sort_by=None, descending=False):
+        # Filtered and sorted jobs plus their Days In Shop
+        mask = self.criteria_mask(Name=Name, Location=Location, Status=Status, job_numbers=job_numbers,
+                                  start_date=start_date, end_date=end_date)
+        ordered, days = self.order(mask, today, sort_by, descending)
+        return [self.jobs[row] for row in ordered], days[ordered].tolist()
+
+    def select_page(self, start, count, Name=None, Location=None, Status=None, job_numbers=None, today=None,
+                    sort_by=None, descending=False):
+        # Like select(), but only the count jobs from start on are looked up.
+        # Returns (jobs, days in shop, number of jobs matching in all).
+        mask = self.criteria_mask(Name=Name, Location=Location, Status=Status, job_numbers=job_numbers)
+        ordered, days = self.order(mask, today, sort_by, descending)
+        page = ordered[start:start + count]
+        return [self.jobs[row] for row in page], days[page].tolist(), len(ordered)
@@ -0,0 +1,73 @@
+import os
+import socket
+import threading
+import time
+
+
+class ConflictError(Exception):
+    # Raised when a job was changed by another workstation after it was
+    # opened for editing
+    pass
+
+
+class FileLock:
+    # Cross-process lock for a jobs file on a shared drive, held by creating a
+    # lock file exclusively (which also works over SMB/NFS, unlike flock).
+    # Re-entrant within one process so nested store calls can share it.
+
+    def __init__(self, path, timeout=10.0, stale_after=60.0):
+        self.path = path
+        self.timeout = timeout
+        self.stale_after = stale_after  # Break locks left behind by a crashed workstation
+        self.depth = 0
+        self.thread_lock = threading.RLock()
+
+    def acquire(self):
+        self.thread_lock.acquire()
+        if self.depth:
+            self.depth += 1
+            return
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                self._break_if_stale()
+                if time.monotonic() > deadline:
+                    self.thread_lock.release()
+                    raise TimeoutError(f"{self.path} is held by another workstation")
+                time.sleep(0.05)
+                continue
+            with os.fdopen(fd, mode='w') as file:
+                file.write(f"{socket.gethostname()} {os.getpid()}\n")
+            self.depth = 1
+            return
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        self.thread_lock.release()
+
+    def _break_if_stale(self):
+        try:
+            if time.time() - os.path.getmtime(self.path) > self.stale_after:
+                os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def version_of(job):
+    # Optimistic version stamp: the job's field values. If they differ when
+    # the edit is saved, someone else changed the job in the meantime.
+    return tuple(job.items()) if job is not None else None
@@ -0,0 +1,288 @@
+import csv
+import json
+import os
+import re
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+from job_record import FIELDNAMES, Status
+from journal import replace_file
+
+# Export files for accounting and other tools. Every writer takes the jobs as
+# an iterable and writes them as it goes, CHUNK_SIZE rows at a time where the
+# format needs batches, so memory stays bounded however many jobs there are;
+# nothing builds a DataFrame or holds the whole file in memory.
+#
+#   from export import export_jobs
+#   export_jobs(store.changed_since(yesterday), "jobs.parquet", today=clock.today)
+#
+# Parquet needs pyarrow, which is imported only when it is used. XLSX is
+# written directly as a zip of XML parts, with no extra dependency.
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet", "xlsx")
+EXPORT_FIELDS = FIELDNAMES + ["Days In Shop"]
+CHUNK_SIZE = 5000
+
+DATE_FIELDS = ("Sign off Date", "Production Date")
+
+
+def format_for(file_path):
+    # Export format from a file name, e.g. extract.xlsx -> "xlsx"
+    extension = os.path.splitext(file_path)[1].lower().lstrip(".")
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Cannot export to .{extension} files; use one of {', '.join(EXPORT_FORMATS)}")
+    return extension
+
+
+def parse_timestamp(text):
+    # --changed-since and the export dialogs take seconds since the epoch, or
+    # a local date or date and time such as 2024-03-01 or 2024-03-01T17:30
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text.strip()).timestamp()
+    except ValueError:
+        raise ValueError(f"Expected a date, a date and time, or seconds since the epoch, not {text!r}")
+
+
+def days_in_shop(job, today):
+    # Blank (None) for jobs that are done, as in the apps
+    if job.status is not Status.NOT_DONE:
+        return None
+    return (today - job.production_date).days if job.production_date else 0
+
+
+def job_values(job, fields, today):
+    # Text of each field, as in jobs.csv
+    values = []
+    for field in fields:
+        if field == "Days In Shop":
+            days = days_in_shop(job, today)
+            values.append("" if days is None else str(days))
+        else:
+            values.append(job.get(field, ""))
+    return values
+
+
+def typed_value(job, field, today):
+    # Dates as dates, Price as a Decimal, Days In Shop as an int; None when
+    # blank or unparseable. Other fields are text.
+    if field == "Days In Shop":
+        return days_in_shop(job, today)
+    if field in DATE_FIELDS:
+        return job.production_date if field == "Production Date" else job.sign_off_date
+    if field == "Price":
+        return None if job.price is None else Decimal(job.price).scaleb(-2)
+    return job.get(field, "")
+
+
+def chunks(jobs, size=CHUNK_SIZE):
+    chunk = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_csv(jobs, out, fields, today):
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    count = 0
+    for job in jobs:
+        writer.writerow(job_values(job, fields, today))
+        count += 1
+    return count
+
+
+def write_jsonl(jobs, out, fields, today):
+    count = 0
+    for job in jobs:
+        out.write(json.dumps(dict(zip(fields, job_values(job, fields, today)))) + "\n")
+        count += 1
+    return count
+
+
+def write_parquet(jobs, file_path, fields, today):
+    # One row group per chunk, with typed columns
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+    types = {"Sign off Date": pa.date32(), "Production Date": pa.date32(), "Price": pa.decimal128(18, 2),
+             "Days In Shop": pa.int32()}
+    schema = pa.schema([(field, types.get(field, pa.string())) for field in fields])
+    count = 0
+    with pq.ParquetWriter(file_path, schema) as writer:
+        for chunk in chunks(jobs):
+            columns = [[typed_value(job, field, today) for job in chunk] for field in fields]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=schema.field(i).type) for i, column in enumerate(columns)], schema=schema))
+            count += len(chunk)
+    return count
+
+
+# Characters XML 1.0 does not allow, even escaped
+XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+EXCEL_EPOCH = date(1899, 12, 30).toordinal()
+
+
+def escape(text):
+    # The three characters that need escaping in XML element text
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Jobs" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'),
+    # Style 1 shows a date (built-in number format 14), style 2 a price
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="2" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '</styleSheet>'),
+}
+
+
+def column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def xlsx_cell(reference, job, field, today):
+    value = typed_value(job, field, today)
+    if value is None or value == "":
+        if field not in DATE_FIELDS and field != "Price":
+            return ""
+        # Keep unparseable dates and prices visible as text
+        value = job.get(field, "") if field != "Days In Shop" else ""
+        if not value:
+            return ""
+    if isinstance(value, date):
+        return f'<c r="{reference}" s="1"><v>{value.toordinal() - EXCEL_EPOCH}</v></c>'
+    if isinstance(value, Decimal):
+        return f'<c r="{reference}" s="2"><v>{value}</v></c>'
+    if isinstance(value, int):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    text = escape(XML_ILLEGAL.sub("", value))
+    return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def xlsx_row(number, cells):
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+def write_xlsx(jobs, file_path, fields, today):
+    # The worksheet is streamed into the zip a chunk of rows at a time, with
+    # strings inline rather than in a shared string table held in memory
+    import zipfile  # Only exports to XLSX need it
+
+    letters = [column_letter(i) for i in range(len(fields))]
+    count = 0
+    with zipfile.ZipFile(file_path, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in XLSX_PARTS.items():
+            archive.writestr(name, xml)
+        with archive.open("xl/worksheets/sheet1.xml", mode='w', force_zip64=True) as sheet:
+            header = [f'<c r="{letter}1" t="inlineStr"><is><t>{escape(field)}</t></is></c>'
+                      for letter, field in zip(letters, fields)]
+            sheet.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                         '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                         '<sheetData>' + xlsx_row(1, header)).encode('utf-8'))
+            for chunk in chunks(jobs):
+                rows = []
+                for job in chunk:
+                    count += 1
+                    number = count + 1
+                    rows.append(xlsx_row(number, [xlsx_cell(f"{letter}{number}", job, field, today)
+                                                  for letter, field in zip(letters, fields)]))
+                sheet.write("".join(rows).encode('utf-8'))
+            sheet.write(b'</sheetData></worksheet>')
+    return count
+
+
+def write_export(jobs, file_path, export_format, fields, today):
+    if export_format == "csv":
+        with open(file_path, mode='w', newline='') as out:
+            return write_csv(jobs, out, fields, today)
+    if export_format == "jsonl":
+        with open(file_path, mode='w') as out:
+            return write_jsonl(jobs, out, fields, today)
+    if export_format == "parquet":
+        return write_parquet(jobs, file_path, fields, today)
+    return write_xlsx(jobs, file_path, fields, today)
+
+
+def export_jobs(jobs, file_path, fields=None, export_format=None, today=None):
+    # Write jobs to file_path in export_format (by default from the file
+    # extension), with the given columns (by default every field plus Days In
+    # Shop). Returns the number of jobs written. The export goes to a temp
+    # file in the same directory that replaces file_path once complete, so a
+    # failed export leaves any earlier file of that name as it was.
+    export_format = export_format or format_for(file_path)
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format!r}; use one of {', '.join(EXPORT_FORMATS)}")
+    fields = list(fields or EXPORT_FIELDS)
+    unknown = [field for field in fields if field not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+    today = today or date.today()
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".export-", suffix="." + export_format)
+    os.close(fd)
+    try:
+        count = write_export(jobs, tmp_path, export_format, fields, today)
+        replace_file(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
@@ -0,0 +1,93 @@
+from collections import deque
+
+
+class UndoHistory:
+    # Undo/redo for edits and status toggles made through a JobStore.
+    #
+    # Each step keeps only the fields it changed, as (old Job Number, new Job
+    # Number, old values, new values, version afterwards) per job, never a copy
+    # of the job list, so thousands of steps stay small. Undo and redo go back
+    # through JobStore.update/update_many, so they are journaled, reach other
+    # workstations, and update views through the usual store events.
+    #
+    # A step is refused with ConflictError if one of its jobs has been changed
+    # since (e.g. by another workstation), rather than overwriting that change.
+
+    def __init__(self, store, limit=1000):
+        self.store = store
+        self.undo_steps = deque(maxlen=limit)
+        self.redo_steps = []
+
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    def can_redo(self):
+        return bool(self.redo_steps)
+
+    def update(self, job_number, changes, expected_version=None):
+        # store.update, remembered for undo
+        before = self._values(job_number, changes)
+        job = self.store.update(job_number, changes, expected_version=expected_version)
+        self._remember([self._delta(job_number, job, before)])
+        return job
+
+    def update_many(self, changes_by_job_number, expected_versions=None):
+        # store.update_many, remembered for undo as a single step
+        before = {job_number: self._values(job_number, changes)
+                  for job_number, changes in changes_by_job_number.items()}
+        jobs = self.store.update_many(changes_by_job_number, expected_versions)
+        self._remember([self._delta(job["Job Number"], job, before[job["Job Number"]]) for job in jobs])
+        return jobs
+
+    def undo(self):
+        # Returns the jobs changed back, or None if there is nothing to undo
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps[-1]
+        jobs, redo_step = self._apply([(new_number, old_number, after, before, version)
+                                       for old_number, new_number, before, after, version in step])
+        self.undo_steps.pop()
+        self.redo_steps.append(redo_step)
+        return jobs
+
+    def redo(self):
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps[-1]
+        jobs, undo_step = self._apply([(new_number, old_number, after, before, version)
+                                       for old_number, new_number, before, after, version in step])
+        self.redo_steps.pop()
+        self.undo_steps.append(undo_step)
+        return jobs
+
+    def _apply(self, step):
+        # Set each job in step from its "before" values to its "after" ones.
+        # Returns the jobs and the step that reverses this one.
+        store = self.store
+        if len(step) == 1:
+            old_number, new_number, before, after, version = step[0]
+            jobs = [store.update(old_number, after, expected_version=version)]
+        else:
+            jobs = store.update_many({old_number: after for old_number, new_number, before, after, version in step},
+                                     {old_number: version for old_number, new_number, before, after, version in step})
+        reverse = [(old_number, new_number, before, after, store.version(new_number))
+                   for old_number, new_number, before, after, version in step]
+        return jobs, reverse
+
+    def _values(self, job_number, changes):
+        job = self.store.get(job_number)
+        if job is None:
+            raise KeyError(job_number)
+        return {field: job.get(field, "") for field in changes}
+
+    def _delta(self, job_number, job, before):
+        after = {field: job.get(field, "") for field in before}
+        changed = [field for field in before if before[field] != after[field]]
+        return (job_number, job["Job Number"], {field: before[field] for field in changed},
+                {field: after[field] for field in changed}, self.store.version(job["Job Number"]))
+
+    def _remember(self, deltas):
+        deltas = [delta for delta in deltas if delta[2]]
+        if deltas:
+            self.undo_steps.append(deltas)
+            self.redo_steps.clear()
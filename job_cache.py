@@ -0,0 +1,208 @@
+import gc
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from contextlib import contextmanager
+from datetime import date
+
+from job_record import Job, Status
+from journal import replace_file
+
+# Bump when Job's slots or the cache layout change; older caches are ignored
+CACHE_VERSION = 1
+
+SEPARATOR = "\x00"  # Between the values of a text column
+NO_PRICE = -(1 << 63)  # Stands in for a missing Price in the int64 column
+STATUSES = [None, Status.NOT_DONE, Status.DONE]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+LENGTH = struct.Struct("<Q")
+
+
+def cache_path(csv_path):
+    return csv_path + ".cache"
+
+
+@contextmanager
+def gc_paused():
+    # Building many small objects at once sets off repeated garbage
+    # collections that find nothing to free
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, mode='rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# The cache is a JSON header line followed by length-prefixed column blocks.
+# It holds plain data only (no pickle), since jobs.csv.cache may sit on a
+# shared drive that other workstations write to.
+
+def encode_texts(values):
+    if any(SEPARATOR in value for value in values):
+        raise ValueError("text contains the column separator")
+    return SEPARATOR.join(values).encode('utf-8')
+
+
+def decode_texts(block, count):
+    return block.decode('utf-8').split(SEPARATOR) if count else []
+
+
+def encode_categories(values):
+    codes = {}
+    encoded = array('i', [codes.setdefault(value, len(codes)) for value in values])
+    return [encode_texts(list(codes)), encoded.tobytes()]
+
+
+def decode_categories(texts, codes, count):
+    values = [sys.intern(value) for value in texts.decode('utf-8').split(SEPARATOR)]
+    return [values[code] for code in array_from(codes, 'i')]
+
+
+def encode_dates(values):
+    return [array('i', [0 if value is None else value.toordinal() for value in values]).tobytes()]
+
+
+def decode_dates(block, count):
+    ordinals = array_from(block, 'i')
+    dates = {ordinal: date.fromordinal(ordinal) for ordinal in set(ordinals) if ordinal}
+    dates[0] = None
+    return [dates[ordinal] for ordinal in ordinals]
+
+
+def encode_prices(values):
+    return [array('q', [NO_PRICE if value is None else value for value in values]).tobytes()]
+
+
+def decode_prices(block, count):
+    return [None if cents == NO_PRICE else cents for cents in array_from(block, 'q')]
+
+
+def encode_statuses(values):
+    return [bytes(STATUS_CODES[value] for value in values)]
+
+
+def decode_statuses(block, count):
+    return [STATUSES[code] for code in block]
+
+
+def encode_raw(values):
+    # Sparse: only jobs that kept unparsed text
+    return [json.dumps({i: value for i, value in enumerate(values) if value}).encode('utf-8')]
+
+
+def decode_raw(block, count):
+    raw = [None] * count
+    for i, value in json.loads(block).items():
+        raw[int(i)] = value
+    return raw
+
+
+def array_from(block, typecode):
+    values = array(typecode)
+    values.frombytes(block)
+    return values
+
+
+# Job slot -> (encode, decode, number of blocks), in Job.__slots__ order
+COLUMN_CODECS = {
+    "sign_off_date": (encode_dates, decode_dates, 1),
+    "name": (encode_categories, decode_categories, 2),
+    "phone_number": (lambda values: [encode_texts(values)], decode_texts, 1),
+    "location": (encode_categories, decode_categories, 2),
+    "production_date": (encode_dates, decode_dates, 1),
+    "price": (encode_prices, decode_prices, 1),
+    "notes": (lambda values: [encode_texts(values)], decode_texts, 1),
+    "job_number": (lambda values: [encode_texts(values)], decode_texts, 1),
+    "status": (encode_statuses, decode_statuses, 1),
+    "raw": (encode_raw, decode_raw, 1),
+}
+
+
+def read_cache(csv_path, stat):
+    # Jobs parsed from csv_path on an earlier run, as (fieldnames, jobs), or
+    # None if there is no cache or the CSV has changed since. stat is the
+    # os.stat of the CSV; its size and mtime are checked before the hash.
+    try:
+        with open(cache_path(csv_path), mode='rb') as file:
+            header = json.loads(file.readline())
+            if (header.get("version") != CACHE_VERSION or header.get("byteorder") != sys.byteorder
+                    or header.get("size") != stat.st_size or header.get("mtime") != stat.st_mtime_ns
+                    or header.get("digest") != file_digest(csv_path)):
+                return None
+            data = file.read()
+
+        count = header["count"]
+        offset = 0
+        columns = []
+        for slot in Job.__slots__:
+            encode, decode, block_count = COLUMN_CODECS[slot]
+            blocks = []
+            for _ in range(block_count):
+                (length,) = LENGTH.unpack_from(data, offset)
+                offset += LENGTH.size
+                blocks.append(data[offset:offset + length])
+                offset += length
+            column = decode(*blocks, count)
+            if len(column) != count:
+                return None
+            columns.append(column)
+    except (OSError, ValueError, KeyError, IndexError, TypeError, AttributeError, struct.error):
+        return None
+
+    jobs = []
+    new = Job.__new__
+    with gc_paused():
+        for state in zip(*columns):
+            job = new(Job)
+            job.__setstate__(state)
+            jobs.append(job)
+    return header["fieldnames"], jobs
+
+
+def write_cache(csv_path, stat, fieldnames, jobs):
+    # Store the parsed jobs next to the CSV. The cache is only an
+    # accelerator, so failing to write it is not an error.
+    try:
+        digest = file_digest(csv_path)
+        current = os.stat(csv_path)
+        if (current.st_size, current.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            return  # The CSV changed while we were reading it
+        header = {"version": CACHE_VERSION, "byteorder": sys.byteorder, "size": stat.st_size,
+                  "mtime": stat.st_mtime_ns, "digest": digest, "fieldnames": list(fieldnames), "count": len(jobs)}
+        blocks = []
+        for slot in Job.__slots__:
+            encode = COLUMN_CODECS[slot][0]
+            blocks.extend(encode([getattr(job, slot) for job in jobs]))
+    except (OSError, ValueError, OverflowError):
+        return
+
+    path = cache_path(csv_path)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".jobs-", suffix=".cache")
+        try:
+            with os.fdopen(fd, mode='wb') as file:
+                file.write(json.dumps(header).encode('utf-8') + b"\n")
+                for block in blocks:
+                    file.write(LENGTH.pack(len(block)))
+                    file.write(block)
+            replace_file(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    except OSError:
+        pass
@@ -0,0 +1,34 @@
+from job_cache import gc_paused
+from schema import read_rows, validate_rows, write_rejected
+
+
+def read_import(file_path, store, quarantine_path=None, existing=None):
+    # Read jobs to import from another CSV with the jobs.csv columns, checked
+    # and normalized by schema.validate_rows. Returns (jobs, errors,
+    # duplicates): the rows that passed, "row N: problem; problem" strings
+    # for the ones that did not (N is the line in the file), and the Job
+    # Numbers skipped because existing (by default the store; see
+    # archive.KnownJobNumbers) already has them. A row repeating the Job
+    # Number of an earlier row does not pass. With quarantine_path, rows
+    # that did not pass are also written there.
+    with gc_paused():
+        fieldnames, rows, line_numbers = read_rows(file_path)
+        if "Job Number" not in fieldnames:
+            raise ValueError(f"{file_path} has no Job Number column")
+        jobs, errors, duplicates, rejected = validate_rows(fieldnames, rows, line_numbers,
+                                                            existing=store if existing is None else existing)
+    if quarantine_path and rejected:
+        write_rejected(quarantine_path, fieldnames, rejected)
+    return jobs, errors, duplicates
+
+
+def import_jobs(file_path, store, quarantine_path=None, existing=None):
+    # Read, check and add the jobs in file_path as a single batch. Returns
+    # (jobs added, errors, duplicates) as read_import describes.
+    jobs, errors, duplicates = read_import(file_path, store, quarantine_path, existing)
+    added = store.insert_many(jobs, skip_existing=True) if jobs else []
+    if len(added) < len(jobs):
+        # Another workstation added some of them between reading and saving
+        added_numbers = {job["Job Number"] for job in added}
+        duplicates += [job["Job Number"] for job in jobs if job["Job Number"] not in added_numbers]
+    return added, errors, duplicates
@@ -0,0 +1,142 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtGui import QColor
+
+from job_record import Status
+from shop_clock import palette_index
+
+# Columns shown in the job table, in display order
+COLUMNS = ["Sign off Date", "Name", "Phone Number", "Location", "Production Date", "Price", "Notes", "Job Number", "Status", "Days In Shop"]
+DAYS_COLUMN = COLUMNS.index("Days In Shop")
+
+# Define the maximum days for the gradient scale
+MAX_DAYS = 30
+
+DONE_COLOR = QColor(220, 220, 220)  # Grey background for done jobs
+
+
+def interpolate_color(start, end, value, max_value):
+    # Interpolate a color component (e.g., red, green, or blue) based on a value and a maximum value
+    return int(start + (end - start) * (value / max_value))
+
+
+def build_palette(max_days=MAX_DAYS):
+    # Green (for 0 days) to red (for max_days), built once instead of per cell
+    min_color = QColor(0, 255, 0)
+    max_color = QColor(255, 0, 0)
+    palette = []
+    for days in range(max_days + 1):
+        r = interpolate_color(min_color.red(), max_color.red(), days, max_days)
+        g = interpolate_color(min_color.green(), max_color.green(), days, max_days)
+        b = interpolate_color(min_color.blue(), max_color.blue(), days, max_days)
+        palette.append(QColor(r, g, b))
+    return palette
+
+
+PALETTE = build_palette()
+
+
+def get_background_color(days_in_shop):
+    # Set to red if days_in_shop exceeds max_days
+    return PALETTE[palette_index(days_in_shop, MAX_DAYS)]
+
+
+class JobTableModel(QAbstractTableModel):
+    # Table model over the job records. Qt only asks for the cells that are
+    # on screen, so text and colors are worked out on demand in data()
+    # instead of building an item per cell up front.
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = []  # Job dicts in display order
+        self.days = []  # Days In Shop for each row
+
+    def set_jobs(self, jobs, days):
+        self.beginResetModel()
+        self.jobs = jobs
+        self.days = days
+        self.endResetModel()
+
+    def append_jobs(self, jobs, days):
+        # Used while loading: rows are streamed in as chunks are parsed
+        if not jobs:
+            return
+        first = len(self.jobs)
+        self.beginInsertRows(QModelIndex(), first, first + len(jobs) - 1)
+        self.jobs.extend(jobs)
+        self.days.extend(days)
+        self.endInsertRows()
+
+    def shift_days(self, days, resort=True):
+        # The day moved on: every job with a Production Date is days older.
+        # Only the Days In Shop column is repainted, and only the rows whose
+        # color changes get a BackgroundRole change. Rows that are now out of
+        # order (e.g. a job from yesterday passing an undated one) are moved
+        # with a layout change, keeping the selection, instead of a reset.
+        # resort=False leaves the rows alone, for views sorted by another column.
+        dated = [row for row, job in enumerate(self.jobs) if job.production_date is not None]
+        if not dated:
+            return
+        recolored = []
+        for row in dated:
+            old = self.days[row]
+            self.days[row] = old + days
+            if palette_index(old, MAX_DAYS) != palette_index(old + days, MAX_DAYS):
+                recolored.append(row)
+        self.dataChanged.emit(self.index(dated[0], DAYS_COLUMN), self.index(dated[-1], DAYS_COLUMN), [Qt.DisplayRole])
+        if recolored:
+            self.dataChanged.emit(self.index(recolored[0], DAYS_COLUMN), self.index(recolored[-1], DAYS_COLUMN),
+                                  [Qt.BackgroundRole])
+        if not resort:
+            return
+
+        # Not Done first, then the longest in the shop first, as JobColumns.order sorts
+        keys = [(job.status is not Status.NOT_DONE, -age) for job, age in zip(self.jobs, self.days)]
+        if all(a <= b for a, b in zip(keys, keys[1:])):
+            return
+        self.layoutAboutToBeChanged.emit()
+        order = sorted(range(len(keys)), key=keys.__getitem__)  # Stable, so ties keep their order
+        new_rows = [0] * len(order)
+        for new_row, old_row in enumerate(order):
+            new_rows[old_row] = new_row
+        self.jobs = [self.jobs[row] for row in order]
+        self.days = [self.days[row] for row in order]
+        old_indexes = self.persistentIndexList()
+        self.changePersistentIndexList(old_indexes, [self.index(new_rows[index.row()], index.column())
+                                                     for index in old_indexes])
+        self.layoutChanged.emit()
+
+    def job_at(self, row):
+        return self.jobs[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.jobs)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        column = index.column()
+        job = self.jobs[row]
+
+        if role == Qt.DisplayRole:
+            if column == DAYS_COLUMN:
+                # Days In Shop is blank for done jobs
+                return "" if job["Status"] == "Done" else str(self.days[row])
+            return job.get(COLUMNS[column], "")
+
+        if role == Qt.BackgroundRole:
+            # Grey out the row for done jobs
+            if job["Status"] == "Done":
+                return DONE_COLOR
+            if column == DAYS_COLUMN:
+                return get_background_color(self.days[row])
+
+        return None
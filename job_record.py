@@ -0,0 +1,250 @@
+import sys
+from collections.abc import Mapping
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from enum import Enum
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+
+# Column order used by jobs.csv
+FIELDNAMES = ["Sign off Date", "Name", "Phone Number", "Location", "Production Date", "Price", "Notes", "Job Number", "Status"]
+
+# Attribute holding each field on a Job
+FIELD_SLOTS = {
+    "Sign off Date": "sign_off_date",
+    "Name": "name",
+    "Phone Number": "phone_number",
+    "Location": "location",
+    "Production Date": "production_date",
+    "Price": "price",
+    "Notes": "notes",
+    "Job Number": "job_number",
+    "Status": "status",
+}
+
+
+class Status(Enum):
+    NOT_DONE = "Not Done"
+    DONE = "Done"
+
+
+STATUS_BY_TEXT = {status.value.lower(): status for status in Status}
+STATUS_BY_VALUE = {status.value: status for status in Status}
+
+
+@lru_cache(maxsize=65536)
+def parse_date(text):
+    # YYYY-MM-DD. Dates repeat a lot, so each distinct string is parsed once
+    # and every job with that date shares one date object.
+    if len(text) != 10:
+        raise ValueError(f"not a YYYY-MM-DD date: {text!r}")
+    return date.fromisoformat(text)
+
+
+def format_date(value):
+    return value.isoformat()
+
+
+def parse_price(text):
+    # Price in integer cents; "$1,250.50" -> 125050
+    if text.isdigit():
+        return int(text) * 100
+    text = text.strip().lstrip("$").replace(",", "")
+    try:
+        value = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"not a price: {text!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"not a price: {text!r}")
+    return int((value * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def format_price(cents):
+    sign = "-" if cents < 0 else ""
+    whole, part = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{part:02d}" if part else f"{sign}{whole}"
+
+
+def parse_status(text):
+    status = STATUS_BY_TEXT.get(text.strip().lower())
+    if status is None:
+        raise ValueError(f"Status must be Done or Not Done, not {text!r}")
+    return status
+
+
+# Plain dict lookup; Enum's .value is a comparatively slow descriptor
+format_status = {status: status.value for status in Status}.__getitem__
+
+
+# Fields held as parsed values: field -> (parse, format)
+TYPED_FIELDS = {
+    "Sign off Date": (parse_date, format_date),
+    "Production Date": (parse_date, format_date),
+    "Price": (parse_price, format_price),
+    "Status": (parse_status, format_status),
+}
+
+# field -> (slot, format or None), for fast lookups by field name
+FIELD_ACCESS = {field: (slot, TYPED_FIELDS[field][1] if field in TYPED_FIELDS else None)
+                for field, slot in FIELD_SLOTS.items()}
+
+# Fields whose strings repeat across jobs and are shared rather than copied
+INTERNED_FIELDS = ("Name", "Location")
+
+
+def parse_field(field, text):
+    # Typed value for one field; raises ValueError if text does not parse.
+    # Empty text is an empty (None) value.
+    if not text:
+        return None if field in TYPED_FIELDS else ""
+    typed = TYPED_FIELDS.get(field)
+    if typed is not None:
+        return typed[0](text)
+    if field in INTERNED_FIELDS:
+        return sys.intern(text)
+    return text
+
+
+class Job(Mapping):
+    # One job, parsed once when it is read. Dates are date objects, Price is
+    # integer cents and Status a Status member; Name and Location are interned.
+    # __slots__ keeps each job to one small object instead of a dict of strings.
+    #
+    # Jobs still read like the csv.DictReader rows they replace:
+    # job["Production Date"] gives the text as written to jobs.csv, while
+    # job.production_date gives the parsed value. Text that does not parse
+    # (and columns jobs.csv has beyond FIELDNAMES) is kept as-is in raw.
+
+    __slots__ = tuple(FIELD_SLOTS.values()) + ("raw",)
+
+    @classmethod
+    def from_row(cls, row, strict=False):
+        # Build a job from a dict of strings. With strict=True a value that
+        # does not parse raises ValueError instead of being kept as text.
+        get = row.get
+        job = cls.from_values([get(field) or "" for field in FIELDNAMES], strict)
+        if not row.keys() <= FIELD_SLOTS.keys():
+            # Columns beyond FIELDNAMES are carried along as text
+            for field in row.keys() - FIELD_SLOTS.keys():
+                if field is not None:
+                    job._keep_raw(field, row[field] or "")
+        return job
+
+    @classmethod
+    def from_values(cls, values, strict=False):
+        # Build a job from the field texts in FIELDNAMES order, e.g. a row
+        # straight from csv.reader
+        job = cls.__new__(cls)
+        job.raw = None
+        try:
+            # Fast path for well-formed rows, which is nearly all of them
+            sign_off_date, name, phone_number, location, production_date, price, notes, job_number, status = values
+            job.sign_off_date = parse_date(sign_off_date) if sign_off_date else None
+            job.name = sys.intern(name)
+            job.phone_number = phone_number
+            job.location = sys.intern(location)
+            job.production_date = parse_date(production_date) if production_date else None
+            job.price = parse_price(price) if price else None
+            job.notes = notes
+            job.job_number = job_number
+            job.status = (STATUS_BY_VALUE.get(status) or parse_status(status)) if status else None
+        except ValueError:
+            # A value that does not parse, or a short row
+            values = list(values) + [""] * (len(FIELDNAMES) - len(values))
+            for (field, slot), text in zip(FIELD_SLOTS.items(), values):
+                job._set(field, slot, text or "", strict)
+        return job
+
+    def _set(self, field, slot, text, strict):
+        try:
+            value = parse_field(field, text)
+        except ValueError:
+            if strict:
+                raise ValueError(f"Invalid {field}: {text!r}") from None
+            value = None
+            self._keep_raw(field, text)
+        else:
+            if self.raw is not None and field in self.raw:
+                del self.raw[field]
+        setattr(self, slot, value)
+
+    def _keep_raw(self, field, text):
+        if self.raw is None:
+            self.raw = {}
+        self.raw[field] = text
+
+    def update(self, changes, strict=False):
+        for field, text in changes.items():
+            slot = FIELD_SLOTS.get(field)
+            if slot is None:
+                self._keep_raw(field, text)
+            else:
+                self._set(field, slot, text, strict)
+
+    def __getitem__(self, field):
+        raw = self.raw
+        if raw is not None and field in raw:
+            return raw[field]
+        slot, format = FIELD_ACCESS[field]
+        value = getattr(self, slot)
+        if format is None:
+            return value  # Text fields are never None
+        return "" if value is None else format(value)
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        yield from FIELD_SLOTS
+        if self.raw is not None:
+            for field in self.raw:
+                if field not in FIELD_SLOTS:
+                    yield field
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, Job):
+            return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def copy(self):
+        job = Job.__new__(Job)
+        job.__setstate__(self.__getstate__())
+        if job.raw is not None:
+            job.raw = dict(job.raw)
+        return job
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        (self.sign_off_date, self.name, self.phone_number, self.location, self.production_date,
+         self.price, self.notes, self.job_number, self.status, self.raw) = state
+
+    def __repr__(self):
+        return f"Job({dict(self)!r})"
+
+
+def text_getter(field):
+    # Fast equivalent of lambda job: job[field]. Untyped fields are never
+    # kept in raw, so they can be read straight from their slot.
+    if field in TYPED_FIELDS:
+        return itemgetter(field)
+    return attrgetter(FIELD_SLOTS[field])
+
+
+def check_fields(changes):
+    # Raise ValueError naming the first field in changes that does not parse
+    for field, text in changes.items():
+        if field in FIELD_SLOTS:
+            try:
+                parse_field(field, text or "")
+            except ValueError:
+                raise ValueError(f"Invalid {field}: {text!r}") from None
@@ -0,0 +1,297 @@
+import argparse
+import os
+import sys
+import time
+from itertools import chain
+
+from archive import PERIODS, ArchivePolicy, JobArchive, KnownJobNumbers, archive_done_jobs
+from concurrency import ConflictError
+from export import EXPORT_FIELDS, EXPORT_FORMATS, export_jobs, job_values, parse_timestamp, write_csv, write_jsonl
+from jobstore import JobStore
+from job_import import import_jobs
+from job_record import FIELDNAMES, Status
+from schema import read_rows, rejected_path, validate_job, validate_rows, write_rejected
+from shop_clock import ShopClock
+from storage import CsvStorage
+
+# Command-line access to the jobs file for scripts and cron, without a
+# display server:
+#
+#   python jobs.py list --status "Not Done" --format csv
+#   python jobs.py search "client 3 rush"
+#   python jobs.py mark 100042 100043 --done
+#   python jobs.py add "Job Number=100999" "Name=Client 7" "Status=Not Done"
+#   python jobs.py import orders.csv
+#   python jobs.py check --quarantine bad_rows.csv
+#   python jobs.py export --format jsonl --output jobs.jsonl
+#   python jobs.py export --output extract.xlsx --status Done --changed-since 2024-03-01
+#   python jobs.py report --output not_done_jobs.pdf
+#   python jobs.py archive --keep-days 90 --by month
+#   python jobs.py list --status Done --archived
+#
+# Only the store is imported up front. numpy (for the report's sort) and
+# fpdf are imported by the commands that need them, so simple queries start
+# quickly.
+
+LIST_FIELDS = EXPORT_FIELDS
+FORMATS = ("table", "csv", "jsonl")
+
+
+def sorted_jobs(jobs, clock):
+    # Not Done jobs first, then the longest in the shop first, as in the apps
+    def key(job):
+        return job.status is not Status.NOT_DONE, -clock.age(job.production_date)
+    return sorted(jobs, key=key)
+
+
+def write_jobs(jobs, fields, output_format, out, clock):
+    # Rows are written as they are produced, so output starts straight away
+    # and can be piped into other tools
+    if output_format == "jsonl":
+        write_jsonl(jobs, out, fields, clock.today)
+    elif output_format == "csv":
+        write_csv(jobs, out, fields, clock.today)
+    else:
+        # Tab-separated, with a header row
+        out.write("\t".join(fields) + "\n")
+        for job in jobs:
+            out.write("\t".join(value.replace("\t", " ").replace("\n", " ")
+                                for value in job_values(job, fields, clock.today)) + "\n")
+
+
+def archived_jobs(store, options):
+    # Jobs in the archive but not the store, if --archived was given
+    if not options.archived:
+        return []
+    return JobArchive(options.file).jobs(exclude=store.jobs)
+
+
+def command_list(store, options, clock):
+    jobs = store.find(Name=options.client, Location=options.location, Status=options.status)
+    if options.status != "Not Done":
+        # Only Done jobs are archived
+        criteria = {"Name": options.client, "Location": options.location, "Status": options.status}
+        jobs += [job for job in archived_jobs(store, options)
+                 if all(not value or job[field] == value for field, value in criteria.items())]
+    write_jobs(sorted_jobs(jobs, clock), options.fields or LIST_FIELDS, options.format, sys.stdout, clock)
+    return 0
+
+
+def command_search(store, options, clock):
+    from search_index import SearchIndex
+    jobs = {job["Job Number"]: job for job in store}
+    jobs.update((job["Job Number"], job) for job in archived_jobs(store, options))
+    index = SearchIndex()
+    index.build(jobs.values())
+    matches = index.search(" ".join(options.query))
+    jobs = [jobs[job_number] for job_number in matches]
+    write_jobs(sorted_jobs(jobs, clock), options.fields or LIST_FIELDS, options.format, sys.stdout, clock)
+    return 0
+
+
+def command_mark(store, options, clock):
+    missing = [job_number for job_number in options.job_numbers if job_number not in store]
+    if missing:
+        print(f"No such job: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    status = "Done" if options.done else "Not Done"
+    changed = store.update_many({job_number: {"Status": status} for job_number in options.job_numbers})
+    print(f"Marked {len(options.job_numbers)} jobs {status} ({len(changed)} changed)", file=sys.stderr)
+    return 0
+
+
+def command_add(store, options, clock):
+    new_job = {}
+    for assignment in options.values:
+        field, sep, value = assignment.partition("=")
+        if not sep or field not in FIELDNAMES:
+            print(f"Expected FIELD=VALUE with FIELD one of {', '.join(FIELDNAMES)}, not {assignment!r}", file=sys.stderr)
+            return 2
+        new_job[field] = value
+    job, problems = validate_job(new_job, existing=KnownJobNumbers(store, JobArchive(options.file)))
+    if problems:
+        print("\n".join(problems), file=sys.stderr)
+        return 2
+    store.insert(job)
+    print(f"Added job {job['Job Number']}", file=sys.stderr)
+    return 0
+
+
+def command_import(store, options, clock):
+    # Adds the rows that pass as one change; the others are listed and set
+    # aside in the quarantine file
+    quarantine_path = options.quarantine or rejected_path(options.path)
+    added, errors, duplicates = import_jobs(options.path, store, quarantine_path,
+                                            KnownJobNumbers(store, JobArchive(options.file)))
+    for error in errors:
+        print(error, file=sys.stderr)
+    if duplicates:
+        print(f"Skipped {len(duplicates)} already existing Job Numbers: {', '.join(duplicates[:20])}", file=sys.stderr)
+    print(f"Imported {len(added)} jobs", file=sys.stderr)
+    if errors:
+        print(f"Set aside {len(errors)} invalid rows in {quarantine_path}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def command_check(store, options, clock):
+    # Validate the jobs file itself, e.g. after it was edited by hand. Rows
+    # with problems still load (their bad values show as text), so nothing
+    # is changed; with --quarantine they are copied out to fix.
+    if isinstance(store.storage, CsvStorage):
+        # The file as written, so repeated Job Numbers show up too
+        fieldnames, rows, line_numbers = read_rows(options.file)
+    else:
+        fieldnames, rows, line_numbers = FIELDNAMES, [[job[field] for field in FIELDNAMES] for job in store], None
+    # A row repeating an earlier Job Number is reported as invalid
+    jobs, errors, duplicates, rejected = validate_rows(fieldnames, rows, line_numbers)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if options.quarantine and rejected:
+        write_rejected(options.quarantine, fieldnames, rejected)
+    print(f"Checked {len(rows)} jobs: {len(errors)} invalid", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def command_export(store, options, clock):
+    # Streams the jobs matching the filters, in file order, with every field
+    # plus Days In Shop unless --fields picks the columns. With
+    # --changed-since only jobs added or edited since then are written; the
+    # time to pass next run is printed to standard error, so a daily extract
+    # can pick up exactly where the last one stopped.
+    next_since = time.time()
+    fields = options.fields or EXPORT_FIELDS
+    jobs = store.changed_since(parse_timestamp(options.changed_since)) if options.changed_since else store
+    criteria = {"Name": options.client, "Location": options.location, "Status": options.status}
+    criteria = {field: value for field, value in criteria.items() if value}
+    if not options.changed_since:
+        jobs = chain(jobs, archived_jobs(store, options))
+    jobs = (job for job in jobs if all(job[field] == value for field, value in criteria.items()))
+    if options.output:
+        export_format = options.format or os.path.splitext(options.output)[1].lower().lstrip(".")
+        count = export_jobs(jobs, options.output, fields, export_format, clock.today)
+        print(f"Wrote {count} jobs to {options.output}", file=sys.stderr)
+    elif options.format in ("parquet", "xlsx"):
+        print(f"--format {options.format} needs --output", file=sys.stderr)
+        return 2
+    else:
+        write_jobs(jobs, fields, options.format or "csv", sys.stdout, clock)
+    if options.changed_since:
+        print(f"Next --changed-since: {next_since:.6f}", file=sys.stderr)
+    return 0
+
+
+def command_report(store, options, clock):
+    # The nightly "not done" PDF, as Print PDF makes it in work2.py
+    from columnar import JobColumns
+    from report import write_not_done_report
+    count = write_not_done_report(JobColumns(store), options.output, location=options.location,
+                                  client=options.client, start_date=options.start_date,
+                                  end_date=options.end_date, today=clock.today)
+    print(f"Wrote {count} jobs to {options.output}", file=sys.stderr)
+    return 0
+
+
+def command_archive(store, options, clock):
+    # Meant to run nightly, e.g. from cron, so the apps only load open work
+    policy = ArchivePolicy(keep_done_days=options.keep_days, period=options.by)
+    archive = JobArchive(options.file)
+    moved = archive_done_jobs(store, archive, policy, today=clock.today)
+    print(f"Archived {len(moved)} Done jobs to {archive.directory}", file=sys.stderr)
+    return 0
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(prog="jobs", description="Query and update the jobs file without the GUI")
+    parser.add_argument("--file", default="jobs.csv", help="jobs file to open (jobs.csv or e.g. jobs.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_output_options(command, formats=FORMATS, default=FORMATS[0]):
+        command.add_argument("--format", choices=formats, default=default)
+        command.add_argument("--fields", nargs="+", choices=LIST_FIELDS, metavar="FIELD",
+                             help="columns to output, in order")
+        command.add_argument("--archived", action="store_true", help="include archived Done jobs")
+
+    command = commands.add_parser("list", help="list jobs, Not Done and oldest first")
+    command.add_argument("--status", choices=[status.value for status in Status])
+    command.add_argument("--location")
+    command.add_argument("--client")
+    add_output_options(command)
+    command.set_defaults(run=command_list)
+
+    command = commands.add_parser("search", help="jobs matching every search term, in any field")
+    command.add_argument("query", nargs="+")
+    add_output_options(command)
+    command.set_defaults(run=command_search)
+
+    command = commands.add_parser("mark", help="mark jobs Done or Not Done, as one change")
+    command.add_argument("job_numbers", nargs="+", metavar="JOB_NUMBER")
+    status = command.add_mutually_exclusive_group(required=True)
+    status.add_argument("--done", action="store_true")
+    status.add_argument("--not-done", action="store_true")
+    command.set_defaults(run=command_mark)
+
+    command = commands.add_parser("add", help="add a job")
+    command.add_argument("values", nargs="+", metavar="FIELD=VALUE")
+    command.set_defaults(run=command_add)
+
+    command = commands.add_parser("import", help="add the jobs in another CSV file, setting invalid rows aside")
+    command.add_argument("path", metavar="CSV_FILE")
+    command.add_argument("--quarantine", metavar="PATH",
+                         help="where to write invalid rows (default: CSV_FILE with .rejected.csv)")
+    command.set_defaults(run=command_import)
+
+    command = commands.add_parser("check", help="report every invalid value and repeated Job Number in the jobs file")
+    command.add_argument("--quarantine", metavar="PATH", help="also copy the invalid rows to PATH")
+    command.set_defaults(run=command_check)
+
+    command = commands.add_parser("export", help="write jobs in file order, to CSV, JSONL, Parquet or XLSX")
+    add_output_options(command, formats=EXPORT_FORMATS, default=None)
+    command.add_argument("--output", help="file to write instead of standard output; "
+                                          "the format defaults to its extension")
+    command.add_argument("--status", choices=[status.value for status in Status])
+    command.add_argument("--location")
+    command.add_argument("--client")
+    command.add_argument("--changed-since", metavar="TIME",
+                         help="only jobs added or edited since TIME, a date, date and time, or epoch seconds")
+    command.set_defaults(run=command_export)
+
+    command = commands.add_parser("report", help="write the not done jobs PDF")
+    command.add_argument("--output", default="not_done_jobs.pdf")
+    command.add_argument("--location")
+    command.add_argument("--client")
+    command.add_argument("--start-date", help="earliest Production Date, YYYY-MM-DD")
+    command.add_argument("--end-date", help="latest Production Date, YYYY-MM-DD")
+    command.set_defaults(run=command_report)
+
+    command = commands.add_parser("archive", help="move old Done jobs out of the jobs file into the archive")
+    command.add_argument("--keep-days", type=int, default=ArchivePolicy().keep_done_days,
+                         help="days after sign-off that Done jobs stay in the jobs file (default %(default)s)")
+    command.add_argument("--by", choices=PERIODS, default="month", help="one archive file per month or per year")
+    command.set_defaults(run=command_archive)
+
+    return parser.parse_args(args)
+
+
+def main(args):
+    options = parse_args(args)
+    if not os.path.exists(options.file):
+        print(f"{options.file} not found", file=sys.stderr)
+        return 1
+    store = JobStore(options.file).load()
+    try:
+        return options.run(store, options, ShopClock())
+    except (KeyError, ValueError, TimeoutError, ConflictError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # The reader (e.g. head) stopped early; don't complain on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        # A change may have started a compaction in the background; exiting
+        # mid-write would leave jobs.csv.lock and a temporary file behind
+        store.storage.wait_for_compaction()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
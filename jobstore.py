@@ -0,0 +1,404 @@
+from itertools import count
+
+from concurrency import ConflictError, version_of
+from job_record import Job, check_fields, text_getter
+from storage import FIELDNAMES, open_storage
+
+# Fields that get a secondary index (value -> set of Job Numbers)
+INDEXED_FIELDS = ("Name", "Location", "Status")
+INDEX_GETTERS = [(field, text_getter(field)) for field in INDEXED_FIELDS]
+
+
+class JobStore:
+    # Loads the jobs once and keeps every job in memory, indexed by Job Number.
+    # Both the Tk app (work.py) and the Qt app (work2.py) go through this class
+    # instead of reading and writing files themselves.
+    #
+    # Persistence is delegated to a storage backend picked from the file name
+    # (see storage.open_storage): jobs.csv keeps an append-only journal that is
+    # compacted into the CSV, while jobs.db writes each change as a single-row
+    # SQLite INSERT or UPDATE.
+    #
+    # Several workstations can open the same file. Writes happen under the
+    # storage lock after catching up with everyone else's changes, and sync()
+    # pulls in changes from other workstations between writes.
+
+    def __init__(self, file_path="jobs.csv", journal_max_bytes=1000000, storage=None):
+        self.file_path = file_path
+        self.fieldnames = list(FIELDNAMES)
+        self.jobs = {}  # Job Number -> job dict, kept in file order
+        # Job Number -> a number increasing in file order, to put index
+        # lookups back in file order
+        self.positions = {}
+        self.next_position = count()
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        # Rows whose Job Number an earlier row already has (e.g. after a hand
+        # edit of jobs.csv). The first row is the job; these are only kept so
+        # compaction writes them back instead of deleting them. jobs.py check
+        # lists them.
+        self.duplicates = []
+        self.storage = storage or open_storage(file_path, journal_max_bytes=journal_max_bytes)
+        # Called as listener(event, job, job_number) after each change, with
+        # event "load", "insert" or "update", and with "before_update" just
+        # before a job is changed in place
+        self.listeners = []
+        self.loaded = False  # False until the whole file and journal have been read
+
+    def load(self):
+        self.begin_load()
+        for fieldnames, rows, progress in self.read_chunks():
+            self.add_chunk(fieldnames, rows)
+        self.finish_load()
+        return self
+
+    def read_chunks(self, chunk_size=2000, cancel=None):
+        # Parse the jobs in chunks without touching the store, so a worker
+        # thread can do the parsing while the GUI thread adds the chunks.
+        # Yields (fieldnames, rows, fraction of the file read so far).
+        return self.storage.read_chunks(chunk_size, cancel)
+
+    def begin_load(self):
+        self.jobs = {}
+        self.positions = {}
+        self.next_position = count()
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        self.duplicates = []
+        self.loaded = False
+
+    def add_chunk(self, fieldnames, rows):
+        # rows are Job records, parsed by read_chunks
+        if fieldnames:
+            # Every job has the standard fields, even if the file lacks a column
+            self.fieldnames = list(fieldnames) + [field for field in FIELDNAMES if field not in fieldnames]
+        jobs = self.jobs
+        for job in rows:
+            if job.job_number in jobs:
+                self.duplicates.append(job)
+            else:
+                self._add(job)
+
+    def finish_load(self):
+        # Re-apply changes made since the last compaction
+        for record in self.storage.replay():
+            self._replay(record)
+        self.loaded = True
+        self._notify("load", None, None)
+
+    def save(self):
+        # Fold the journal into a fresh jobs.csv right away
+        self.compact(background=False)
+
+    def compact(self, background=True):
+        # Never write a snapshot of a partly loaded (e.g. cancelled) store
+        if self.loaded:
+            self.storage.compact(self, background)
+
+    def sync(self):
+        # Apply changes saved by other workstations since the last sync and
+        # notify listeners about each one. Returns the (event, job, job_number)
+        # tuples that were applied.
+        if not self.loaded:
+            return []
+        records = self.storage.poll(self)
+        if records is None:
+            return self._reload_changed()
+        events = [event for record in records for event in self._replay(record)]
+        if any(event[0] == "remove" for event in events):
+            # Listeners have no remove event; let them rebuild
+            events = [("load", None, None)]
+        for event in events:
+            self._notify(*event)
+        return events
+
+    def _reload_changed(self):
+        # The file was rewritten elsewhere: read it again, but keep the job
+        # dicts that did not change so views only refresh what is different
+        fresh = JobStore(self.file_path, storage=self.storage).load()
+        self.duplicates = fresh.duplicates
+        if any(job_number not in fresh.jobs for job_number in self.jobs):
+            self.fieldnames, self.jobs, self.indexes = fresh.fieldnames, fresh.jobs, fresh.indexes
+            self.positions, self.next_position = fresh.positions, fresh.next_position
+            events = [("load", None, None)]
+        else:
+            events = []
+            for job_number, job in fresh.jobs.items():
+                current = self.jobs.get(job_number)
+                if current is None:
+                    self._add(job)
+                    events.append(("insert", job, job_number))
+                elif current != job:
+                    events.append(("update", self._apply_update(job_number, job), job_number))
+        for event in events:
+            self._notify(*event)
+        return events
+
+    def changed_since(self, timestamp):
+        # Jobs added or edited at or after timestamp (seconds since the
+        # epoch), by any workstation, in file order
+        times = self.storage.changed_since(timestamp)
+        return [job for job_number, job in self.jobs.items() if job_number in times]
+
+    def version(self, job_number):
+        # Pass this back to update() as expected_version to detect edits made
+        # by another workstation while the job was open
+        return version_of(self.jobs.get(job_number))
+
+    def add_listener(self, listener):
+        # Listeners keep derived views (columns, indexes, widgets) in step
+        # with the store without rescanning every job
+        self.listeners.append(listener)
+
+    def _notify(self, event, job, job_number):
+        for listener in self.listeners:
+            listener(event, job, job_number)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def __iter__(self):
+        return iter(self.jobs.values())
+
+    def __contains__(self, job_number):
+        return job_number in self.jobs
+
+    def all(self):
+        return list(self.jobs.values())
+
+    def get(self, job_number):
+        return self.jobs.get(job_number)
+
+    def find(self, Name=None, Location=None, Status=None):
+        # Empty or None criteria match everything, like the filter Comboboxes
+        criteria = {"Name": Name, "Location": Location, "Status": Status}
+        matches = None
+        for field, value in criteria.items():
+            if not value:
+                continue
+            job_numbers = self.indexes[field].get(value, set())
+            if matches is None:
+                matches = set(job_numbers)
+            else:
+                matches &= job_numbers
+            if not matches:
+                return []
+
+        if matches is None:
+            return self.all()
+        if len(matches) * 4 < len(self.jobs):
+            # Small result: go straight through the index
+            return [self.jobs[job_number] for job_number in sorted(matches, key=self.positions.__getitem__)]
+        return [job for job_number, job in self.jobs.items() if job_number in matches]
+
+    def insert(self, new_job):
+        # Values are validated here; anything that does not parse raises ValueError
+        job = Job.from_row({field: new_job.get(field, "") for field in self.fieldnames}, strict=True)
+        job_number = job["Job Number"]
+        with self.storage.locked():
+            self.sync()
+            if job_number in self.jobs:
+                raise ValueError(f"Job Number {job_number} already exists")
+            self._add(job)
+            compact = self.storage.record({"op": "insert", "job": dict(job)})
+        self._notify("insert", job, job_number)
+        if compact:
+            self.compact(background=True)
+        return job
+
+    def insert_many(self, new_jobs, skip_existing=False):
+        # Add several jobs as one change: every job is validated first, and
+        # they are written as a single journal record (or one SQLite
+        # transaction), so either all of them are saved or none are. With
+        # skip_existing=True, jobs whose Job Number is already taken are left
+        # out instead of failing the batch. Returns the jobs added.
+        jobs = []
+        for new_job in new_jobs:
+            job = Job.from_row({field: new_job.get(field, "") for field in self.fieldnames}, strict=True)
+            jobs.append(job)
+        with self.storage.locked():
+            self.sync()
+            added = {}
+            for job in jobs:
+                job_number = job["Job Number"]
+                if job_number in self.jobs or job_number in added:
+                    if skip_existing:
+                        continue
+                    raise ValueError(f"Job Number {job_number} already exists")
+                added[job_number] = job
+            if not added:
+                return []
+            for job in added.values():
+                self._add(job)
+            compact = self.storage.record({"op": "batch", "records": [{"op": "insert", "job": dict(job)}
+                                                                      for job in added.values()]})
+        for job_number, job in added.items():
+            self._notify("insert", job, job_number)
+        if compact:
+            self.compact(background=True)
+        return list(added.values())
+
+    def update_many(self, changes_by_job_number, expected_versions=None):
+        # Apply changes to several jobs as one change, e.g. marking a day's
+        # jobs Done or moving them to another Location. Everything is checked
+        # before anything is changed, so one bad job leaves all of them as
+        # they were. expected_versions maps Job Numbers to store.version().
+        # Job Numbers cannot be changed this way.
+        expected_versions = expected_versions or {}
+        with self.storage.locked():
+            self.sync()
+            batch = {}
+            for job_number, changes in changes_by_job_number.items():
+                if job_number not in self.jobs:
+                    raise KeyError(job_number)
+                expected_version = expected_versions.get(job_number)
+                if expected_version is not None and self.version(job_number) != expected_version:
+                    raise ConflictError(f"Job {job_number} was changed on another workstation")
+                current = self.jobs[job_number]
+                changes = {field: value for field, value in changes.items()
+                           if field in self.fieldnames and value != current.get(field, "")}
+                if "Job Number" in changes:
+                    raise ValueError("Job Numbers cannot be changed in a batch")
+                check_fields(changes)
+                if changes:
+                    batch[job_number] = changes
+            if not batch:
+                return []
+            jobs = [self._apply_update(job_number, changes) for job_number, changes in batch.items()]
+            compact = self.storage.record({"op": "batch", "records": [
+                {"op": "update", "job_number": job_number, "changes": changes}
+                for job_number, changes in batch.items()]})
+        for job in jobs:
+            self._notify("update", job, job["Job Number"])
+        if compact:
+            self.compact(background=True)
+        return jobs
+
+    def remove_many(self, job_numbers, expected_versions=None):
+        # Take jobs out of the store as one change, e.g. once they have been
+        # copied to an archive (see archive.py). Checked like update_many, so
+        # a job changed elsewhere in the meantime stops the whole removal.
+        # Listeners have no remove event, so they get "load" and rebuild.
+        expected_versions = expected_versions or {}
+        with self.storage.locked():
+            self.sync()
+            for job_number in job_numbers:
+                if job_number not in self.jobs:
+                    raise KeyError(job_number)
+                expected_version = expected_versions.get(job_number)
+                if expected_version is not None and self.version(job_number) != expected_version:
+                    raise ConflictError(f"Job {job_number} was changed on another workstation")
+            if not job_numbers:
+                return []
+            jobs = [self._remove(job_number) for job_number in job_numbers]
+            compact = self.storage.record({"op": "remove", "job_numbers": list(job_numbers)})
+        self._notify("load", None, None)
+        if compact:
+            self.compact(background=True)
+        return jobs
+
+    def update(self, job_number, changes, expected_version=None):
+        with self.storage.locked():
+            self.sync()
+            if job_number not in self.jobs:
+                raise KeyError(job_number)
+            if expected_version is not None and self.version(job_number) != expected_version:
+                raise ConflictError(f"Job {job_number} was changed on another workstation")
+
+            changes = {field: value for field, value in changes.items() if field in self.fieldnames}
+            # Only validate what changed, so jobs with old unparseable values stay editable
+            current = self.jobs[job_number]
+            check_fields({field: value for field, value in changes.items() if value != current.get(field, "")})
+            new_job_number = changes.get("Job Number", job_number)
+            if new_job_number != job_number and new_job_number in self.jobs:
+                raise ValueError(f"Job Number {new_job_number} already exists")
+
+            job = self._apply_update(job_number, changes)
+            compact = self.storage.record({"op": "update", "job_number": job_number, "changes": changes})
+        # job_number is the number the job had before this update
+        self._notify("update", job, job_number)
+        if compact:
+            self.compact(background=True)
+        return job
+
+    def _apply_update(self, job_number, changes):
+        job = self.jobs[job_number]
+        if self.loaded:
+            # Lets listeners that keep totals take the old values out first
+            self._notify("before_update", job, job_number)
+        new_job_number = changes.get("Job Number", job_number)
+        self._unindex(job_number, job)
+        job.update(changes)
+        if new_job_number != job_number:
+            # Re-key the job without moving it to the end of the file
+            self.jobs = {(new_job_number if n == job_number else n): j for n, j in self.jobs.items()}
+            self.positions[new_job_number] = self.positions.pop(job_number)
+        self._index(new_job_number, job)
+        return job
+
+    def _replay(self, record):
+        # Replays must be idempotent: a crash between writing the snapshot and
+        # trimming the journal replays records the CSV already contains.
+        # Returns the (event, job, job_number) tuples for listeners.
+        if record["op"] == "insert":
+            job = Job.from_row({field: record["job"].get(field, "") for field in self.fieldnames})
+            job_number = job["Job Number"]
+            if job_number in self.jobs:
+                # Update in place so views holding the job dict stay current
+                return [("update", self._apply_update(job_number, job), job_number)]
+            self._add(job)
+            return [("insert", job, job_number)]
+        elif record["op"] == "update":
+            job_number = record["job_number"]
+            new_job_number = record["changes"].get("Job Number", job_number)
+            if job_number not in self.jobs:
+                return []
+            if new_job_number != job_number and new_job_number in self.jobs:
+                # update() never renames onto an existing number, so this rename
+                # is already in the snapshot and the old number came back from
+                # replaying its insert
+                return [("remove", self._remove(job_number), job_number)]
+            return [("update", self._apply_update(job_number, record["changes"]), job_number)]
+        elif record["op"] == "batch":
+            # insert_many/update_many: several records written as one line
+            return [event for sub_record in record["records"] for event in self._replay(sub_record)]
+        elif record["op"] == "remove":
+            return [("remove", self._remove(job_number), job_number)
+                    for job_number in record["job_numbers"] if job_number in self.jobs]
+        return []
+
+    def _add(self, job):
+        job_number = job.job_number
+        if job_number in self.jobs:
+            self._unindex(job_number, self.jobs[job_number])
+        else:
+            # Added at the end of the file
+            self.positions[job_number] = next(self.next_position)
+        self.jobs[job_number] = job
+        self._index(job_number, job)
+
+    def _remove(self, job_number):
+        job = self.jobs.pop(job_number)
+        del self.positions[job_number]
+        self._unindex(job_number, job)
+        return job
+
+    def _index(self, job_number, job):
+        indexes = self.indexes
+        for field, get in INDEX_GETTERS:
+            index = indexes[field]
+            value = get(job)
+            job_numbers = index.get(value)
+            if job_numbers is None:
+                index[value] = {job_number}
+            else:
+                job_numbers.add(job_number)
+
+    def _unindex(self, job_number, job):
+        indexes = self.indexes
+        for field, get in INDEX_GETTERS:
+            index = indexes[field]
+            value = get(job)
+            job_numbers = index.get(value)
+            if job_numbers is not None:
+                job_numbers.discard(job_number)
+                if not job_numbers:
+                    del index[value]
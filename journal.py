@@ -0,0 +1,155 @@
+import csv
+import json
+import os
+import stat
+import tempfile
+import time
+
+# Read once at import: os.umask() can only be read by setting it
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+class Journal:
+    # Append-only change log that sits next to jobs.csv. Every toggle, edit or
+    # add is written as one JSON line, so a change costs one small append
+    # instead of a full rewrite of the CSV. The log is replayed on load and
+    # folded back into the CSV by compaction.
+    #
+    # Several workstations can share one journal: each keeps its own read
+    # offset and picks up lines appended by others with read_new().
+
+    def __init__(self, path, max_bytes=1000000):
+        self.path = path
+        self.max_bytes = max_bytes  # Compact once the journal grows past this size
+        self.offset = 0  # Bytes of the journal this process has read or written
+
+    def file_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, record):
+        # Callers hold the journal lock and have read up to the end of the file
+        record = dict(record, time=time.time())
+        line = (json.dumps(record) + "\n").encode('utf-8')
+        with open(self.path, mode='ab') as file:
+            if file.tell() > 0:
+                # A crash mid-append can leave a line without its newline;
+                # start on a fresh line so only that record is lost
+                with open(self.path, mode='rb') as tail:
+                    tail.seek(-1, os.SEEK_END)
+                    if tail.read(1) != b"\n":
+                        line = b"\n" + line
+            file.write(line)
+            file.flush()
+            os.fsync(file.fileno())
+            self.offset = file.tell()
+
+    def replay(self):
+        self.offset = 0
+        return self.read_new()
+
+    def read_new(self):
+        # Records appended since the last read. A last line without a newline
+        # is still being written (or was cut off by a crash) and is left for later.
+        try:
+            with open(self.path, mode='rb') as file:
+                file.seek(self.offset)
+                data = file.read()
+        except FileNotFoundError:
+            return []
+
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        return parse_records(data[:end])
+
+    def read_until(self, offset):
+        # Records in the first `offset` bytes, without moving self.offset
+        try:
+            with open(self.path, mode='rb') as file:
+                data = file.read(offset)
+        except FileNotFoundError:
+            return []
+        return parse_records(data[:data.rfind(b"\n") + 1])
+
+    def needs_compaction(self):
+        return self.offset >= self.max_bytes
+
+    def trim(self, offset):
+        # Drop the first `offset` bytes (already folded into the snapshot) and
+        # keep anything that was appended while the snapshot was being written
+        try:
+            with open(self.path, mode='rb') as file:
+                file.seek(offset)
+                remainder = file.read()
+        except FileNotFoundError:
+            remainder = b""
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".journal-")
+        with os.fdopen(fd, mode='wb') as file:
+            file.write(remainder)
+            file.flush()
+            os.fsync(file.fileno())
+        replace_file(tmp_path, self.path)
+        return len(remainder)
+
+
+def parse_records(data):
+    records = []
+    for line in data.splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            # Damaged line from an interrupted write; skip it
+            continue
+    return records
+
+
+def write_json_atomic(file_path, value):
+    # Like write_csv_atomic, for small JSON side files
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".jobs-", suffix=".json")
+    try:
+        with os.fdopen(fd, mode='w') as file:
+            json.dump(value, file)
+            file.flush()
+            os.fsync(file.fileno())
+        replace_file(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_csv_atomic(file_path, fieldnames, rows):
+    # Write to a temp file in the same directory, then rename it over the
+    # original so a crash never leaves a half-written jobs.csv behind
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".jobs-", suffix=".csv")
+    try:
+        with os.fdopen(fd, mode='w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+            file.flush()
+            os.fsync(file.fileno())
+        replace_file(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def replace_file(tmp_path, file_path):
+    # mkstemp files are private to this user; give the replacement the old
+    # file's permissions (or the umask default) so other workstations can
+    # still read it, then rename it into place
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~UMASK
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, file_path)
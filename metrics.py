@@ -0,0 +1,211 @@
+import cProfile
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+# Timing of the actions users wait on (loading, redisplaying, filtering,
+# saving, printing), for "the app is slow" reports. Off by default; the apps
+# turn it on with --metrics:
+#
+#   python work2.py jobs.csv --metrics
+#   python work.py jobs.csv --metrics --profile-slow=500
+#
+# Each action keeps a count, total and worst time and a histogram over
+# BUCKETS_MS, shown in the status bar. Every minute, on exit and for each
+# slow call a JSON line goes to jobs.csv.metrics.log (rotated at 1 MB, three
+# old files kept), which can be attached to a bug report. --profile-slow=MS
+# runs actions under cProfile until one takes MS or longer and saves that one
+# profile next to the log.
+#
+# While off, a timed function costs one attribute check per call.
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf"))
+SLOW_MS = 500  # Calls at least this slow are also logged one by one
+LOG_MAX_BYTES = 1000000
+LOG_BACKUPS = 3
+LOG_INTERVAL_MS = 60000  # How often the apps write a snapshot to the log
+
+
+class NullTimer:
+    # What timer() returns while metrics are off
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class Timer:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.profile = None
+
+    def __enter__(self):
+        self.profile = self.metrics._start_profile()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        if self.profile is not None:
+            self.metrics._finish_profile(self.profile, self.name, seconds)
+        self.metrics.record(self.name, seconds)
+        return False
+
+
+class Metrics:
+    # Counts and latency histograms per action name. One instance, metrics,
+    # is shared by everything that imports this module.
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()  # Loading records from a worker thread
+        self.actions = {}  # name -> [count, total seconds, worst seconds, bucket counts]
+        self.last = None  # (name, seconds) of the latest call
+        self.logger = None
+        self.log_path = None
+        self.profile_slow_ms = None  # Capture the next call at least this slow
+        self.profiling = False
+
+    def enable(self, log_path=None, profile_slow_ms=None):
+        self.enabled = True
+        if profile_slow_ms is not None:
+            self.profile_slow_ms = profile_slow_ms
+        if log_path and self.logger is None:
+            self.log_path = log_path
+            handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger = logging.getLogger("jobs.metrics")
+            self.logger.propagate = False
+            self.logger.setLevel(logging.INFO)
+            self.logger.addHandler(handler)
+        return self
+
+    def configure(self, args, log_path=None):
+        # Turn metrics on if args (e.g. sys.argv[1:]) include --metrics or
+        # --profile-slow=MS. A --profile-slow without a usable number of
+        # milliseconds is ignored, with a message on standard error.
+        for arg in args:
+            if arg == "--metrics":
+                self.enable(log_path)
+            elif arg.startswith("--profile-slow="):
+                text = arg.partition("=")[2]
+                try:
+                    profile_slow_ms = float(text)
+                except ValueError:
+                    profile_slow_ms = -1
+                if not 0 <= profile_slow_ms < float("inf"):
+                    print(f"Ignoring --profile-slow={text}: expected a number of milliseconds", file=sys.stderr)
+                    continue
+                self.enable(log_path, profile_slow_ms)
+        return self.enabled
+
+    def timer(self, name):
+        # with metrics.timer("print_pdf"): ...
+        return Timer(self, name) if self.enabled else NULL_TIMER
+
+    def timed(self, name):
+        # Decorator timing every call of a function as action name
+        def decorate(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with Timer(self, name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, name, seconds):
+        # Also used directly for actions spread over several callbacks, such
+        # as loading
+        if not self.enabled:
+            return
+        with self.lock:
+            stats = self.actions.get(name)
+            if stats is None:
+                stats = self.actions[name] = [0, 0.0, 0.0, [0] * len(BUCKETS_MS)]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3][bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+            self.last = (name, seconds)
+        if seconds * 1000 >= SLOW_MS:
+            self.log({"event": "slow", "action": name, "ms": round(seconds * 1000, 1)})
+
+    def percentile_ms(self, name, fraction):
+        # Upper bound of the bucket holding that fraction of the calls
+        count, total, worst, buckets = self.actions[name]
+        running = 0
+        for bound, bucket_count in zip(BUCKETS_MS, buckets):
+            running += bucket_count
+            if running >= fraction * count:
+                return min(bound, worst * 1000)
+        return worst * 1000
+
+    def snapshot(self):
+        with self.lock:
+            return {name: {"count": count, "total_ms": round(total * 1000, 1), "max_ms": round(worst * 1000, 1),
+                           "buckets_ms": {str(bound): bucket_count for bound, bucket_count in zip(BUCKETS_MS, buckets)
+                                          if bucket_count}}
+                    for name, (count, total, worst, buckets) in self.actions.items()}
+
+    def summary(self, limit=4):
+        # One line for a status bar: the latest call, then the actions that
+        # took the most time overall
+        if not self.actions:
+            return "No actions timed yet"
+        with self.lock:
+            names = sorted(self.actions, key=lambda name: -self.actions[name][1])[:limit]
+            parts = [f"{name} {self.actions[name][0]}x p95 {self.percentile_ms(name, 0.95):.0f} ms" for name in names]
+            name, seconds = self.last
+        return f"Last: {name} {seconds * 1000:.0f} ms | " + " | ".join(parts)
+
+    def log(self, entry):
+        if self.logger is not None:
+            self.logger.info(json.dumps(dict(entry, time=time.strftime("%Y-%m-%dT%H:%M:%S"))))
+
+    def log_snapshot(self):
+        if self.enabled:
+            self.log({"event": "snapshot", "actions": self.snapshot()})
+
+    def _start_profile(self):
+        # Profiles only the outermost timed call, and only while armed
+        if self.profile_slow_ms is None or self.profiling:
+            return None
+        self.profiling = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def _finish_profile(self, profile, name, seconds):
+        profile.disable()
+        self.profiling = False
+        if self.profile_slow_ms is None or seconds * 1000 < self.profile_slow_ms:
+            return
+        self.profile_slow_ms = None  # One capture per run
+        prefix = (self.log_path or "jobs.metrics.log").rsplit(".log", 1)[0]
+        path = f"{prefix}-{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+        profile.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(30)
+        with open(path[:-5] + ".txt", mode='w') as file:
+            file.write(text.getvalue())
+        self.log({"event": "profile", "action": name, "ms": round(seconds * 1000, 1), "path": path})
+
+
+metrics = Metrics()
+timed = metrics.timed
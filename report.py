@@ -0,0 +1,136 @@
+from fpdf import FPDF
+
+from shop_clock import palette_index
+
+# Columns printed in the report, in order ("Status" is left out)
+REPORT_COLUMNS = ["Sign off Date", "Name", "Phone Number", "Location", "Production Date", "Price", "Notes", "Job Number", "Days In Shop"]
+
+PADDING = 6  # Added to every measured column width
+LINE_HEIGHT = 6
+MAX_NOTES_SHARE = 0.3  # Notes never take more than this share of the page width
+MAX_DAYS = 30
+
+
+def get_background_color(days_in_shop):
+    # Green at 0 days to red at MAX_DAYS and beyond
+    days_in_shop = min(max(days_in_shop, 0), MAX_DAYS)
+    g = int(255 - (255 * days_in_shop / MAX_DAYS))
+    r = int(255 * days_in_shop / MAX_DAYS)
+    b = 0
+    return r, g, b
+
+
+PALETTE = [get_background_color(days) for days in range(MAX_DAYS + 1)]
+
+
+class TextMeasure:
+    # Caches string widths for the current font, so each distinct value
+    # (client names, locations, dates) is only measured once
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self.cache = {}
+
+    def __call__(self, text):
+        width = self.cache.get(text)
+        if width is None:
+            width = self.cache[text] = self.pdf.get_string_width(text)
+        return width
+
+
+def wrap_text(text, width, measure):
+    # Greedy word wrap; returns at least one line
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if line and measure(candidate) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def cell_text(job, column, days):
+    if column == "Days In Shop":
+        return str(days)
+    return job.get(column, "")
+
+
+def column_widths(jobs, days_in_shop, measure, page_width):
+    # One pass over the rows with cached widths, then scale to the page
+    widest = {column: measure(column) for column in REPORT_COLUMNS}
+    for job, days in zip(jobs, days_in_shop):
+        for column in REPORT_COLUMNS:
+            width = measure(cell_text(job, column, days))
+            if width > widest[column]:
+                widest[column] = width
+    widths = [widest[column] + PADDING for column in REPORT_COLUMNS]
+
+    notes = REPORT_COLUMNS.index("Notes")
+    widths[notes] = min(widths[notes], page_width * MAX_NOTES_SHARE)
+    total_width = sum(widths)
+    return [(w / total_width) * page_width for w in widths]
+
+
+def write_report(jobs, days_in_shop, file_path="not_done_jobs.pdf"):
+    # Render jobs into a paginated table with a repeated header row and
+    # wrapped Notes. jobs and days_in_shop are parallel lists, usually
+    # from JobColumns.select().
+    pdf = FPDF(orientation='L')  # Landscape orientation
+    pdf.set_auto_page_break(False)
+    pdf.set_font("Arial", size=10)
+    measure = TextMeasure(pdf)
+
+    page_width = pdf.w - pdf.l_margin - pdf.r_margin
+    page_bottom = pdf.h - pdf.b_margin
+    widths = column_widths(jobs, days_in_shop, measure, page_width)
+    notes = REPORT_COLUMNS.index("Notes")
+    days_column = REPORT_COLUMNS.index("Days In Shop")
+
+    def start_page():
+        pdf.add_page()
+        pdf.set_fill_color(255, 255, 255)  # Set fill color to white
+        pdf.set_text_color(0, 0, 0)  # Set text color to black
+        for column, width in zip(REPORT_COLUMNS, widths):
+            pdf.cell(width, 10, txt=column, border=1, fill=1)
+        pdf.ln()
+
+    start_page()
+    for job, days in zip(jobs, days_in_shop):
+        note_lines = wrap_text(job.get("Notes", ""), widths[notes] - 2, measure)
+        row_height = LINE_HEIGHT * len(note_lines)
+        if pdf.get_y() + row_height > page_bottom:
+            start_page()
+
+        y = pdf.get_y()
+        for i, (column, width) in enumerate(zip(REPORT_COLUMNS, widths)):
+            x = pdf.get_x()
+            if i == notes:
+                pdf.rect(x, y, width, row_height)
+                pdf.multi_cell(width, LINE_HEIGHT, "\n".join(note_lines), border=0)
+                pdf.set_xy(x + width, y)
+            elif i == days_column:
+                # Apply the background color gradient to "Days In Shop"
+                pdf.set_fill_color(*PALETTE[palette_index(days, MAX_DAYS)])
+                pdf.cell(width, row_height, txt=str(days), border=1, fill=1)
+                pdf.set_fill_color(255, 255, 255)  # Reset fill color to white
+            else:
+                pdf.cell(width, row_height, txt=cell_text(job, column, days), border=1)
+        pdf.ln(row_height)
+
+    pdf.output(file_path)
+    return file_path
+
+
+def write_not_done_report(columns, file_path="not_done_jobs.pdf", location=None, client=None,
+                          start_date=None, end_date=None, today=None):
+    # The "not done" report printed by work2.py and jobs.py: open jobs
+    # matching the filters, longest in the shop first. columns is a
+    # JobColumns; blank filters match everything. Returns the job count.
+    jobs, days_in_shop = columns.select(Status="Not Done", Location=location, Name=client,
+                                        start_date=start_date, end_date=end_date, today=today)
+    write_report(jobs, days_in_shop, file_path)
+    return len(jobs)
@@ -0,0 +1,151 @@
+import heapq
+import math
+from datetime import date
+
+from job_record import Status
+
+# Aging buckets for open jobs: (label, fewest days, most days or None)
+AGING_BUCKETS = (("0-7", 0, 7), ("8-14", 8, 14), ("15-30", 15, 30), ("30+", 31, None))
+
+
+def format_money(cents):
+    return f"${cents / 100:,.2f}"
+
+
+class JobRollups:
+    # Dashboard totals kept up to date as jobs change, instead of rescanning
+    # every job on each refresh. Each add, edit or status toggle adjusts the
+    # counts it touches.
+    #
+    # Days In Shop changes every day without any job changing, so open jobs
+    # are counted per Production Date instead; averages, percentiles and
+    # aging buckets are worked out from those per-day counts for any "today",
+    # which costs one pass over the distinct dates rather than over the jobs.
+
+    def __init__(self, jobs=()):
+        self.build(jobs)
+
+    def build(self, jobs):
+        self.job_count = 0
+        self.open_count = 0
+        self.total_revenue = 0  # Cents, over every job with a Price
+        self.revenue_by_client = {}
+        self.revenue_by_location = {}
+        self.jobs_by_client = {}  # Lets a client drop out once its last job goes
+        self.jobs_by_location = {}
+        self.open_by_date = {}  # Production date ordinal -> open jobs from that day
+        self.open_ordinal_sum = 0  # Sum of ordinals in open_by_date, for the average
+        self.open_dated = 0  # Open jobs that have a Production Date
+        for job in jobs:
+            self.add(job)
+
+    def attach(self, store):
+        # Keep the rollups in step with a JobStore
+        store.add_listener(lambda event, job, job_number: self.on_store_change(store, event, job, job_number))
+        self.build(store)
+        return self
+
+    def on_store_change(self, store, event, job, job_number):
+        if event == "load":
+            self.build(store)
+        elif event == "insert":
+            self.add(job)
+        elif event == "before_update":
+            self.remove(job)
+        elif event == "update":
+            self.add(job)
+
+    def add(self, job, sign=1):
+        price = job.price or 0
+        self.job_count += sign
+        self.total_revenue += sign * price
+        for totals, counts, key in ((self.revenue_by_client, self.jobs_by_client, job.name),
+                                    (self.revenue_by_location, self.jobs_by_location, job.location)):
+            counts[key] = counts.get(key, 0) + sign
+            totals[key] = totals.get(key, 0) + sign * price
+            if not counts[key]:
+                del counts[key]
+                del totals[key]
+
+        if job.status is Status.NOT_DONE:
+            self.open_count += sign
+            if job.production_date is not None:
+                ordinal = job.production_date.toordinal()
+                count = self.open_by_date.get(ordinal, 0) + sign
+                if count:
+                    self.open_by_date[ordinal] = count
+                else:
+                    del self.open_by_date[ordinal]
+                self.open_ordinal_sum += sign * ordinal
+                self.open_dated += sign
+
+    def remove(self, job):
+        self.add(job, sign=-1)
+
+    def average_days(self, today=None):
+        # Mean Days In Shop of open jobs, or None if there are none
+        if not self.open_dated:
+            return None
+        today = (today or date.today()).toordinal()
+        return today - self.open_ordinal_sum / self.open_dated
+
+    def percentile_days(self, percent, today=None):
+        # Days In Shop that percent% of open jobs are at or under (nearest rank)
+        if not self.open_dated:
+            return None
+        today = (today or date.today()).toordinal()
+        rank = max(math.ceil(self.open_dated * percent / 100), 1)
+        seen = 0
+        for ordinal in sorted(self.open_by_date, reverse=True):  # Newest first, i.e. fewest days
+            seen += self.open_by_date[ordinal]
+            if seen >= rank:
+                return today - ordinal
+        return None
+
+    def aging(self, today=None):
+        # Open jobs per aging bucket, as {label: count}
+        today = (today or date.today()).toordinal()
+        counts = {label: 0 for label, low, high in AGING_BUCKETS}
+        for ordinal, count in self.open_by_date.items():
+            days = max(today - ordinal, 0)
+            for label, low, high in AGING_BUCKETS:
+                if days >= low and (high is None or days <= high):
+                    counts[label] += count
+                    break
+        return counts
+
+    def top_clients(self, count=5):
+        return heapq.nlargest(count, self.revenue_by_client.items(), key=lambda item: item[1])
+
+    def top_locations(self, count=5):
+        return heapq.nlargest(count, self.revenue_by_location.items(), key=lambda item: item[1])
+
+    def summary(self, today=None):
+        # Everything the dashboard shows, as plain values
+        average = self.average_days(today)
+        return {
+            "jobs": self.job_count,
+            "open": self.open_count,
+            "revenue": self.total_revenue,
+            "average_days": None if average is None else round(average, 1),
+            "p90_days": self.percentile_days(90, today),
+            "aging": self.aging(today),
+            "top_clients": self.top_clients(),
+            "top_locations": self.top_locations(),
+        }
+
+
+def summary_lines(summary):
+    # Text for the dashboard panel (work2.py) and summary frame (work.py)
+    def days(value):
+        return "-" if value is None else f"{value:g} days"
+
+    lines = [
+        f"Open jobs: {summary['open']} of {summary['jobs']}",
+        f"Revenue: {format_money(summary['revenue'])}",
+        f"Days in shop (open): average {days(summary['average_days'])}, p90 {days(summary['p90_days'])}",
+        "Aging: " + ", ".join(f"{label}: {count}" for label, count in summary["aging"].items()),
+        "Top clients: " + ", ".join(f"{name} {format_money(cents)}" for name, cents in summary["top_clients"]),
+        "Top locations: " + ", ".join(f"{name} {format_money(cents)}" for name, cents in summary["top_locations"]),
+    ]
+    return lines
@@ -0,0 +1,202 @@
+import csv
+import os
+import re
+from itertools import filterfalse
+from operator import itemgetter
+
+from job_record import (FIELDNAMES, Job, format_date, format_price, format_status, parse_date, parse_price,
+                        parse_status)
+
+# Checks and tidies job values before they are saved, for imports, the Add
+# Job dialog and jobs.py. Every problem in a row is reported, not just the
+# first, and a batch is checked a column at a time: each distinct value in a
+# column (most dates, statuses, locations and prices repeat) is parsed once,
+# however many rows use it.
+#
+# Values are normalized as they pass: whitespace trimmed, dates as
+# YYYY-MM-DD, prices as in jobs.csv ("$1,250.50" -> "1250.50"), Status as
+# "Done" / "Not Done", and ten-digit phone numbers as 123-456-7890.
+
+# Fields a job cannot be saved without
+REQUIRED_FIELDS = ("Job Number",)
+
+# Digits with the usual separators, an optional leading + and an optional
+# extension, e.g. (555) 123-4567 x89
+PHONE_PATTERN = re.compile(r"^(\+?[\d\s().-]+?)\s*(?:(?:x|ext\.?)\s*(\d+))?$", re.IGNORECASE)
+NON_DIGITS = re.compile(r"\D")
+
+# Values already written the way they would be normalized, which is nearly
+# all of them; these skip parsing
+CANONICAL = {
+    "Phone Number": re.compile(r"\d{3}-\d{3}-\d{4}").fullmatch,
+    "Price": re.compile(r"(?:0|[1-9]\d*)(?:\.(?!00)\d\d)?").fullmatch,
+}
+
+
+def normalize_date(text):
+    return format_date(parse_date(text))
+
+
+def normalize_price(text):
+    return format_price(parse_price(text))
+
+
+def normalize_status(text):
+    return format_status(parse_status(text))
+
+
+def normalize_phone(text):
+    match = PHONE_PATTERN.match(text)
+    digits = NON_DIGITS.sub("", match.group(1)) if match else ""
+    if not 7 <= len(digits) <= 15:
+        raise ValueError(f"not a phone number: {text!r}")
+    number, extension = match.groups()
+    if len(digits) == 10 and not number.startswith("+"):
+        number = f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
+    else:
+        number = " ".join(number.split())
+    return f"{number} x{extension}" if extension else number
+
+
+# field -> function returning the normalized text or raising ValueError;
+# other fields only have surrounding whitespace trimmed
+NORMALIZERS = {
+    "Sign off Date": normalize_date,
+    "Production Date": normalize_date,
+    "Price": normalize_price,
+    "Phone Number": normalize_phone,
+    "Status": normalize_status,
+}
+
+
+def normalize_column(field, texts):
+    # (values, problems): the normalized text for each of texts (texts
+    # itself if none change), and {text: error message} for the distinct
+    # texts that are invalid, which are left as they were in values. The
+    # checks run over distinct texts, and only those not already canonical.
+    normalize = NORMALIZERS.get(field)
+    if normalize is None:
+        stripped = tuple(map(str.strip, texts))
+        return (texts if stripped == texts else stripped), {}
+    distinct = set(texts)
+    distinct.discard("")
+    canonical = CANONICAL.get(field)
+    if canonical is not None:
+        distinct = filterfalse(canonical, distinct)
+    normalized = {}
+    problems = {}
+    for text in distinct:
+        value = text.strip()
+        try:
+            value = normalize(value) if value else ""
+        except ValueError as error:
+            problems[text] = f"{field}: {error}"
+            continue
+        if value != text:
+            normalized[text] = value
+    if not normalized:
+        return texts, problems
+    return [normalized.get(text, text) for text in texts], problems
+
+
+def validate_rows(fieldnames, rows, line_numbers=None, existing=(), required=REQUIRED_FIELDS):
+    # Check and normalize a batch of rows, each a list of texts in
+    # fieldnames order as csv.reader gives them. Returns (jobs, errors,
+    # duplicates, rejected):
+    #   jobs        Jobs for the rows that passed, in order
+    #   errors      "row N: problem; problem" for each row that did not
+    #   duplicates  Job Numbers skipped because existing (e.g. a JobStore)
+    #               already has them
+    #   rejected    (N, row, problems) for each row that did not pass, to
+    #               quarantine (see write_rejected); this includes rows
+    #               repeating the Job Number of an earlier row
+    # N is the matching entry of line_numbers, by default counting from 2 as
+    # in a CSV file with a header.
+    width = len(fieldnames)
+    rows = [row if len(row) == width else (list(row) + [""] * width)[:width] for row in rows]
+    if line_numbers is None:
+        line_numbers = range(2, len(rows) + 2)
+    columns = []
+    changed = list(fieldnames[:len(FIELDNAMES)]) != FIELDNAMES
+    row_problems = {}  # row index -> problems, in FIELDNAMES order
+    for field in FIELDNAMES:
+        texts = tuple(map(itemgetter(fieldnames.index(field)), rows)) if field in fieldnames else ("",) * len(rows)
+        values, problems = normalize_column(field, texts)
+        if problems:
+            for i, text in enumerate(texts):
+                if text in problems:
+                    row_problems.setdefault(i, []).append(problems[text])
+        if values is not texts:
+            changed = True
+        if field in required and "" in values:
+            for i, value in enumerate(values):
+                if not value:
+                    row_problems.setdefault(i, []).append(f"{field} is empty")
+        columns.append(values)
+
+    jobs = []
+    errors = []
+    duplicates = []
+    rejected = []
+    seen = {}  # Job Number -> line it was first used on
+    job_number_column = FIELDNAMES.index("Job Number")
+    # Rows already as they should be (nearly always) are used as they are
+    for i, (line, values) in enumerate(zip(line_numbers, zip(*columns) if changed else rows)):
+        problems = row_problems.get(i)
+        job_number = values[job_number_column]
+        if job_number in seen:
+            problems = (problems or []) + [f"Job Number repeated (first on row {seen[job_number]})"]
+        if problems:
+            errors.append(f"row {line}: {'; '.join(problems)}")
+            rejected.append((line, rows[i], problems))
+            continue
+        seen[job_number] = line
+        if job_number in existing:
+            duplicates.append(job_number)
+            continue
+        jobs.append(Job.from_values(values))
+    return jobs, errors, duplicates, rejected
+
+
+def validate_job(values, existing=(), required=REQUIRED_FIELDS):
+    # Check one job (a dict of field -> text), e.g. from the Add Job dialog.
+    # Returns (normalized values, problems); problems is empty if the job
+    # can be saved.
+    row = [values.get(field) or "" for field in FIELDNAMES]
+    jobs, errors, duplicates, rejected = validate_rows(FIELDNAMES, [row], existing=existing, required=required)
+    if rejected:
+        return None, rejected[0][2]
+    if duplicates:
+        return None, [f"Job Number {duplicates[0]} already exists"]
+    return {field: jobs[0][field] for field in FIELDNAMES}, []
+
+
+def read_rows(file_path):
+    # (fieldnames, rows, line numbers) of a CSV file, where each line number
+    # is the line a row ends on, as editors show it
+    with open(file_path, mode='r', newline='') as file:
+        reader = csv.reader(file)
+        fieldnames = next(reader, [])
+        rows = []
+        line_numbers = []
+        for row in reader:
+            if row:
+                rows.append(row)
+                line_numbers.append(reader.line_num)
+        return fieldnames, rows, line_numbers
+
+
+def rejected_path(file_path):
+    # Where rows that failed to import are set aside: orders.csv -> orders.rejected.csv
+    return os.path.splitext(file_path)[0] + ".rejected.csv"
+
+
+def write_rejected(file_path, fieldnames, rejected):
+    # Write the rejected rows as they were read, with the problems and row
+    # number of each. The file can be fixed up and imported again; the two
+    # extra columns are ignored.
+    with open(file_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(list(fieldnames) + ["Problems", "Row"])
+        for line, row, problems in rejected:
+            writer.writerow(list(row) + ["; ".join(problems), line])
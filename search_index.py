@@ -0,0 +1,222 @@
+import re
+import threading
+from bisect import bisect_left, insort
+
+# Fields covered by the full-text search
+SEARCH_FIELDS = ("Name", "Phone Number", "Location", "Notes", "Job Number")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def searchable_text(job):
+    # Lowercased text of every searched field. Phone numbers are also added as
+    # bare digits so "5551234" finds "555-1234".
+    parts = [job.get(field, "").lower() for field in SEARCH_FIELDS]
+    parts.append("".join(ch for ch in job.get("Phone Number", "") if ch.isdigit()))
+    return "\n".join(parts)
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def build_index(jobs):
+    # Returns (texts, tokens, grams, sorted_tokens) for a SearchIndex
+    texts = {}
+    tokens = {}
+    grams = {}
+    for job in jobs:
+        job_number = job["Job Number"]
+        text = texts[job_number] = searchable_text(job)
+        for token in TOKEN_PATTERN.findall(text):
+            job_numbers = tokens.get(token)
+            if job_numbers is None:
+                tokens[token] = {job_number}
+            else:
+                job_numbers.add(job_number)
+    for token in tokens:
+        for gram in trigrams(token):
+            grams.setdefault(gram, set()).add(token)
+    return texts, tokens, grams, sorted(tokens)
+
+
+class SearchIndex:
+    # Inverted index from tokens to Job Numbers, plus a trigram index over the
+    # distinct tokens. A term of three characters or more matches any token
+    # that contains it, found through the trigrams; shorter terms match token
+    # prefixes through a sorted token list. Indexing trigrams per token rather
+    # than per job keeps the index small, since names, locations and words in
+    # Notes repeat across many jobs.
+
+    def __init__(self):
+        self.texts = {}  # Job Number -> searchable text
+        self.tokens = {}  # Token -> set of Job Numbers
+        self.grams = {}  # Trigram -> set of tokens containing it
+        self.sorted_tokens = []  # Tokens in sorted order for prefix lookups
+        self.lock = threading.Lock()  # Guards the swap-in of a background build
+        self.ready = True
+        self.pending = []  # Store changes made while a background build runs
+        self.generation = 0
+
+    def attach(self, store, background=True):
+        # Keep the index in step with a JobStore. With background=True the
+        # index is rebuilt on a worker thread after each load, so a large
+        # file does not freeze the GUI; search() returns None until it is ready.
+        self.background = background
+        store.add_listener(lambda event, job, job_number: self.on_store_change(store, event, job, job_number))
+        self.build(store)
+        return self
+
+    def on_store_change(self, store, event, job, job_number):
+        if event == "load":
+            if self.background:
+                self.start_build(list(store))
+            else:
+                self.build(store)
+            return
+        with self.lock:
+            if not self.ready:
+                self.pending.append((event, job, job_number))
+                return
+            self._apply(event, job, job_number)
+
+    def _apply(self, event, job, job_number):
+        if event == "insert":
+            self.add(job)
+        elif event == "update":
+            self.remove(job_number)
+            self.add(job)
+
+    def build(self, jobs):
+        with self.lock:
+            self.generation += 1
+            self.texts, self.tokens, self.grams, self.sorted_tokens = build_index(jobs)
+            self.ready = True
+            self.pending = []
+
+    def start_build(self, jobs):
+        with self.lock:
+            self.generation += 1
+            self.ready = False
+            self.pending = []
+            generation = self.generation
+        threading.Thread(target=self._build_and_swap, args=(jobs, generation), daemon=True).start()
+
+    def _build_and_swap(self, jobs, generation):
+        index = build_index(jobs)
+        with self.lock:
+            if generation != self.generation:
+                return  # A newer load replaced this one
+            self.texts, self.tokens, self.grams, self.sorted_tokens = index
+            # Catch up on changes made while building; the job dicts are live,
+            # so re-adding them also fixes any row read mid-edit
+            for event, job, job_number in self.pending:
+                self._apply(event, job, job_number)
+            self.pending = []
+            self.ready = True
+
+    def add(self, job):
+        job_number = job["Job Number"]
+        text = self.texts[job_number] = searchable_text(job)
+        for token in TOKEN_PATTERN.findall(text):
+            if token not in self.tokens:
+                self.tokens[token] = set()
+                insort(self.sorted_tokens, token)
+                for gram in trigrams(token):
+                    self.grams.setdefault(gram, set()).add(token)
+            self.tokens[token].add(job_number)
+
+    def remove(self, job_number):
+        text = self.texts.pop(job_number, None)
+        if text is None:
+            return
+        for token in set(TOKEN_PATTERN.findall(text)):
+            job_numbers = self.tokens.get(token)
+            if job_numbers is None:
+                continue
+            job_numbers.discard(job_number)
+            if job_numbers:
+                continue
+            # Last job using this token; drop it from every index
+            del self.tokens[token]
+            i = bisect_left(self.sorted_tokens, token)
+            if i < len(self.sorted_tokens) and self.sorted_tokens[i] == token:
+                del self.sorted_tokens[i]
+            for gram in trigrams(token):
+                tokens = self.grams.get(gram)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self.grams[gram]
+
+    def _prefix_tokens(self, prefix):
+        i = bisect_left(self.sorted_tokens, prefix)
+        while i < len(self.sorted_tokens) and self.sorted_tokens[i].startswith(prefix):
+            yield self.sorted_tokens[i]
+            i += 1
+
+    def _substring_tokens(self, part):
+        # Intersect trigram postings smallest first, then confirm the hits
+        postings = sorted((self.grams.get(gram, set()) for gram in trigrams(part)), key=len)
+        if not postings[0]:
+            return set()
+        candidates = set(postings[0])
+        for tokens in postings[1:]:
+            candidates &= tokens
+            if not candidates:
+                return candidates
+        return {token for token in candidates if part in token}
+
+    def _term_matches(self, term):
+        parts = TOKEN_PATTERN.findall(term)
+        if not parts:
+            return set()
+        # Look up the most selective piece of the term, e.g. "1234" in "555-1234"
+        part = max(parts, key=len)
+        tokens = self._substring_tokens(part) if len(part) >= 3 else self._prefix_tokens(part)
+        matches = set()
+        for token in tokens:
+            matches |= self.tokens[token]
+        if len(parts) > 1 or part != term:
+            # Terms with punctuation have to match the field text as typed
+            matches = {job_number for job_number in matches if term in self.texts[job_number]}
+        return matches
+
+    def search(self, query):
+        # Every term in the query has to match somewhere in the job.
+        # Returns None while a background build is still running.
+        with self.lock:
+            if not self.ready:
+                return None
+            return self._search(query)
+
+    def _search(self, query):
+        terms = query.lower().split()
+        if not terms:
+            return set()
+        matches = None
+        for term in sorted(terms, key=len, reverse=True):
+            term_matches = self._term_matches(term)
+            matches = term_matches if matches is None else matches & term_matches
+            if not matches:
+                return set()
+        return matches
+
+    def matches(self, job_number, query):
+        # Check a single job without going through the postings
+        text = self.texts.get(job_number)
+        if text is None:
+            return False
+        tokens = TOKEN_PATTERN.findall(text)
+        for term in query.lower().split():
+            parts = TOKEN_PATTERN.findall(term)
+            if not parts:
+                return False
+            part = max(parts, key=len)
+            if len(part) >= 3:
+                found = any(part in token for token in tokens)
+            else:
+                found = any(token.startswith(part) for token in tokens)
+            if not found or ((len(parts) > 1 or part != term) and term not in text):
+                return False
+        return True
@@ -0,0 +1,36 @@
+from datetime import date, datetime, timedelta
+
+
+def palette_index(days_in_shop, max_days):
+    # Entry of a precomputed 0..max_days color palette for an age
+    return min(max(days_in_shop, 0), max_days)
+
+
+class ShopClock:
+    # The day Days In Shop is counted against. The apps read it from here
+    # instead of calling date.today() per row, so every row on screen agrees
+    # on the date, and move it forward once, at midnight, with a single
+    # scheduled check.
+
+    def __init__(self, today=None):
+        self.today = today or date.today()
+
+    def ms_until_rollover(self, now=None):
+        # Milliseconds until just after the next midnight, for root.after/QTimer
+        now = now or datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        return int((midnight - now).total_seconds() * 1000) + 1000
+
+    def check(self, today=None):
+        # Move to the current date, returning how many days passed (more
+        # than one if the machine slept through a midnight), or 0 if the date
+        # has not changed, e.g. when a timer fired early.
+        today = today or date.today()
+        days = (today - self.today).days
+        if days:
+            self.today = today
+        return days
+
+    def age(self, production_date):
+        # Days In Shop for one job; a missing date counts as 0 days
+        return (self.today - production_date).days if production_date else 0
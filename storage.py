@@ -0,0 +1,442 @@
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from concurrency import FileLock
+from job_cache import gc_paused, read_cache, write_cache
+from job_record import FIELDNAMES, Job
+from journal import Journal, write_csv_atomic, write_json_atomic
+
+# SQLite column for each job field
+SQL_COLUMNS = {
+    "Sign off Date": "sign_off_date",
+    "Name": "name",
+    "Phone Number": "phone_number",
+    "Location": "location",
+    "Production Date": "production_date",
+    "Price": "price",
+    "Notes": "notes",
+    "Job Number": "job_number",
+    "Status": "status",
+}
+
+# Fields stored as NULL rather than "" when empty, so they keep their type
+NULLABLE_FIELDS = ("Sign off Date", "Production Date", "Price")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_number TEXT PRIMARY KEY,
+    sign_off_date DATE,
+    name TEXT NOT NULL DEFAULT '',
+    phone_number TEXT NOT NULL DEFAULT '',
+    location TEXT NOT NULL DEFAULT '',
+    production_date DATE,
+    price NUMERIC,
+    notes TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'Not Done',
+    change_seq INTEGER NOT NULL DEFAULT 0,
+    changed_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS jobs_location ON jobs (location);
+CREATE INDEX IF NOT EXISTS jobs_name ON jobs (name);
+CREATE INDEX IF NOT EXISTS jobs_production_date ON jobs (production_date);
+CREATE TABLE IF NOT EXISTS removed_jobs (
+    job_number TEXT NOT NULL,
+    change_seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS removed_jobs_change_seq ON removed_jobs (change_seq);
+"""
+
+
+def changed_job_numbers(record):
+    # Job Numbers a change record leaves added or edited (removals leave none)
+    if record["op"] == "insert":
+        return [record["job"]["Job Number"]]
+    if record["op"] == "update":
+        return [record["changes"].get("Job Number", record["job_number"])]
+    if record["op"] == "batch":
+        return [job_number for sub_record in record["records"] for job_number in changed_job_numbers(sub_record)]
+    return []
+
+
+def open_storage(file_path, journal_max_bytes=1000000):
+    # Pick the backend from the file name: jobs.db / jobs.sqlite use SQLite,
+    # anything else is treated as a CSV file with a change journal
+    if os.path.splitext(file_path)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        return SqliteStorage(file_path)
+    return CsvStorage(file_path, journal_max_bytes=journal_max_bytes)
+
+
+class CsvStorage:
+    # jobs.csv plus an append-only journal (jobs.csv.journal). Each change is
+    # one journal line; the CSV is only rewritten, atomically, on compaction.
+    #
+    # Workstations sharing the files take jobs.csv.lock around every write,
+    # read each other's journal lines with poll(), and re-read the CSV only
+    # when another workstation has compacted it.
+    #
+    # The parsed jobs are cached in jobs.csv.cache (see job_cache), so an
+    # unchanged CSV loads without being parsed again.
+    #
+    # Journal records carry the time they were written. Compaction keeps the
+    # latest time for each job in jobs.csv.changed before trimming them, for
+    # changed_since(); jobs never changed since then have no time.
+
+    def __init__(self, file_path, journal_max_bytes=1000000):
+        self.file_path = file_path
+        self.journal = Journal(file_path + ".journal", max_bytes=journal_max_bytes)
+        self.file_lock = FileLock(file_path + ".lock")  # Also serialises the compaction thread
+        self.change_times_path = file_path + ".changed"
+        self.compacting = False
+        self.compaction = None  # Thread writing a background compaction
+        self.csv_stat = None  # (mtime, size) of the jobs.csv that was loaded
+
+    def stat_csv(self):
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def locked(self):
+        return self.file_lock
+
+    def read_chunks(self, chunk_size=2000, cancel=None):
+        # Yields (fieldnames, jobs, fraction of the file read so far)
+        try:
+            with open(self.file_path, mode='r', newline='') as file:
+                stat = os.fstat(file.fileno())
+                self.csv_stat = (stat.st_mtime_ns, stat.st_size)
+                cached = read_cache(self.file_path, stat)
+                if cached is not None:
+                    fieldnames, jobs = cached
+                    for start in range(0, len(jobs), chunk_size):
+                        if cancel is not None and cancel.is_set():
+                            return
+                        yield fieldnames, jobs[start:start + chunk_size], min((start + chunk_size) / len(jobs), 1.0)
+                    if not jobs:
+                        yield fieldnames, [], 1.0
+                    return
+
+                jobs = []
+                for fieldnames, rows, progress in self._parse_chunks(file, stat.st_size or 1, chunk_size):
+                    if cancel is not None and cancel.is_set():
+                        return
+                    jobs.extend(rows)
+                    yield fieldnames, rows, progress
+        except FileNotFoundError:
+            self.csv_stat = None
+            return
+        if jobs:
+            write_cache(self.file_path, stat, fieldnames, jobs)
+
+    def _parse_chunks(self, file, size, chunk_size):
+        read = [0]
+
+        def counted_lines():
+            for line in file:
+                read[0] += len(line)
+                yield line
+
+        csv_reader = csv.reader(counted_lines())
+        fieldnames = next(csv_reader, None)
+        if fieldnames is None:
+            return
+        # A standard header lets rows go straight from csv.reader into Jobs,
+        # without building a dict per row the way csv.DictReader does
+        standard = fieldnames == FIELDNAMES
+        while True:
+            with gc_paused():
+                rows = []
+                for values in csv_reader:
+                    if not values:
+                        continue  # Blank line
+                    rows.append(Job.from_values(values) if standard else Job.from_row(dict(zip(fieldnames, values))))
+                    if len(rows) >= chunk_size:
+                        break
+            if len(rows) < chunk_size:
+                yield fieldnames, rows, 1.0
+                return
+            yield fieldnames, rows, min(read[0] / size, 1.0)
+
+    def replay(self):
+        return self.journal.replay()
+
+    def poll(self, store):
+        # Journal records written by other workstations since the last call,
+        # or None if jobs.csv was compacted elsewhere and has to be re-read
+        if self.stat_csv() != self.csv_stat or self.journal.file_size() < self.journal.offset:
+            return None
+        return self.journal.read_new()
+
+    def record(self, record):
+        # Called with the lock held, after poll() caught up with the journal.
+        # Returns True once the journal is big enough to be compacted.
+        self.journal.append(record)
+        return self.journal.needs_compaction()
+
+    def changed_since(self, timestamp):
+        # {Job Number: time of its last change} for jobs changed at or after
+        # timestamp (seconds since the epoch)
+        times = self._read_change_times()
+        for record in Journal(self.journal.path).replay():
+            for job_number in changed_job_numbers(record):
+                times[job_number] = record.get("time", 0)
+        return {job_number: changed for job_number, changed in times.items() if changed >= timestamp}
+
+    def _read_change_times(self):
+        try:
+            with open(self.change_times_path, mode='r') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_change_times(self, offset, job_numbers):
+        # Fold the times of the journal records about to be trimmed into
+        # jobs.csv.changed, forgetting jobs no longer in the snapshot
+        times = self._read_change_times()
+        for record in self.journal.read_until(offset):
+            for job_number in changed_job_numbers(record):
+                times[job_number] = record.get("time", 0)
+        write_json_atomic(self.change_times_path,
+                          {job_number: changed for job_number, changed in times.items() if job_number in job_numbers})
+
+    def compact(self, store, background=True):
+        if not background:
+            # A background snapshot still being written may predate the
+            # latest changes; let it finish, then write a current one
+            self.wait_for_compaction()
+        with self.file_lock:
+            if self.compacting:
+                return
+            self.compacting = True
+            fieldnames = list(store.fieldnames)
+            # Rows repeating a Job Number go back at the end, unchanged
+            jobs = [job.copy() for job in store.jobs.values()] + [job.copy() for job in store.duplicates]
+            offset = self.journal.offset
+            csv_stat = self.csv_stat
+
+        if background:
+            self.compaction = threading.Thread(target=self._write_snapshot, args=(fieldnames, jobs, offset, csv_stat),
+                                               daemon=True)
+            self.compaction.start()
+        else:
+            self._write_snapshot(fieldnames, jobs, offset, csv_stat)
+
+    def wait_for_compaction(self):
+        compaction = self.compaction
+        if compaction is not None:
+            compaction.join()
+
+    def _write_snapshot(self, fieldnames, jobs, offset, csv_stat):
+        try:
+            with self.file_lock:
+                if self.stat_csv() != csv_stat:
+                    # Another workstation compacted first; our rows may be stale
+                    return
+                write_csv_atomic(self.file_path, fieldnames, jobs)
+                self._save_change_times(offset, {job["Job Number"] for job in jobs})
+                self.journal.trim(offset)
+                self.journal.offset -= offset
+                stat = os.stat(self.file_path)
+                self.csv_stat = (stat.st_mtime_ns, stat.st_size)
+        except TimeoutError:
+            return  # Busy elsewhere; the next change will try again
+        finally:
+            self.compacting = False
+        # The next start loads the new CSV from the cache
+        write_cache(self.file_path, stat, fieldnames, jobs)
+
+
+def to_sql(field, value):
+    if field in NULLABLE_FIELDS and value == "":
+        return None
+    return value
+
+
+def from_sql(value):
+    return "" if value is None else str(value)
+
+
+def row_to_job(row):
+    return {field: from_sql(value) for field, value in zip(FIELDNAMES, row)}
+
+
+class SqliteStorage:
+    # SQLite database (WAL mode) with typed columns and indexes on Job Number,
+    # Status, Location, Name and Production Date. Every change is a single-row
+    # INSERT or UPDATE, so there is nothing to compact.
+    #
+    # Each write stamps the row with the next change_seq, so workstations
+    # sharing the database pick up each other's changes with one indexed query.
+    # Removed (e.g. archived) jobs leave a removed_jobs row with theirs.
+    # changed_at records when, for changed_since().
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.connection = connect(file_path)
+        self.last_seq = 0  # Highest change_seq this process has seen
+
+    @contextmanager
+    def locked(self):
+        # One write transaction at a time across all workstations
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+
+    def read_chunks(self, chunk_size=2000, cancel=None):
+        # Runs on the loading thread, so it uses its own connection
+        connection = connect(self.file_path)
+        try:
+            self.last_seq = connection.execute(
+                "SELECT MAX((SELECT COALESCE(MAX(change_seq), 0) FROM jobs),"
+                " (SELECT COALESCE(MAX(change_seq), 0) FROM removed_jobs))").fetchone()[0]
+            total = connection.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] or 1
+            cursor = connection.execute(f"SELECT {select_columns()} FROM jobs ORDER BY rowid")
+            read = 0
+            while True:
+                if cancel is not None and cancel.is_set():
+                    return
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                read += len(rows)
+                yield FIELDNAMES, [Job.from_row(row_to_job(row)) for row in rows], min(read / total, 1.0)
+        finally:
+            connection.close()
+
+    def replay(self):
+        return []
+
+    def poll(self, store):
+        # Rows changed by other workstations since the last call, as journal
+        # style records, or None if the store has to be re-read (e.g. after
+        # a Job Number was renamed or jobs were removed elsewhere)
+        if self.connection.execute("SELECT 1 FROM removed_jobs WHERE change_seq > ? LIMIT 1",
+                                   (self.last_seq,)).fetchone():
+            return None
+        rows = self.connection.execute(
+            f"SELECT {select_columns()}, change_seq FROM jobs WHERE change_seq > ? ORDER BY change_seq",
+            (self.last_seq,)).fetchall()
+        if not rows:
+            return []
+        self.last_seq = rows[-1][-1]
+        jobs = [row_to_job(row[:-1]) for row in rows]
+        new_jobs = sum(1 for job in jobs if job["Job Number"] not in store.jobs)
+        count = self.connection.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        if count != len(store.jobs) + new_jobs:
+            return None
+        return [{"op": "insert", "job": job} for job in jobs]
+
+    def record(self, record):
+        # Called inside locked(), after poll() caught up, so the next
+        # change_seq is ours and does not need to be polled back. A batch
+        # shares one change_seq and commits with the rest of locked().
+        self.last_seq += 1
+        self._write(record, time.time())
+        return False
+
+    def _write(self, record, changed_at):
+        if record["op"] == "insert":
+            insert_jobs(self.connection, [record["job"]], self.last_seq, changed_at)
+        elif record["op"] == "update":
+            changes = record["changes"]
+            assignments = "".join(f"{SQL_COLUMNS[field]} = ?, " for field in changes)
+            values = [to_sql(field, value) for field, value in changes.items()]
+            self.connection.execute(f"UPDATE jobs SET {assignments}change_seq = ?, changed_at = ? WHERE job_number = ?",
+                                    values + [self.last_seq, changed_at, record["job_number"]])
+        elif record["op"] == "batch":
+            for sub_record in record["records"]:
+                self._write(sub_record, changed_at)
+        elif record["op"] == "remove":
+            job_numbers = record["job_numbers"]
+            self.connection.executemany("DELETE FROM jobs WHERE job_number = ?",
+                                        ((job_number,) for job_number in job_numbers))
+            self.connection.executemany("INSERT INTO removed_jobs (job_number, change_seq) VALUES (?, ?)",
+                                        ((job_number, self.last_seq) for job_number in job_numbers))
+
+    def changed_since(self, timestamp):
+        # {Job Number: time of its last change} for jobs changed at or after
+        # timestamp; jobs not changed since they were imported have no time
+        return dict(self.connection.execute("SELECT job_number, changed_at FROM jobs WHERE changed_at >= ?",
+                                            (timestamp,)))
+
+    def compact(self, store, background=True):
+        # Fold the WAL back into the main database file
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def wait_for_compaction(self):
+        pass  # Checkpoints run in the foreground
+
+
+def select_columns():
+    return ", ".join(SQL_COLUMNS[field] for field in FIELDNAMES)
+
+
+def connect(file_path):
+    connection = sqlite3.connect(file_path, timeout=10.0)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    # Databases created before change tracking lack the change_seq column
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(jobs)")]
+    if "change_seq" not in columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0")
+    if "changed_at" not in columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN changed_at REAL")
+    connection.execute("CREATE INDEX IF NOT EXISTS jobs_change_seq ON jobs (change_seq)")
+    connection.execute("CREATE INDEX IF NOT EXISTS jobs_changed_at ON jobs (changed_at)")
+    connection.commit()
+    return connection
+
+
+def insert_jobs(connection, jobs, change_seq=0, changed_at=None):
+    placeholders = ", ".join("?" for _ in FIELDNAMES)
+    connection.executemany(
+        f"INSERT OR REPLACE INTO jobs ({select_columns()}, change_seq, changed_at) VALUES ({placeholders}, ?, ?)",
+        ([to_sql(field, job.get(field, "")) for field in FIELDNAMES] + [change_seq, changed_at] for job in jobs))
+
+
+def import_csv(csv_path, db_path):
+    # One-shot copy of a jobs.csv (plus any pending journal changes) into SQLite
+    from jobstore import JobStore
+    store = JobStore(csv_path).load()
+    connection = connect(db_path)
+    with connection:
+        insert_jobs(connection, store)
+    connection.close()
+    return len(store)
+
+
+def export_csv(db_path, csv_path):
+    # Write the database back out in the jobs.csv format
+    connection = connect(db_path)
+    cursor = connection.execute(f"SELECT {select_columns()} FROM jobs ORDER BY rowid")
+    write_csv_atomic(csv_path, FIELDNAMES, (row_to_job(row) for row in cursor))
+    connection.close()
+
+
+def main(args):
+    if len(args) != 3 or args[0] not in ("import", "export"):
+        print("usage: python storage.py import jobs.csv jobs.db\n"
+              "       python storage.py export jobs.db jobs.csv")
+        return 2
+    if args[0] == "import":
+        print(f"Imported {import_csv(args[1], args[2])} jobs into {args[2]}")
+    else:
+        export_csv(args[1], args[2])
+        print(f"Exported {args[1]} to {args[2]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
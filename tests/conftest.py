@@ -0,0 +1,39 @@
+import csv
+import os
+import sys
+
+# The modules live at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_record import FIELDNAMES  # noqa: E402
+from jobstore import JobStore  # noqa: E402
+
+
+def job_row(job_number, **fields):
+    # A job as a dict of texts; keyword arguments use the field names with
+    # spaces as underscores, e.g. Production_Date="2024-01-01"
+    row = {field: "" for field in FIELDNAMES}
+    row.update({"Name": "Client", "Location": "Shop", "Status": "Not Done", "Job Number": job_number})
+    row.update((field.replace("_", " "), value) for field, value in fields.items())
+    return row
+
+
+def write_jobs(file_path, rows, fieldnames=FIELDNAMES):
+    with open(file_path, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(file_path)
+
+
+def read_jobs(file_path):
+    with open(file_path, mode='r', newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def make_store(tmp_path, rows, **kwargs):
+    return JobStore(write_jobs(tmp_path / "jobs.csv", rows), **kwargs).load()
+
+
+def numbers(jobs):
+    return [job["Job Number"] for job in jobs]
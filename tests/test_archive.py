@@ -0,0 +1,121 @@
+from datetime import date
+
+import pytest
+
+from archive import ArchivePolicy, JobArchive, KnownJobNumbers, archive_done_jobs, period_range
+from concurrency import ConflictError
+from conftest import job_row, make_store, numbers
+from job_record import Job
+from jobstore import JobStore
+
+TODAY = date(2024, 6, 1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return make_store(tmp_path, [
+        job_row("1", Status="Done", Production_Date="2024-01-03", Sign_off_Date="2024-01-10"),
+        job_row("2", Status="Done", Production_Date="2024-05-01", Sign_off_Date="2024-05-20"),
+        job_row("3", Production_Date="2023-11-01"),
+        job_row("4", Status="Done"),
+        job_row("5", Status="Done", Production_Date="2024-02-14"),
+        job_row("6", Status="Done", Production_Date="2023-12-24", Sign_off_Date="2024-01-02"),
+    ])
+
+
+def done_job(**fields):
+    return Job.from_row(job_row("1", Status="Done", **fields))
+
+
+def test_policy():
+    policy = ArchivePolicy(keep_done_days=30)
+    assert policy.is_due(done_job(Sign_off_Date="2024-05-01"), TODAY)
+    assert not policy.is_due(done_job(Sign_off_Date="2024-05-02"), TODAY)
+    assert policy.is_due(done_job(Production_Date="2024-04-01"), TODAY)
+    assert not policy.is_due(done_job(), TODAY)
+    assert not policy.is_due(Job.from_row(job_row("1", Production_Date="2020-01-01")), TODAY)
+    assert policy.period_of(done_job(Production_Date="2024-03-05")) == "2024-03"
+    assert ArchivePolicy(period="year").period_of(done_job(Production_Date="2024-03-05")) == "2024"
+    assert period_range("2024-02") == (date(2024, 2, 1), date(2024, 2, 29))
+    assert period_range("2023") == (date(2023, 1, 1), date(2023, 12, 31))
+    with pytest.raises(ValueError):
+        ArchivePolicy(period="week")
+    with pytest.raises(ValueError):
+        ArchivePolicy(keep_done_days=-1)
+
+
+def test_archive_done_jobs(store, tmp_path):
+    archive = JobArchive(store.file_path)
+    moved = archive_done_jobs(store, archive, ArchivePolicy(keep_done_days=30), today=TODAY)
+    # Recent, open and undated jobs stay
+    assert sorted(numbers(moved)) == ["1", "5", "6"]
+    assert numbers(store) == ["2", "3", "4"]
+    assert archive.periods() == ["2024-02", "2024-01", "2023-12"]
+    assert archive.find("6")["Sign off Date"] == "2024-01-02"
+    assert archive.find("2") is None
+    assert numbers(archive.jobs(start_date=date(2024, 1, 1), end_date=date(2024, 1, 31))) == ["1"]
+    assert sorted(numbers(archive.jobs())) == ["1", "5", "6"]
+    assert numbers(JobStore(store.file_path).load()) == ["2", "3", "4"]
+    # Nothing more is due
+    assert archive_done_jobs(store, archive, ArchivePolicy(keep_done_days=30), today=TODAY) == []
+
+
+def test_archive_by_year(store):
+    archive = JobArchive(store.file_path)
+    archive_done_jobs(store, archive, ArchivePolicy(keep_done_days=30, period="year"), today=TODAY)
+    assert archive.periods() == ["2024", "2023"]
+    assert sorted(numbers(archive.load("2024").values())) == ["1", "5"]
+
+
+def test_archiving_again_adds_to_a_period(store):
+    archive = JobArchive(store.file_path)
+    archive_done_jobs(store, archive, ArchivePolicy(keep_done_days=30), today=TODAY)
+    store.insert(job_row("7", Status="Done", Production_Date="2024-01-20"))
+    archive_done_jobs(store, archive, ArchivePolicy(keep_done_days=30), today=TODAY)
+    assert sorted(archive.load("2024-01")) == ["1", "7"]
+
+
+def test_an_archived_job_number_is_not_reused(store):
+    archive = JobArchive(store.file_path)
+    archive_done_jobs(store, archive, ArchivePolicy(keep_done_days=30), today=TODAY)
+    known = KnownJobNumbers(store, archive)
+    assert "1" in known and "2" in known and "99" not in known
+    # A job slipped in under an archived number is not archived over it
+    store.insert(job_row("1", Name="Other", Status="Done", Production_Date="2024-01-05"))
+    with pytest.raises(ValueError):
+        archive_done_jobs(store, archive, ArchivePolicy(keep_done_days=30), today=TODAY)
+    assert "1" in store
+    assert archive.find("1")["Name"] == "Client"
+
+
+def test_the_same_job_can_be_archived_again(store):
+    # As after a crash between writing the archive and removing the jobs
+    archive = JobArchive(store.file_path)
+    job = store.get("1").copy()
+    archive.add({"2024-01": [job]})
+    moved = archive_done_jobs(store, archive, ArchivePolicy(keep_done_days=30), today=TODAY)
+    assert "1" in numbers(moved)
+    assert sorted(archive.load("2024-01")) == ["1"]
+
+
+def test_a_job_changed_elsewhere_stops_the_archiving(store):
+    archive = JobArchive(store.file_path)
+    policy = ArchivePolicy(keep_done_days=30)
+    other = JobStore(store.file_path).load()
+    original_version = store.version
+
+    def version(job_number):
+        # Another workstation edits job 5 just as archiving reads its version
+        if job_number == "5" and other.get("5")["Notes"] != "edited":
+            other.update("5", {"Notes": "edited"})
+        return original_version(job_number)
+
+    store.version = version
+    with pytest.raises(ConflictError):
+        archive_done_jobs(store, archive, policy, today=TODAY)
+    assert "5" in store and "1" in store
+    assert archive.periods() == []
+    # The next run archives them, with the other workstation's change
+    del store.version
+    assert sorted(numbers(archive_done_jobs(store, archive, policy, today=TODAY))) == ["1", "5", "6"]
+    assert archive.find("5")["Notes"] == "edited"
@@ -0,0 +1,89 @@
+from datetime import date
+
+from columnar import JobColumns
+from conftest import job_row, make_store, numbers
+from job_record import Job
+
+
+TODAY = date(2024, 3, 31)
+
+
+def jobs(*rows):
+    return [Job.from_row(row) for row in rows]
+
+
+def sample():
+    return jobs(
+        job_row("7", Name="bolt", Production_Date="2024-03-21", Status="Done"),
+        job_row("100", Name="Acme", Production_Date="2024-03-30"),
+        job_row("99", Name="Crane", Production_Date="2024-01-01"),
+        job_row("8", Name="acme", Production_Date=""),
+        job_row("5", Name="Acme", Production_Date="2024-02-01", Status="Done"),
+    )
+
+
+def test_select_puts_not_done_first_oldest_first():
+    selected, days = JobColumns(sample()).select(today=TODAY)
+    assert numbers(selected) == ["99", "100", "8", "5", "7"]
+    assert days == [90, 1, 0, 59, 10]
+
+
+def test_select_filters():
+    columns = JobColumns(sample())
+    selected, days = columns.select(Name="Acme", today=TODAY)
+    assert numbers(selected) == ["100", "5"]
+    assert numbers(columns.select(Status="Done", today=TODAY)[0]) == ["5", "7"]
+    assert numbers(columns.select(job_numbers={"7", "8"}, today=TODAY)[0]) == ["8", "7"]
+    assert numbers(columns.select(start_date=date(2024, 2, 1), end_date=date(2024, 3, 25), today=TODAY)[0]) == ["5", "7"]
+
+
+def test_attached_columns_follow_the_store(tmp_path):
+    store = make_store(tmp_path, [job_row("1", Name="Bolt"), job_row("2", Name="Crane")])
+    columns = JobColumns().attach(store)
+    store.update("2", {"Name": "Acme"})
+    store.insert(job_row("3", Name="Baker", Production_Date="2024-03-01"))
+    assert numbers(columns.select(Name="Acme", today=TODAY)[0]) == ["2"]
+    store.update("3", {"Job Number": "30"})
+    assert numbers(columns.select(today=TODAY)[0]) == ["30", "1", "2"]
+
+
+def test_days_in_shop_move_on_with_the_day():
+    columns = JobColumns(sample())
+    assert columns.select(today=TODAY)[1][:2] == [90, 1]
+    assert columns.select(today=date(2024, 4, 2))[1][:2] == [92, 3]
+
+
+def test_select_sorts_by_a_column():
+    columns = JobColumns(sample())
+    # Text ignoring case (ties in file order), Job Numbers numerically,
+    # blank dates first
+    assert numbers(columns.select(sort_by="Name", today=TODAY)[0]) == ["100", "8", "5", "7", "99"]
+    assert numbers(columns.select(sort_by="Job Number", today=TODAY)[0]) == ["5", "7", "8", "99", "100"]
+    assert numbers(columns.select(sort_by="Job Number", descending=True, today=TODAY)[0]) == [
+        "100", "99", "8", "7", "5"]
+    assert numbers(columns.select(sort_by="Production Date", today=TODAY)[0]) == ["8", "99", "5", "7", "100"]
+    # Done jobs have no Days In Shop and sort with the blanks
+    assert numbers(columns.select(sort_by="Days In Shop", today=TODAY)[0]) == ["7", "5", "8", "100", "99"]
+
+
+def test_select_page():
+    columns = JobColumns(sample())
+    page, days, total = columns.select_page(1, 2, today=TODAY)
+    assert numbers(page) == ["100", "8"]
+    assert days == [1, 0]
+    assert total == 5
+    page, days, total = columns.select_page(0, 10, Name="Acme", sort_by="Job Number", today=TODAY)
+    assert numbers(page) == ["5", "100"]
+    assert total == 2
+    assert columns.select_page(4, 10, today=TODAY)[0][0]["Job Number"] == "7"
+    assert columns.select_page(9, 10, today=TODAY)[:2] == ([], [])
+
+
+def test_attached_sort_orders_follow_the_store(tmp_path):
+    store = make_store(tmp_path, [job_row("1", Name="Bolt"), job_row("2", Name="Crane")])
+    columns = JobColumns().attach(store)
+    assert numbers(columns.select(sort_by="Name", today=TODAY)[0]) == ["1", "2"]
+    store.update("2", {"Name": "Acme"})
+    store.insert(job_row("3", Name="Baker"))
+    assert numbers(columns.select(sort_by="Name", today=TODAY)[0]) == ["2", "3", "1"]
+    assert numbers(columns.select(sort_by="Name", descending=True, today=TODAY)[0]) == ["1", "3", "2"]
@@ -0,0 +1,125 @@
+import csv
+import importlib.util
+import json
+import zipfile
+from datetime import date
+
+import pytest
+
+import jobs as jobs_command
+from conftest import job_row, write_jobs
+from export import EXPORT_FIELDS, export_jobs, format_for, parse_timestamp
+from job_record import FIELDNAMES, Job
+
+TODAY = date(2024, 3, 31)
+
+
+@pytest.fixture
+def jobs():
+    return [
+        Job.from_row(job_row("1", Name="Acme <&> Sons", Production_Date="2024-03-01", Price="1250.50")),
+        Job.from_row(job_row("2", Status="Done", Production_Date="2024-01-02", Notes="bell\x07")),
+        Job.from_row(job_row("3", Production_Date="someday")),
+    ]
+
+
+def test_format_for():
+    assert format_for("out/Extract.XLSX") == "xlsx"
+    with pytest.raises(ValueError):
+        format_for("extract.txt")
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("1700000000.5") == 1700000000.5
+    assert parse_timestamp("2024-03-01") == parse_timestamp("2024-03-01T00:00")
+    with pytest.raises(ValueError):
+        parse_timestamp("yesterday")
+
+
+def test_csv(jobs, tmp_path):
+    path = tmp_path / "jobs.csv"
+    assert export_jobs(iter(jobs), str(path), today=TODAY) == 3
+    with open(path, newline='') as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == EXPORT_FIELDS
+    assert rows[1][EXPORT_FIELDS.index("Name")] == "Acme <&> Sons"
+    assert rows[1][EXPORT_FIELDS.index("Price")] == "1250.50"
+    # Days In Shop is blank for Done jobs and 0 without a usable date
+    assert [row[-1] for row in rows[1:]] == ["30", "", "0"]
+
+
+def test_chosen_columns(jobs, tmp_path):
+    path = tmp_path / "jobs.csv"
+    export_jobs(jobs, str(path), fields=["Job Number", "Days In Shop"], today=TODAY)
+    assert path.read_text().splitlines() == ["Job Number,Days In Shop", "1,30", "2,", "3,0"]
+    with pytest.raises(ValueError):
+        export_jobs(jobs, str(path), fields=["Colour"])
+
+
+def test_jsonl(jobs, tmp_path):
+    path = tmp_path / "jobs.jsonl"
+    assert export_jobs(jobs, str(path), today=TODAY) == 3
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert list(records[0]) == EXPORT_FIELDS
+    assert records[0]["Job Number"] == "1"
+    assert records[2]["Production Date"] == "someday"
+    assert [record["Days In Shop"] for record in records] == ["30", "", "0"]
+
+
+def test_xlsx(jobs, tmp_path):
+    path = tmp_path / "jobs.xlsx"
+    assert export_jobs(jobs, str(path), today=TODAY) == 3
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        assert "xl/workbook.xml" in archive.namelist()
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode('utf-8')
+    assert "Acme &lt;&amp;&gt; Sons" in sheet
+    assert "\x07" not in sheet
+    # Dates as Excel serial numbers with a date style, prices as numbers
+    assert f'<c r="E2" s="1"><v>{date(2024, 3, 1).toordinal() - date(1899, 12, 30).toordinal()}</v></c>' in sheet
+    assert '<c r="F2" s="2"><v>1250.50</v></c>' in sheet
+    # A date that does not parse stays visible as text
+    assert '<t xml:space="preserve">someday</t>' in sheet
+
+
+def test_parquet(jobs, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "jobs.parquet"
+    assert export_jobs(jobs, str(path), today=TODAY) == 3
+    table = pq.read_table(str(path))
+    assert table.column_names == EXPORT_FIELDS
+    assert table.column("Production Date").to_pylist() == [date(2024, 3, 1), date(2024, 1, 2), None]
+    assert table.column("Days In Shop").to_pylist() == [30, None, 0]
+
+
+def test_a_failed_export_keeps_the_existing_file(jobs, tmp_path):
+    path = tmp_path / "jobs.csv"
+    path.write_text("earlier export\n")
+
+    def failing():
+        yield jobs[0]
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        export_jobs(failing(), str(path), today=TODAY)
+    assert path.read_text() == "earlier export\n"
+    assert [entry.name for entry in tmp_path.iterdir()] == ["jobs.csv"]
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is not None, reason="pyarrow is installed")
+def test_parquet_without_pyarrow_keeps_the_existing_file(jobs, tmp_path):
+    path = tmp_path / "jobs.parquet"
+    path.write_bytes(b"earlier export")
+    with pytest.raises(ImportError):
+        export_jobs(jobs, str(path), today=TODAY)
+    assert path.read_bytes() == b"earlier export"
+
+
+def test_export_command_uses_the_export_columns(tmp_path, capsys):
+    # A column of the shop's own in jobs.csv is not exported either way
+    path = write_jobs(tmp_path / "jobs.csv", [dict(job_row("1"), Extra="x")], FIELDNAMES + ["Extra"])
+    output = tmp_path / "out.csv"
+    assert jobs_command.main(["--file", path, "export", "--output", str(output)]) == 0
+    assert output.read_text().splitlines()[0] == ",".join(EXPORT_FIELDS)
+    assert jobs_command.main(["--file", path, "export"]) == 0
+    assert capsys.readouterr().out.splitlines()[0] == ",".join(EXPORT_FIELDS)
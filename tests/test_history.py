@@ -0,0 +1,90 @@
+import pytest
+
+from concurrency import ConflictError
+from conftest import job_row, make_store, numbers
+from history import UndoHistory
+from jobstore import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return make_store(tmp_path, [job_row("1", Notes="one"), job_row("2", Notes="two"), job_row("3")])
+
+
+def test_undo_and_redo_an_edit(store):
+    history = UndoHistory(store)
+    history.update("1", {"Notes": "changed", "Location": "Yard"})
+    history.undo()
+    assert (store.get("1")["Notes"], store.get("1")["Location"]) == ("one", "Shop")
+    assert not history.can_undo() and history.can_redo()
+    history.redo()
+    assert (store.get("1")["Notes"], store.get("1")["Location"]) == ("changed", "Yard")
+    assert history.undo_steps and not history.redo_steps
+
+
+def test_unchanged_edits_are_not_steps(store):
+    history = UndoHistory(store)
+    history.update("1", {"Notes": "one"})
+    assert not history.can_undo()
+    assert history.undo() is None
+
+
+def test_a_batch_is_one_step(store):
+    history = UndoHistory(store)
+    history.update_many({"1": {"Status": "Done"}, "2": {"Status": "Done"}})
+    history.undo()
+    assert numbers(store.find(Status="Done")) == []
+    history.redo()
+    assert numbers(store.find(Status="Done")) == ["1", "2"]
+
+
+def test_undo_across_a_rename(store):
+    history = UndoHistory(store)
+    history.update("1", {"Job Number": "10", "Notes": "renamed"})
+    history.update("10", {"Status": "Done"})
+    history.undo()
+    history.undo()
+    assert numbers(store) == ["1", "2", "3"]
+    assert store.get("1")["Notes"] == "one"
+    history.redo()
+    assert numbers(store) == ["10", "2", "3"]
+    history.redo()
+    assert store.get("10")["Status"] == "Done"
+
+
+def test_new_change_clears_redo(store):
+    history = UndoHistory(store)
+    history.update("1", {"Notes": "a"})
+    history.undo()
+    history.update("2", {"Notes": "b"})
+    assert not history.can_redo()
+
+
+def test_undo_refuses_to_overwrite_another_workstation(store):
+    history = UndoHistory(store)
+    history.update("1", {"Notes": "mine"})
+    other = JobStore(store.file_path).load()
+    other.update("1", {"Notes": "theirs"})
+    with pytest.raises(ConflictError):
+        history.undo()
+    assert store.get("1")["Notes"] == "theirs"
+    assert history.can_undo()
+
+
+def test_a_conflict_leaves_the_whole_batch(store):
+    history = UndoHistory(store)
+    history.update_many({"1": {"Notes": "x"}, "2": {"Notes": "y"}})
+    JobStore(store.file_path).load().update("2", {"Notes": "theirs"})
+    with pytest.raises(ConflictError):
+        history.undo()
+    assert (store.get("1")["Notes"], store.get("2")["Notes"]) == ("x", "theirs")
+
+
+def test_limit(store):
+    history = UndoHistory(store, limit=2)
+    for text in ("a", "b", "c"):
+        history.update("3", {"Notes": text})
+    history.undo()
+    history.undo()
+    assert history.undo() is None
+    assert store.get("3")["Notes"] == "a"
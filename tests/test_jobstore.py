@@ -0,0 +1,121 @@
+import pytest
+
+from concurrency import ConflictError
+from conftest import job_row, make_store, numbers, read_jobs, write_jobs
+from jobstore import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return make_store(tmp_path, [
+        job_row("1", Name="Acme", Location="North"),
+        job_row("2", Name="Acme", Location="South", Status="Done"),
+        job_row("3", Name="Bolt", Location="North"),
+    ])
+
+
+def test_get(store):
+    assert store.get("2")["Location"] == "South"
+    assert store.get("2").status.value == "Done"
+    assert store.get("9") is None
+    assert "3" in store and "9" not in store
+    assert len(store) == 3
+
+
+def test_find_uses_every_criterion(store):
+    assert numbers(store.find(Name="Acme")) == ["1", "2"]
+    assert numbers(store.find(Name="Acme", Location="North")) == ["1"]
+    assert numbers(store.find(Location="North", Status="Not Done")) == ["1", "3"]
+    assert store.find(Name="Nobody") == []
+    assert numbers(store.find()) == ["1", "2", "3"]
+    assert numbers(store.find(Name="", Location=None)) == ["1", "2", "3"]
+
+
+def test_find_keeps_file_order(tmp_path):
+    # A few matches come through the index, many through a scan; both keep
+    # the order of the file rather than of the Job Numbers
+    store = make_store(tmp_path, [job_row(str(n), Name="Acme" if n in (9, 10) else "Bolt") for n in range(12, 0, -1)])
+    assert numbers(store.find(Name="Acme")) == ["10", "9"]
+    assert numbers(store.find(Name="Bolt"))[:3] == ["12", "11", "8"]
+    store.update("10", {"Job Number": "100"})
+    store.insert(job_row("2b", Name="Acme"))
+    assert numbers(store.find(Name="Acme")) == ["100", "9", "2b"]
+
+
+def test_insert(store):
+    job =store.insert(job_row("4", Name="Bolt", Price="$1,250.50"))
+    assert job.price == 125050
+    assert store.get("4") is job
+    assert numbers(store.find(Name="Bolt")) == ["3", "4"]
+
+
+def test_insert_refuses_bad_values_and_taken_numbers(store):
+    with pytest.raises(ValueError):
+        store.insert(job_row("4", Production_Date="March 3rd"))
+    with pytest.raises(ValueError):
+        store.insert(job_row("1"))
+    assert "4" not in store
+
+
+def test_update_keeps_indexes_current(store):
+    store.update("1", {"Location": "South", "Status": "Done"})
+    assert numbers(store.find(Location="North")) == ["3"]
+    assert numbers(store.find(Location="South", Status="Done")) == ["1", "2"]
+    assert store.indexes["Location"]["South"] == {"1", "2"}
+
+
+def test_update_renames_in_place(store):
+    store.update("1", {"Job Number": "10"})
+    assert store.get("1") is None
+    assert numbers(store) == ["10", "2", "3"]
+    assert numbers(store.find(Name="Acme")) == ["10", "2"]
+    with pytest.raises(ValueError):
+        store.update("10", {"Job Number": "2"})
+
+
+def test_update_checks_values_and_version(store):
+    with pytest.raises(KeyError):
+        store.update("9", {"Notes": "x"})
+    with pytest.raises(ValueError):
+        store.update("1", {"Price": "a lot"})
+    version = store.version("1")
+    store.update("1", {"Notes": "first"}, expected_version=version)
+    with pytest.raises(ConflictError):
+        store.update("1", {"Notes": "second"}, expected_version=version)
+    assert store.get("1")["Notes"] == "first"
+
+
+def test_listeners_see_each_change(store):
+    events = []
+    store.add_listener(lambda event, job, job_number: events.append((event, job_number)))
+    store.insert(job_row("4"))
+    store.update("4", {"Notes": "x"})
+    assert events == [("insert", "4"), ("before_update", "4"), ("update", "4")]
+
+
+def test_rows_repeating_a_job_number_survive_save(tmp_path):
+    path = write_jobs(tmp_path / "jobs.csv", [job_row("1", Name="First"), job_row("2"), job_row("1", Name="Second")])
+    store = JobStore(path).load()
+    assert len(store) == 2
+    assert store.get("1")["Name"] == "First"
+    assert [job["Name"] for job in store.duplicates] == ["Second"]
+    store.update("2", {"Notes": "x"})
+    store.save()
+    assert [row["Name"] for row in read_jobs(path)] == ["First", "Client", "Second"]
+
+
+def test_insert_many_is_all_or_nothing(store):
+    with pytest.raises(ValueError):
+        store.insert_many([job_row("4"), job_row("1")])
+    assert "4" not in store
+    added = store.insert_many([job_row("4"), job_row("1")], skip_existing=True)
+    assert numbers(added) == ["4"]
+
+
+def test_update_many_is_all_or_nothing(store):
+    with pytest.raises(KeyError):
+        store.update_many({"1": {"Status": "Done"}, "9": {"Status": "Done"}})
+    assert store.get("1")["Status"] == "Not Done"
+    jobs = store.update_many({"1": {"Status": "Done"}, "3": {"Status": "Done"}})
+    assert numbers(jobs) == ["1", "3"]
+    assert numbers(store.find(Status="Done")) == ["1", "2", "3"]
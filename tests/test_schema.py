@@ -0,0 +1,100 @@
+import csv
+
+from conftest import job_row
+from job_record import FIELDNAMES
+from schema import read_rows, rejected_path, validate_job, validate_rows, write_rejected
+
+
+def rows(*jobs):
+    return [[job[field] for field in FIELDNAMES] for job in jobs]
+
+
+def test_values_are_normalized():
+    jobs, errors, duplicates, rejected = validate_rows(FIELDNAMES, rows(
+        job_row(" 1 ", Name=" Acme ", Price="$1,250.50", Status="done", Phone_Number="(555) 123 4567",
+                Production_Date=" 2024-03-01"),
+        job_row("2", Price="12.00", Phone_Number="+44 20 7946 0958 ext. 12"),
+    ))
+    assert (errors, duplicates, rejected) == ([], [], [])
+    first, second = jobs
+    assert (first["Job Number"], first["Name"], first["Price"], first["Status"]) == ("1", "Acme", "1250.50", "Done")
+    assert first["Phone Number"] == "555-123-4567"
+    assert first["Production Date"] == "2024-03-01"
+    assert first.price == 125050
+    assert second["Price"] == "12"
+    assert second["Phone Number"] == "+44 20 7946 0958 x12"
+
+
+def test_every_problem_in_a_row_is_reported():
+    jobs, errors, duplicates, rejected = validate_rows(FIELDNAMES, rows(
+        job_row("1"),
+        job_row("2", Production_Date="01/03/2024", Price="cheap", Status="maybe"),
+        job_row("", Phone_Number="12"),
+    ))
+    assert [job["Job Number"] for job in jobs] == ["1"]
+    assert errors[0].startswith("row 3: Production Date: ")
+    assert "Price: not a price" in errors[0] and "Status must be Done or Not Done" in errors[0]
+    assert errors[1] == "row 4: Phone Number: not a phone number: '12'; Job Number is empty"
+    assert [(line, problems) for line, row, problems in rejected][1] == (
+        4, ["Phone Number: not a phone number: '12'", "Job Number is empty"])
+    # Rejected rows are kept as they were read
+    assert rejected[0][1][FIELDNAMES.index("Price")] == "cheap"
+
+
+def test_existing_job_numbers_are_duplicates():
+    jobs, errors, duplicates, rejected = validate_rows(FIELDNAMES, rows(job_row("1"), job_row("2")), existing={"2"})
+    assert [job["Job Number"] for job in jobs] == ["1"]
+    assert duplicates == ["2"]
+    assert errors == [] and rejected == []
+
+
+def test_job_numbers_repeated_in_the_file_are_rejected():
+    jobs, errors, duplicates, rejected = validate_rows(FIELDNAMES, rows(
+        job_row("1", Notes="first"), job_row("2"), job_row("1", Notes="second"), job_row("2", Price="x"),
+    ), existing={"2"})
+    assert [job["Notes"] for job in jobs] == ["first"]
+    assert duplicates == ["2"]
+    assert errors == ["row 4: Job Number repeated (first on row 2)",
+                      "row 5: Price: not a price: 'x'; Job Number repeated (first on row 3)"]
+    assert [line for line, row, problems in rejected] == [4, 5]
+
+
+def test_other_column_orders_and_short_rows():
+    fieldnames = ["Job Number", "Name", "Extra"]
+    jobs, errors, duplicates, rejected = validate_rows(fieldnames, [["1", "Acme", "x"], ["2"]], line_numbers=[5, 9])
+    assert [(job["Job Number"], job["Name"], job["Status"]) for job in jobs] == [("1", "Acme", ""), ("2", "", "")]
+    jobs, errors, duplicates, rejected = validate_rows(["Name"], [["Acme"]], line_numbers=[7])
+    assert errors == ["row 7: Job Number is empty"]
+
+
+def test_required_fields():
+    jobs, errors, duplicates, rejected = validate_rows(FIELDNAMES, rows(job_row("1", Location="")),
+                                                       required=("Job Number", "Location"))
+    assert errors == ["row 2: Location is empty"]
+
+
+def test_validate_job():
+    values, problems = validate_job(job_row("5", Status="not done"))
+    assert problems == [] and values["Status"] == "Not Done"
+    assert validate_job(job_row("5"), existing={"5"}) == (None, ["Job Number 5 already exists"])
+    assert validate_job(job_row("5", Price="?"))[1] == ["Price: not a price: '?'"]
+
+
+def test_rejected_rows_round_trip(tmp_path):
+    source = tmp_path / "orders.csv"
+    with open(source, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        writer.writerow(rows(job_row("1"))[0])
+        writer.writerow([])
+        writer.writerow(rows(job_row("2", Price="lots"))[0])
+    fieldnames, read, line_numbers = read_rows(str(source))
+    assert line_numbers == [2, 4]
+    jobs, errors, duplicates, rejected = validate_rows(fieldnames, read, line_numbers)
+    path = rejected_path(str(source))
+    assert path == str(tmp_path / "orders.rejected.csv")
+    write_rejected(path, fieldnames, rejected)
+    with open(path, newline='') as file:
+        quarantined = list(csv.DictReader(file))
+    assert [(row["Job Number"], row["Price"], row["Problems"], row["Row"]) for row in quarantined] == [
+        ("2", "lots", "Price: not a price: 'lots'", "4")]
@@ -0,0 +1,55 @@
+from conftest import job_row, make_store
+from search_index import SearchIndex
+
+
+def make_index(tmp_path):
+    store = make_store(tmp_path, [
+        job_row("1001", Name="Acme Plumbing", Phone_Number="555-123-4567", Notes="Replace boiler"),
+        job_row("1002", Name="Bolt & Sons", Location="Warehouse 7", Notes="boiler check"),
+        job_row("1003", Name="Crane Ltd", Phone_Number="(555) 987-6543"),
+    ])
+    return store, SearchIndex().attach(store, background=False)
+
+
+def test_search_by_word_prefix_and_substring(tmp_path):
+    store, index = make_index(tmp_path)
+    assert index.search("acme") == {"1001"}
+    assert index.search("BOILER") == {"1001", "1002"}
+    assert index.search("bo") == {"1002", "1001"}
+    assert index.search("oile") == {"1001", "1002"}
+    assert index.search("warehouse") == {"1002"}
+    assert index.search("nothing") == set()
+    assert index.search("") == set()
+
+
+def test_every_term_has_to_match(tmp_path):
+    store, index = make_index(tmp_path)
+    assert index.search("boiler replace") == {"1001"}
+    assert index.search("boiler crane") == set()
+
+
+def test_phone_numbers_and_job_numbers(tmp_path):
+    store, index = make_index(tmp_path)
+    assert index.search("5551234567") == {"1001"}
+    assert index.search("987-6543") == {"1003"}
+    assert index.search("1002") == {"1002"}
+
+
+def test_index_follows_the_store(tmp_path):
+    store, index = make_index(tmp_path)
+    store.update("1001", {"Name": "Zenith Heating"})
+    store.insert(job_row("1004", Notes="acme referral"))
+    store.update("1003", {"Job Number": "2003"})
+    assert index.search("acme") == {"1004"}
+    assert index.search("zenith") == {"1001"}
+    assert index.search("crane") == {"2003"}
+    assert index.matches("1004", "referral")
+    assert not index.matches("1001", "referral")
+
+
+def test_background_build(tmp_path):
+    store = make_store(tmp_path, [job_row(str(n), Notes=f"note{n}") for n in range(500)])
+    index = SearchIndex().attach(store)
+    while index.search("note1") is None:
+        pass
+    assert index.search("note499") == {"499"}
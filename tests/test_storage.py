@@ -0,0 +1,89 @@
+import pytest
+
+from conftest import job_row, make_store, numbers, read_jobs
+from jobstore import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return make_store(tmp_path, [
+        job_row("1", Name="Acme", Location="North"),
+        job_row("2", Name="Acme", Location="South", Status="Done"),
+        job_row("3", Name="Bolt", Location="North"),
+    ])
+
+
+def test_changes_are_journaled_and_replayed(store, tmp_path):
+    store.insert(job_row("4", Name="Crane"))
+    store.update("1", {"Job Number": "10", "Notes": "renamed"})
+    store.update("2", {"Status": "Not Done"})
+    # jobs.csv is untouched until compaction; the journal carries the changes
+    assert numbers(read_jobs(tmp_path / "jobs.csv")) == ["1", "2", "3"]
+    reloaded = JobStore(store.file_path).load()
+    assert numbers(reloaded) == ["10", "2", "3", "4"]
+    assert reloaded.get("10")["Notes"] == "renamed"
+    assert reloaded.get("2")["Status"] == "Not Done"
+
+
+def test_save_compacts_the_journal_into_the_csv(store, tmp_path):
+    store.insert(job_row("4", Name="Crane"))
+    store.update("1", {"Job Number": "10"})
+    store.save()
+    assert numbers(read_jobs(tmp_path / "jobs.csv")) == ["10", "2", "3", "4"]
+    assert (tmp_path / "jobs.csv.journal").stat().st_size == 0
+    assert numbers(JobStore(store.file_path).load()) == ["10", "2", "3", "4"]
+    assert not list(tmp_path.glob(".jobs-*"))
+
+
+def test_replay_after_an_untrimmed_compaction(store, tmp_path):
+    # A crash between writing the snapshot and trimming the journal replays
+    # records the CSV already holds; the result must be the same
+    store.insert(job_row("4"))
+    store.update("1", {"Job Number": "10", "Notes": "renamed"})
+    journal = (tmp_path / "jobs.csv.journal").read_bytes()
+    store.save()
+    (tmp_path / "jobs.csv.journal").write_bytes(journal)
+    reloaded = JobStore(store.file_path).load()
+    assert numbers(reloaded) == ["10", "2", "3", "4"]
+    assert reloaded.get("10")["Notes"] == "renamed"
+
+
+def test_journal_compacts_in_the_background_once_big_enough(tmp_path):
+    store = make_store(tmp_path, [job_row(str(n)) for n in range(50)], journal_max_bytes=2000)
+    for n in range(50):
+        store.update(str(n), {"Notes": f"note {n}"})
+    store.storage.wait_for_compaction()
+    assert (tmp_path / "jobs.csv.journal").stat().st_size < 2000
+    reloaded = JobStore(store.file_path).load()
+    assert [job["Notes"] for job in reloaded] == [f"note {n}" for n in range(50)]
+
+
+def test_save_waits_for_a_background_compaction(tmp_path):
+    store = make_store(tmp_path, [job_row(str(n)) for n in range(2000)])
+    store.compact()
+    store.update("5", {"Notes": "after"})
+    store.save()
+    assert not store.storage.compacting
+    assert (tmp_path / "jobs.csv.journal").stat().st_size == 0
+    assert read_jobs(tmp_path / "jobs.csv")[5]["Notes"] == "after"
+    assert not (tmp_path / "jobs.csv.lock").exists()
+    assert not list(tmp_path.glob(".jobs-*"))
+
+
+def test_sync_picks_up_other_workstations(store):
+    other = JobStore(store.file_path).load()
+    other.insert(job_row("4"))
+    other.update("1", {"Notes": "from elsewhere"})
+    events = store.sync()
+    assert [(event, job_number) for event, job, job_number in events] == [("insert", "4"), ("update", "1")]
+    assert store.get("1")["Notes"] == "from elsewhere"
+
+
+def test_sqlite_storage(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db")).load()
+    store.insert_many([job_row("1", Name="Acme"), job_row("2", Name="Bolt")])
+    store.update("1", {"Job Number": "10", "Status": "Done"})
+    reloaded = JobStore(str(tmp_path / "jobs.db")).load()
+    assert numbers(reloaded) == ["10", "2"]
+    assert numbers(reloaded.find(Status="Done")) == ["10"]
+    assert numbers(reloaded.find(Name="Bolt")) == ["2"]
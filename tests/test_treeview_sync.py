@@ -0,0 +1,61 @@
+from datetime import date
+
+from columnar import JobColumns
+from conftest import job_row, write_jobs
+from jobstore import JobStore
+from treeview_sync import JobTreeviewSync
+
+TODAY = date(2024, 3, 31)
+
+
+class FakeClock:
+    today = TODAY
+
+
+class FakeTreeview:
+    # Enough of ttk.Treeview to follow the item ids, refusing repeats like Tk
+    def __init__(self):
+        self.items = []
+
+    def insert(self, parent, index, iid, values):
+        if iid in self.items or iid == "":
+            raise ValueError(f"Item {iid} already exists")
+        self.items.insert(len(self.items) if index == 'end' else index, iid)
+
+    def delete(self, *iids):
+        self.items = [iid for iid in self.items if iid not in iids]
+
+    def detach(self, *iids):
+        self.delete(*iids)
+
+    def move(self, iid, parent, index):
+        self.items.insert(index, iid)
+
+    def item(self, iid, values):
+        pass
+
+
+def test_loading_skips_repeated_job_numbers(tmp_path):
+    path = write_jobs(tmp_path / "jobs.csv", [
+        job_row("1", Name="First", Production_Date="2024-03-01"),
+        job_row("2", Production_Date="2024-03-20"),
+        job_row("1", Name="Second"),
+        job_row(""),
+    ])
+    store = JobStore(path)
+    treeview = FakeTreeview()
+    sync = JobTreeviewSync(treeview, FakeClock())
+
+    # As the Tk app streams chunks in while loading
+    store.begin_load()
+    for fieldnames, rows, progress in store.read_chunks(chunk_size=2):
+        store.add_chunk(fieldnames, rows)
+        rows = [job for job in rows if store.jobs.get(job.job_number) is job]
+        sync.append_jobs(*JobColumns(rows).select(today=TODAY))
+    store.finish_load()
+    assert treeview.items == ["1", "2"]
+    assert sync.values["1"][1] == "First"
+
+    sync.show(store.all())
+    assert treeview.items == ["1", "2"]
+    assert sync.order == ["1", "2"]
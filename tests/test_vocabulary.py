@@ -0,0 +1,48 @@
+from conftest import job_row, make_store
+from vocabulary import Vocabulary
+
+
+def make_vocabulary(tmp_path):
+    store = make_store(tmp_path, [
+        job_row("1", Name="bolt", Location="North", Phone_Number="555-000-0001"),
+        job_row("2", Name="Acme", Location="North"),
+        job_row("3", Name="Acme", Location="South"),
+        job_row("4", Name="acorn", Location=""),
+    ])
+    return store, Vocabulary().attach(store)
+
+
+def test_values_are_distinct_and_sorted_ignoring_case(tmp_path):
+    store, vocabulary = make_vocabulary(tmp_path)
+    assert vocabulary.values("Name") == ["Acme", "acorn", "bolt"]
+    assert vocabulary.values("Location") == ["North", "South"]
+    assert vocabulary.values("Phone Number") == ["555-000-0001"]
+    assert vocabulary.count("Name", "Acme") == 2
+    assert vocabulary.count("Name", "Nobody") == 0
+
+
+def test_complete(tmp_path):
+    store, vocabulary = make_vocabulary(tmp_path)
+    assert vocabulary.complete("Name", "AC") == ["Acme", "acorn"]
+    assert vocabulary.complete("Name", "ac", limit=1) == ["Acme"]
+    assert vocabulary.complete("Name", "z") == []
+    assert vocabulary.complete("Location", "") == ["North", "South"]
+
+
+def test_vocabulary_follows_the_store(tmp_path):
+    store, vocabulary = make_vocabulary(tmp_path)
+    vocabulary.values("Name")
+    vocabulary.values("Location")
+    store.update("1", {"Name": "Crane"})
+    store.update("3", {"Location": "North"})
+    store.insert(job_row("5", Name="Baker", Location="East"))
+    assert vocabulary.values("Name") == ["Acme", "acorn", "Baker", "Crane"]
+    assert vocabulary.values("Location") == ["East", "North"]
+    assert vocabulary.count("Location", "North") == 3
+    assert vocabulary.complete("Name", "b") == ["Baker"]
+
+
+def test_rebuilt_on_reload(tmp_path):
+    store, vocabulary = make_vocabulary(tmp_path)
+    store.remove_many(["1"])
+    assert vocabulary.values("Name") == ["Acme", "acorn"]
@@ -0,0 +1,125 @@
+from bisect import bisect_left
+from datetime import date
+
+# Columns shown in the Tk job list, in display order
+COLUMNS = ("Sign off Date", "Name", "Phone Number", "Location", "Production Date", "Price", "Notes", "Job Number", "Days In Shop", "Status")
+
+
+def row_for_job(job, today, days_in_shop=None):
+    if days_in_shop is None:
+        # Job records hold the parsed date; a missing one counts as 0 days
+        days_in_shop = (today - job.production_date).days if job.production_date else 0
+    values = (job['Sign off Date'], job['Name'], job['Phone Number'],
+              job['Location'], job['Production Date'], job['Price'],
+              job['Notes'], job['Job Number'],
+              days_in_shop if job['Status'] == "Not Done" else "",  # Show Days in Shop for Not Done jobs
+              job['Status'])
+    # Not Done jobs first, then the longest in the shop first
+    sort_key = (job['Status'] != "Not Done", -days_in_shop, job['Job Number'])
+    return values, sort_key
+
+
+def longest_increasing_run(positions):
+    # Indexes of a longest increasing subsequence of positions; those items
+    # are already in the right relative order and never need to move
+    tails = []
+    tail_indexes = []
+    previous = [-1] * len(positions)
+    for i, position in enumerate(positions):
+        j = bisect_left(tails, position)
+        if j == len(tails):
+            tails.append(position)
+            tail_indexes.append(i)
+        else:
+            tails[j] = position
+            tail_indexes[j] = i
+        previous[i] = tail_indexes[j - 1] if j else -1
+
+    keep = set()
+    i = tail_indexes[-1] if tail_indexes else -1
+    while i != -1:
+        keep.add(i)
+        i = previous[i]
+    return keep
+
+
+class JobTreeviewSync:
+    # Keeps a ttk.Treeview in step with a list of jobs by diffing against what
+    # is already shown. Rows use the Job Number as their item id, so only the
+    # rows that were added, removed, changed or reordered touch the widget.
+
+    def __init__(self, treeview, clock=None):
+        self.treeview = treeview
+        self.clock = clock  # ShopClock giving the day ages are counted from; date.today() if None
+        self.values = {}  # Job Number -> values currently shown
+        self.order = []  # Job Numbers in display order
+        self.keys = []  # Sort key for each entry in self.order
+
+    def today(self):
+        return self.clock.today if self.clock else date.today()
+
+    def show(self, jobs, days_in_shop=None, keep_order=False):
+        # days_in_shop, if given, holds precomputed ages parallel to jobs.
+        # With keep_order the jobs are shown in the order given (e.g. a page
+        # sorted by a column) instead of Not Done and oldest first.
+        today = self.today()
+        rows = {}
+        if days_in_shop is None:
+            for job in jobs:
+                rows[job['Job Number']] = row_for_job(job, today)
+        else:
+            for job, days in zip(jobs, days_in_shop):
+                rows[job['Job Number']] = row_for_job(job, today, days)
+        # The Treeview's root item already has the empty id
+        rows.pop("", None)
+        new_order = list(rows) if keep_order else sorted(rows, key=lambda job_number: rows[job_number][1])
+
+        # Remove rows that are no longer shown
+        gone = [job_number for job_number in self.order if job_number not in rows]
+        if gone:
+            self.treeview.delete(*gone)
+
+        if not self.values or len(gone) == len(self.order):
+            # Nothing to diff against, append everything in order
+            for job_number in new_order:
+                self.treeview.insert('', 'end', iid=job_number, values=rows[job_number][0])
+        else:
+            # Rows that keep their relative order stay put; everything else is
+            # detached and put back at its new index
+            target = {job_number: i for i, job_number in enumerate(new_order)}
+            remaining = [job_number for job_number in self.order if job_number in rows]
+            keep = longest_increasing_run([target[job_number] for job_number in remaining])
+            stay = {job_number for i, job_number in enumerate(remaining) if i in keep}
+            moving = [job_number for job_number in remaining if job_number not in stay]
+            if moving:
+                self.treeview.detach(*moving)
+
+            for i, job_number in enumerate(new_order):
+                values = rows[job_number][0]
+                if job_number not in self.values:
+                    self.treeview.insert('', i, iid=job_number, values=values)
+                    continue
+                if job_number not in stay:
+                    self.treeview.move(job_number, '', i)
+                if self.values[job_number] != values:
+                    self.treeview.item(job_number, values=values)
+
+        self.values = {job_number: rows[job_number][0] for job_number in new_order}
+        self.order = new_order
+        self.keys = [rows[job_number][1] for job_number in new_order]
+
+    def append_jobs(self, jobs, days_in_shop):
+        # Used while loading: chunks are appended as they are parsed and the
+        # list is put in order by the next show(). Rows repeating a Job
+        # Number already shown, and rows without one, have no item id of
+        # their own and are left out.
+        today = self.today()
+        for job, days in zip(jobs, days_in_shop):
+            job_number = job['Job Number']
+            if not job_number or job_number in self.values:
+                continue
+            values, sort_key = row_for_job(job, today, days)
+            self.treeview.insert('', 'end', iid=job_number, values=values)
+            self.order.append(job_number)
+            self.keys.append(sort_key)
+            self.values[job_number] = values
@@ -0,0 +1,97 @@
+from bisect import bisect_left, insort
+from collections import Counter
+
+from job_record import text_getter
+
+# Fields offered as filter choices and completions
+VOCABULARY_FIELDS = ("Name", "Location", "Phone Number")
+
+
+class Vocabulary:
+    # Distinct clients, locations and phone numbers, with the number of jobs
+    # using each, kept up to date as jobs are added, edited and removed
+    # instead of rebuilding a set from every job. A value drops out once its
+    # last job no longer uses it.
+    #
+    # Each field's values are also kept in a list sorted ignoring case, so
+    # prefix lookups are a binary search however many distinct values there
+    # are. The list is only sorted when a field is first looked up, which
+    # keeps it off the startup path.
+
+    def __init__(self, jobs=()):
+        self.build(jobs)
+
+    def build(self, jobs):
+        jobs = list(jobs)
+        # field -> value -> jobs using it
+        self.counts = {field: dict(Counter(map(text_getter(field), jobs))) for field in VOCABULARY_FIELDS}
+        self.keys = {}  # field -> sorted (value.casefold(), value) for every non-empty value
+        self.lists = {}  # field -> the values in self.keys order, until the field next changes
+
+    def attach(self, store):
+        # Keep the vocabulary in step with a JobStore
+        store.add_listener(lambda event, job, job_number: self.on_store_change(store, event, job, job_number))
+        self.build(store)
+        return self
+
+    def on_store_change(self, store, event, job, job_number):
+        if event == "load":
+            self.build(store)
+        elif event == "insert":
+            self.add(job)
+        elif event == "before_update":
+            self.remove(job)
+        elif event == "update":
+            self.add(job)
+
+    def add(self, job, sign=1):
+        for field in VOCABULARY_FIELDS:
+            counts = self.counts[field]
+            value = job[field]
+            count = counts.get(value, 0) + sign
+            if count:
+                counts[value] = count
+            else:
+                del counts[value]
+            keys = self.keys.get(field)
+            if keys is not None and value and count == (1 if sign > 0 else 0):
+                # First job to use the value, or the last one stopped
+                key = (value.casefold(), value)
+                if sign > 0:
+                    insort(keys, key)
+                else:
+                    del keys[bisect_left(keys, key)]
+                self.lists.pop(field, None)
+
+    def remove(self, job):
+        self.add(job, -1)
+
+    def sorted_keys(self, field):
+        keys = self.keys.get(field)
+        if keys is None:
+            keys = self.keys[field] = sorted((value.casefold(), value) for value in self.counts[field] if value)
+        return keys
+
+    def values(self, field):
+        # Every value of field, sorted ignoring case; the list is shared, so
+        # callers must not change it
+        values = self.lists.get(field)
+        if values is None:
+            values = self.lists[field] = [value for key, value in self.sorted_keys(field)]
+        return values
+
+    def complete(self, field, prefix, limit=None):
+        # Values of field starting with prefix, ignoring case, in values() order
+        keys = self.sorted_keys(field)
+        prefix = prefix.casefold()
+        matches = []
+        for i in range(bisect_left(keys, (prefix,)), len(keys)):
+            key, value = keys[i]
+            if not key.startswith(prefix) or len(matches) == limit:
+                break
+            matches.append(value)
+        return matches
+
+    def count(self, field, value):
+        # Jobs using value
+        return self.counts[field].get(value, 0)
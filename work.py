@@ -1,132 +1,488 @@
+import queue
+import sys
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk
-import csv
-from datetime import datetime
+from tkinter import filedialog, messagebox, ttk
+from archive import JobArchive, KnownJobNumbers
+from concurrency import ConflictError
+from export import EXPORT_FIELDS, EXPORT_FORMATS, export_jobs, parse_timestamp
+from history import UndoHistory
+from jobstore import JobStore
+from job_import import import_jobs
+from metrics import LOG_INTERVAL_MS, metrics, timed
+from job_record import FIELDNAMES
+from rollups import JobRollups, summary_lines
+from schema import rejected_path
+from shop_clock import ShopClock
+from columnar import JobColumns
+from search_index import SearchIndex
+from treeview_sync import JobTreeviewSync, COLUMNS
+from vocabulary import VOCABULARY_FIELDS, Vocabulary
+
+def start_loading():
+    # Read the jobs on a worker thread; the Tk thread picks up the chunks
+    loading['started'] = time.perf_counter()
+    store.begin_load()
+    for button in (mark_done_button, bulk_edit_button, import_button):
+        button.state(['disabled'])
+    threading.Thread(target=read_jobs_in_background, daemon=True).start()
+    root.after(50, poll_loading)
+
+def read_jobs_in_background():
+    # The last item queued is True once the whole file was read, or False if
+    # loading was cancelled first
+    for chunk in store.read_chunks():
+        if cancel_loading_event.is_set():
+            load_queue.put(False)
+            return
+        load_queue.put(chunk)
+    load_queue.put(True)
 
-def load_jobs():
+def poll_loading():
+    try:
+        chunk = load_queue.get_nowait()
+    except queue.Empty:
+        root.after(50, poll_loading)
+        return
+    if isinstance(chunk, bool):
+        finish_loading(chunk)
+        return
+
+    # Stream the first page into the list; it is sorted once loading finishes
+    fieldnames, rows, progress = chunk
+    store.add_chunk(fieldnames, rows)
+    # Rows repeating a Job Number stay out of the list (see store.duplicates)
+    rows = [job for job in rows if store.jobs.get(job.job_number) is job]
+    room = PAGE_SIZE - len(treeview_sync.order)
+    if room > 0:
+        treeview_sync.append_jobs(*JobColumns(rows[:room]).select(today=clock.today))
+    load_progress['value'] = progress * 100
+    root.after(1, poll_loading)
+
+def finish_loading(complete):
+    cancel_loading_button.pack_forget()
+    if not complete:
+        # Partial data stays visible but read-only, and is never saved
+        load_status['text'] = "Loading cancelled - showing partial data"
+        return
+    cancel_loading_event.clear()  # A Cancel after the last chunk was read is moot
+
+    load_frame.pack_forget()
+    store.finish_load()  # Fills the list through show_store_change
+    metrics.record("load", time.perf_counter() - loading['started'])
+    for button in (mark_done_button, bulk_edit_button, import_button):
+        button.state(['!disabled'])
+    root.after(SYNC_INTERVAL_MS, sync_with_other_workstations)
+    root.after(clock.ms_until_rollover(), on_day_rollover)
+
+def on_day_rollover():
+    # Every job is a day older; the list diff only rewrites the Days In Shop
+    # cells and moves the rows whose order changed
+    if clock.check():
+        refresh_job_treeview()
+        refresh_summary()
+    root.after(clock.ms_until_rollover(), on_day_rollover)
+
+def sync_with_other_workstations():
+    # Changes saved on other workstations reach the list through show_store_change
     try:
-        with open('jobs.csv', mode='r') as file:
-            csv_reader = csv.DictReader(file)
-            return list(csv_reader)
-    except FileNotFoundError:
-        return []
-
-def save_jobs(jobs):
-    with open('jobs.csv', mode='w', newline='') as file:
-        fieldnames = jobs[0].keys()
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(jobs)
+        store.sync()
+    except OSError:
+        pass  # Shared drive unavailable; try again next time
+    root.after(SYNC_INTERVAL_MS, sync_with_other_workstations)
+
+def show_store_change(event, job, job_number):
+    # Changes, ours or another workstation's, redraw the page once a burst of
+    # them is over; the diff only touches the rows that changed or moved.
+    # Batches of our own refresh the list once when they are done instead.
+    if not store.loaded or event == "before_update" or batch['running']:
+        return
+    if event == "load":
+        refresh_job_treeview()
+    elif view['after_id'] is None:
+        view['after_id'] = root.after(100, refresh_job_treeview)
+    schedule_summary_refresh()
+
+def schedule_summary_refresh():
+    # A burst of changes (e.g. a sync) redraws the summary once
+    if summary['after_id'] is None:
+        summary['after_id'] = root.after(200, refresh_summary)
+
+def refresh_summary():
+    summary['after_id'] = None
+    summary_label['text'] = "\n".join(summary_lines(rollups.summary(clock.today)))
 
 def mark_job():
-    selected_item = job_treeview.selection()[0]
-    selected_index = treeview_item_to_job[selected_item]
-    job = jobs[selected_index]
-    job['Status'] = "Done" if job['Status'] == "Not Done" else "Not Done"
-    save_jobs(jobs)
-    update_job_treeview(jobs)
+    # Toggles the selected jobs (Ctrl/Shift-click to select several): all
+    # become Done, or Not Done if they already all are. Treeview item ids
+    # are Job Numbers.
+    job_numbers = job_treeview.selection()
+    if not job_numbers:
+        return
+    all_done = all(store.get(job_number)['Status'] == "Done" for job_number in job_numbers)
+    new_status = "Not Done" if all_done else "Done"
+    update_jobs({job_number: {'Status': new_status} for job_number in job_numbers})
+
+def update_jobs(changes_by_job_number):
+    # One transaction and one write for the whole batch, then one refresh
+    expected_versions = {job_number: store.version(job_number) for job_number in changes_by_job_number}
+    try:
+        # Refuse the batch if another workstation changed any of the jobs first
+        with metrics.timer("save"):
+            run_batch(lambda: history.update_many(changes_by_job_number, expected_versions))
+    except ConflictError as error:
+        messagebox.showwarning("Job Changed", f"{error}. No jobs were changed; the list now shows the latest version.")
+    except (KeyError, ValueError) as error:
+        messagebox.showerror("Invalid Change", str(error))
+    except TimeoutError as error:
+        messagebox.showerror("Jobs File Busy", str(error))
+
+def undo_change(event=None):
+    change_history(history.undo, history.undo_steps, "Undo")
+
+def redo_change(event=None):
+    change_history(history.redo, history.redo_steps, "Redo")
+
+def change_history(action, steps, name):
+    # Ctrl+Z / Ctrl+Y: a single job's change updates its own row; a batch
+    # refreshes the list once, as it did when it was made
+    if not store.loaded or cancel_loading_event.is_set() or not steps:
+        return
+    try:
+        if len(steps[-1]) > 1:
+            run_batch(action)
+        else:
+            action()
+    except ConflictError as error:
+        messagebox.showwarning(f"Cannot {name}", f"{error}. Nothing was changed.")
+    except (KeyError, ValueError) as error:
+        messagebox.showerror(f"Cannot {name}", str(error))
+    except TimeoutError as error:
+        messagebox.showerror("Jobs File Busy", str(error))
+
+def run_batch(action):
+    batch['running'] = True
+    try:
+        return action()
+    finally:
+        batch['running'] = False
+        refresh_job_treeview()
+        schedule_summary_refresh()
+
+def bulk_edit_jobs():
+    # Set one field to the same value on every selected job, e.g. move them
+    # all to another Location
+    job_numbers = job_treeview.selection()
+    if not job_numbers:
+        return
+    dialog = tk.Toplevel(root)
+    dialog.title(f"Edit {len(job_numbers)} Jobs")
+    ttk.Label(dialog, text="Field:").pack()
+    field_choice = ttk.Combobox(dialog, values=[field for field in FIELDNAMES if field != "Job Number"], state='readonly')
+    field_choice.current(0)
+    field_choice.pack()
+    ttk.Label(dialog, text="New value:").pack()
+
+    def fill_value_choices():
+        # Offers the clients, locations or phone numbers already in use
+        field = field_choice.get()
+        value_entry['values'] = vocabulary.complete(field, value_entry.get(), FILTER_CHOICES) \
+            if field in VOCABULARY_FIELDS else ()
+
+    value_entry = ttk.Combobox(dialog, postcommand=fill_value_choices)
+    value_entry.pack()
+
+    def save():
+        changes = {field_choice.get(): value_entry.get()}
+        dialog.destroy()
+        update_jobs({job_number: changes for job_number in job_numbers})
+
+    ttk.Button(dialog, text="Save", command=save).pack(side='left')
+    ttk.Button(dialog, text="Cancel", command=dialog.destroy).pack(side='right')
+
+def import_jobs_from_csv():
+    file_path = filedialog.askopenfilename(title="Import Jobs", filetypes=[("CSV files", "*.csv")])
+    if not file_path:
+        return
+    try:
+        added, errors, duplicates = run_batch(lambda: import_jobs(file_path, store, rejected_path(file_path),
+                                                                  KnownJobNumbers(store, archive)))
+    except (OSError, ValueError, TimeoutError) as error:
+        messagebox.showerror("Import Failed", str(error))
+        return
+    message = f"Imported {len(added)} jobs."
+    if duplicates:
+        message += f"\nSkipped {len(duplicates)} already existing Job Numbers: {', '.join(duplicates[:20])}"
+    if errors:
+        message += f"\nSkipped {len(errors)} invalid rows:\n" + "\n".join(errors[:20])
+        message += f"\nThey were set aside in {rejected_path(file_path)} to fix and import again."
+    messagebox.showinfo("Import Jobs", message)
 
 def search_job():
+    # Archived jobs are found too, by reading archive periods until it turns up
     job_number = search_job_entry.get()
-    for job in jobs:
-        if job['Job Number'] == job_number:
-            show_job_details(job)
-            return
-    show_job_details(None)
+    show_job_details(store.get(job_number) or archive.find(job_number))
+
+def schedule_live_search(event=None):
+    # Debounce: only search once typing pauses
+    if live_search['after_id'] is not None:
+        root.after_cancel(live_search['after_id'])
+    live_search['after_id'] = root.after(150, run_live_search)
+
+def run_live_search():
+    live_search['after_id'] = None
+    live_search['query'] = live_search_entry.get().strip()
+    if not store.loaded:
+        return  # finish_loading applies the query
+    if live_search['query'] and search_index.search(live_search['query']) is None:
+        # The index is still being built; try again shortly
+        schedule_live_search()
+        return
+    view['page'] = 0
+    refresh_job_treeview()
+
+def refresh_job_treeview():
+    # Show the current page of the jobs passing the active filter and live
+    # search, in the order picked by clicking a column heading
+    if view['after_id'] is not None:
+        root.after_cancel(view['after_id'])
+        view['after_id'] = None
+    job_numbers = search_index.search(live_search['query']) if live_search['query'] else None
+    while True:
+        start = view['page'] * PAGE_SIZE
+        page_jobs, days_in_shop, total = columns.select_page(
+            start, PAGE_SIZE, job_numbers=job_numbers, today=clock.today,
+            sort_by=view['sort_by'], descending=view['descending'], **active_filter)
+        if page_jobs or view['page'] == 0:
+            break
+        view['page'] = (total - 1) // PAGE_SIZE if total else 0  # The list got shorter
+    update_job_treeview(page_jobs, days_in_shop)
+    page_label['text'] = f"Jobs {start + 1}-{start + len(page_jobs)} of {total}" if total else "No jobs"
+    previous_page_button.state(['!disabled' if view['page'] > 0 else 'disabled'])
+    next_page_button.state(['!disabled' if start + PAGE_SIZE < total else 'disabled'])
+
+def show_page(step):
+    if not store.loaded:
+        return
+    view['page'] = max(0, view['page'] + step)
+    refresh_job_treeview()
+
+def sort_by_column(column):
+    # Click a heading to sort by it, again to reverse, and a third time to
+    # go back to Not Done and oldest first
+    if not store.loaded:
+        return
+    if view['sort_by'] != column:
+        view.update({'sort_by': column, 'descending': False})
+    elif not view['descending']:
+        view['descending'] = True
+    else:
+        view.update({'sort_by': None, 'descending': False})
+    for heading in COLUMNS:
+        arrow = (" ▼" if view['descending'] else " ▲") if heading == view['sort_by'] else ""
+        job_treeview.heading(heading, text=heading + arrow)
+    view['page'] = 0
+    refresh_job_treeview()
 
 def show_job_details(job):
     job_details_window = tk.Toplevel(root)
-    job_details_window.title("Job Details")
+    archived = job is not None and job['Job Number'] not in store
+    job_details_window.title("Archived Job Details" if archived else "Job Details")
     if job is not None:
         for key, value in job.items():
             ttk.Label(job_details_window, text=f"{key}: {value}").pack()
     else:
         ttk.Label(job_details_window, text="Job not found").pack()
 
+def show_archive():
+    # Read-only list of one archive period at a time; a period is only read
+    # from disk when it is picked
+    periods = archive.periods()
+    if not periods:
+        messagebox.showinfo("Archived Jobs", "No jobs have been archived yet.")
+        return
+    window = tk.Toplevel(root)
+    window.title("Archived Jobs")
+    ttk.Label(window, text="Period:").pack()
+    period_input = ttk.Combobox(window, values=periods, state='readonly')
+    period_input.pack()
+    treeview = ttk.Treeview(window, columns=COLUMNS, show="headings")
+    for heading in COLUMNS:
+        treeview.heading(heading, text=heading)
+    scrollbar = ttk.Scrollbar(window, orient='vertical', command=treeview.yview)
+    treeview.configure(yscrollcommand=scrollbar.set)
+    treeview.pack(side='left', fill='both', expand=True)
+    scrollbar.pack(side='right', fill='y')
+    archived_sync = JobTreeviewSync(treeview, clock)
+
+    def show_period(event=None):
+        jobs = [job for job in archive.load(period_input.get()).values() if job['Job Number'] not in store]
+        archived_sync.show(jobs)
+
+    def show_selected_job(event):
+        for job_number in treeview.selection():
+            show_job_details(archive.load(period_input.get()).get(job_number))
+
+    period_input.bind('<<ComboboxSelected>>', show_period)
+    treeview.bind('<Double-1>', show_selected_job)
+    period_input.set(periods[0])
+    show_period()
+
+def export_view():
+    # Write every job passing the active filter and live search (not just the
+    # page shown), in the current order, to CSV, JSONL, Parquet or XLSX
+    if not store.loaded:
+        return
+    dialog = tk.Toplevel(root)
+    dialog.title("Export Jobs")
+    ttk.Label(dialog, text="Format:").pack()
+    format_choice = ttk.Combobox(dialog, values=EXPORT_FORMATS, state='readonly')
+    format_choice.current(0)
+    format_choice.pack()
+    ttk.Label(dialog, text="Columns:").pack()
+    field_list = tk.Listbox(dialog, selectmode='multiple', exportselection=False, height=len(EXPORT_FIELDS))
+    field_list.insert('end', *EXPORT_FIELDS)
+    field_list.selection_set(0, 'end')
+    field_list.pack()
+    ttk.Label(dialog, text="Changed since (blank for all, or e.g. 2023-09-01):").pack()
+    since_entry = ttk.Entry(dialog)
+    since_entry.pack()
+
+    def export():
+        export_format = format_choice.get()
+        fields = [EXPORT_FIELDS[index] for index in field_list.curselection()]
+        if not fields:
+            messagebox.showerror("Export Failed", "Pick at least one column to export.", parent=dialog)
+            return
+        file_path = filedialog.asksaveasfilename(parent=dialog, title="Export Jobs", initialfile=f"jobs.{export_format}",
+                                                 defaultextension=f".{export_format}",
+                                                 filetypes=[(f"{export_format.upper()} files", f"*.{export_format}")])
+        if not file_path:
+            return
+        since = since_entry.get().strip()
+        dialog.destroy()
+        try:
+            job_numbers = search_index.search(live_search['query']) if live_search['query'] else None
+            if since:
+                changed = {job['Job Number'] for job in store.changed_since(parse_timestamp(since))}
+                job_numbers = changed if job_numbers is None else changed & set(job_numbers)
+            jobs, _ = columns.select(job_numbers=job_numbers, today=clock.today, sort_by=view['sort_by'],
+                                     descending=view['descending'], **active_filter)
+            with metrics.timer("export"):
+                count = export_jobs(jobs, file_path, fields, export_format, clock.today)
+        except (OSError, ValueError, ImportError) as error:
+            messagebox.showerror("Export Failed", str(error))
+            return
+        messagebox.showinfo("Export Jobs", f"Exported {count} jobs to {file_path}.")
+
+    ttk.Button(dialog, text="Export", command=export).pack(side='left')
+    ttk.Button(dialog, text="Cancel", command=dialog.destroy).pack(side='right')
+
+@timed("filter")
 def apply_filter():
     location_filter_value = location_filter.get()
     client_filter_value = client_filter.get()
     status_filter_value = status_filter.get()
 
-    filtered_jobs = []
-    for job in jobs:
-        if (not location_filter_value or job['Location'] == location_filter_value) and \
-           (not client_filter_value or job['Name'] == client_filter_value) and \
-           (not status_filter_value or job['Status'] == status_filter_value):
-            filtered_jobs.append(job)
-
-    update_job_treeview(filtered_jobs)
+    active_filter.update({'Name': client_filter_value, 'Location': location_filter_value, 'Status': status_filter_value})
+    view['page'] = 0
+    refresh_job_treeview()
 
 def reset_filters():
     location_filter.set('')
     client_filter.set('')
     status_filter.set('')
-    update_job_treeview(jobs)
-
-def update_job_treeview(jobs_to_display):
-    job_treeview.delete(*job_treeview.get_children())
-    today = datetime.today()
-    not_done_jobs = []
-    done_jobs = []
-
-    for i, job in enumerate(jobs_to_display):
-        job_date = datetime.strptime(job['Production Date'], '%Y-%m-%d')
-        days_in_shop = (today - job_date).days
-        item = job_treeview.insert('', 'end', values=(job['Sign off Date'], job['Name'], job['Phone Number'],
-                                                      job['Location'], job['Production Date'], job['Price'],
-                                                      job['Notes'], job['Job Number'],
-                                                      days_in_shop if job['Status'] == "Not Done" else "",  # Show Days in Shop for Not Done jobs
-                                                      job['Status']))
-        treeview_item_to_job[item] = i
-
-        if job['Status'] == "Not Done":
-            not_done_jobs.append((item, days_in_shop))
-        else:
-            done_jobs.append((item, days_in_shop))
-
-    not_done_jobs.sort(key=lambda x: x[1], reverse=True)
-    done_jobs.sort(key=lambda x: x[1], reverse=True)
-
-    for item, _ in not_done_jobs:
-        job_treeview.move(item, '', 'end')
-    for item, _ in done_jobs:
-        job_treeview.move(item, '', 'end')
+    active_filter.update({'Name': '', 'Location': '', 'Status': ''})
+    view['page'] = 0
+    refresh_job_treeview()
+
+@timed("display")
+def update_job_treeview(jobs_to_display, days_in_shop=None):
+    # Only rows that were added, removed, changed or reordered touch the widget
+    treeview_sync.show(jobs_to_display, days_in_shop, keep_order=True)
+
+def on_close():
+    # Fold the change journal back into the jobs file before exiting
+    cancel_loading_event.set()
+    try:
+        with metrics.timer("save"):
+            store.save()
+    except TimeoutError as error:
+        # Every change is already in the journal; the next start replays it
+        messagebox.showwarning("Jobs File Busy", f"{error}. Your changes are kept and will be saved next time.")
+    metrics.log_snapshot()
+    root.destroy()
+
+def refresh_metrics():
+    metrics_label['text'] = metrics.summary()
+    root.after(1000, refresh_metrics)
+
+def log_metrics():
+    metrics.log_snapshot()
+    root.after(LOG_INTERVAL_MS, log_metrics)
 
 def update_client_filter():
-    client_names = set()
-    for job in jobs:
-        client_names.add(job['Name'])
-    client_names_list = sorted(list(client_names))  # Sort alphabetically
-    client_filter['values'] = ('',) + tuple(client_names_list)  # Add an empty option
+    fill_filter_choices(client_filter, 'Name')
 
 def update_location_filter():
-    location_names = set()
-    for job in jobs:
-        location_names.add(job['Location'])
-    location_names_list = sorted(list(location_names))  # Sort alphabetically
-    location_filter['values'] = ('',) + tuple(location_names_list)  # Add an empty option
+    fill_filter_choices(location_filter, 'Location')
+
+def fill_filter_choices(combobox, field):
+    # Called as the list drops down, so clients and locations added since
+    # show up. What has been typed so far narrows the list (unless it is
+    # already a complete value), through the vocabulary's sorted index.
+    typed = combobox.get()
+    prefix = '' if vocabulary.count(field, typed) else typed
+    combobox['values'] = ('',) + tuple(vocabulary.complete(field, prefix, FILTER_CHOICES))  # Add an empty option
 
 root = tk.Tk()
 root.title("Job Management App")
 
+# Show load progress with a way to stop a slow load
+load_frame = ttk.Frame(root)
+load_frame.pack(side='bottom', fill='x', padx=20)
+load_status = ttk.Label(load_frame, text="Loading jobs...")
+load_status.pack(side='left')
+load_progress = ttk.Progressbar(load_frame, maximum=100)
+load_progress.pack(side='left', fill='x', expand=True)
+cancel_loading_event = threading.Event()
+cancel_loading_button = ttk.Button(load_frame, text="Cancel", command=cancel_loading_event.set)
+cancel_loading_button.pack(side='right')
+
 main_frame = ttk.Frame(root)
 main_frame.pack(padx=20, pady=20, fill='both', expand=True)
 
-jobs = load_jobs()
-treeview_item_to_job = {}
+# Optional arguments: the jobs file to open (jobs.csv or e.g. jobs.db), and
+# --metrics / --profile-slow=MS to time actions (see metrics)
+args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+clock = ShopClock()  # Days In Shop are counted to this date
+store = JobStore(args[0] if args else 'jobs.csv')
+metrics.configure(sys.argv[1:], log_path=store.file_path + ".metrics.log")
+columns = JobColumns().attach(store)
+search_index = SearchIndex().attach(store)
+rollups = JobRollups().attach(store)
+vocabulary = Vocabulary().attach(store)  # Clients, locations and phone numbers in use
+archive = JobArchive(store.file_path)  # Old Done jobs (see jobs.py archive), read on demand
+history = UndoHistory(store)  # Undo/redo of changes made in this window
+store.add_listener(show_store_change)
+summary = {'after_id': None}
+loading = {'started': 0.0}
+batch = {'running': False}
+live_search = {'query': '', 'after_id': None}
+view = {'sort_by': None, 'descending': False, 'page': 0, 'after_id': None}  # Column sorted by, and page shown
+load_queue = queue.Queue()
+active_filter = {'Name': '', 'Location': '', 'Status': ''}
+SYNC_INTERVAL_MS = 2000  # How often to pick up changes from other workstations
+PAGE_SIZE = 500  # Rows in the list at once; the rest are a page away
+FILTER_CHOICES = 500  # Most values listed in a dropdown; typing narrows it down
 
 # Create a treeview for displaying job information
-job_treeview = ttk.Treeview(main_frame, columns=("Sign off Date", "Name", "Phone Number", "Location", "Production Date", "Price", "Notes", "Job Number", "Days In Shop", "Status"), show="headings")
-job_treeview.heading("Sign off Date", text="Sign off Date")
-job_treeview.heading("Name", text="Name")
-job_treeview.heading("Phone Number", text="Phone Number")
-job_treeview.heading("Location", text="Location")
-job_treeview.heading("Production Date", text="Production Date")
-job_treeview.heading("Price", text="Price")
-job_treeview.heading("Notes", text="Notes")
-job_treeview.heading("Job Number", text="Job Number")
-job_treeview.heading("Days In Shop", text="Days In Shop")
-job_treeview.heading("Status", text="Status")
+job_treeview = ttk.Treeview(main_frame, columns=COLUMNS, show="headings")
+treeview_sync = JobTreeviewSync(job_treeview, clock)
+# Click a heading to sort by that column
+for heading in COLUMNS:
+    job_treeview.heading(heading, text=heading, command=lambda column=heading: sort_by_column(column))
 
 # Create a vertical scrollbar for the job treeview
 job_treeview_scrollbar = ttk.Scrollbar(main_frame, orient='vertical', command=job_treeview.yview)
@@ -135,12 +491,31 @@ job_treeview.configure(yscrollcommand=job_treeview_scrollbar.set)
 job_treeview.pack(side='left', fill='both', expand=True)
 job_treeview_scrollbar.pack(side='right', fill='y')
 
-# Update the filtered job list
-update_job_treeview(jobs)
-
-mark_done_button = ttk.Button(main_frame, text="Mark Job as Done/Not Done", command=mark_job)
+mark_done_button = ttk.Button(main_frame, text="Mark Selected Jobs as Done/Not Done", command=mark_job)
 mark_done_button.pack()
 
+bulk_edit_button = ttk.Button(main_frame, text="Edit Field of Selected Jobs", command=bulk_edit_jobs)
+bulk_edit_button.pack()
+
+import_button = ttk.Button(main_frame, text="Import Jobs from CSV", command=import_jobs_from_csv)
+import_button.pack()
+
+archive_button = ttk.Button(main_frame, text="Archived Jobs", command=show_archive)
+archive_button.pack()
+
+export_button = ttk.Button(main_frame, text="Export...", command=export_view)
+export_button.pack()
+
+# Only one page of jobs is in the list at a time
+page_frame = ttk.Frame(main_frame)
+page_frame.pack()
+previous_page_button = ttk.Button(page_frame, text="< Previous", command=lambda: show_page(-1))
+previous_page_button.pack(side='left')
+page_label = ttk.Label(page_frame, text="")
+page_label.pack(side='left', padx=5)
+next_page_button = ttk.Button(page_frame, text="Next >", command=lambda: show_page(1))
+next_page_button.pack(side='left')
+
 search_job_label = ttk.Label(main_frame, text="Search Job by Job Number:")
 search_job_label.pack()
 search_job_entry = ttk.Entry(main_frame)
@@ -149,17 +524,23 @@ search_job_entry.pack()
 search_button = ttk.Button(main_frame, text="Search", command=search_job)
 search_button.pack()
 
+live_search_label = ttk.Label(main_frame, text="Search all fields:")
+live_search_label.pack()
+live_search_entry = ttk.Entry(main_frame)
+live_search_entry.pack()
+live_search_entry.bind('<KeyRelease>', schedule_live_search)
+
 filter_label = ttk.Label(main_frame, text="Filter by:")
 filter_label.pack()
 
 location_filter_label = ttk.Label(main_frame, text="Location:")
 location_filter_label.pack()
-location_filter = ttk.Combobox(main_frame)
+location_filter = ttk.Combobox(main_frame, postcommand=update_location_filter)
 location_filter.pack()
 
 client_filter_label = ttk.Label(main_frame, text="Client:")
 client_filter_label.pack()
-client_filter = ttk.Combobox(main_frame, values=["", "Client 1", "Client 2", "Client 3"])
+client_filter = ttk.Combobox(main_frame, postcommand=update_client_filter)
 client_filter.pack()
 
 status_filter_label = ttk.Label(main_frame, text="Status:")
@@ -173,12 +554,29 @@ filter_button.pack()
 reset_button = ttk.Button(main_frame, text="Reset Filters", command=reset_filters)
 reset_button.pack()
 
-# Update the client filter with unique client names
-update_client_filter()
-
-# Update the location filter with unique location names
-update_location_filter()
-
+# Totals for the whole shop, kept up to date by rollups
+summary_frame = ttk.LabelFrame(main_frame, text="Summary")
+summary_frame.pack(fill='x', pady=(10, 0))
+summary_label = ttk.Label(summary_frame, text="Loading...", justify='left')
+summary_label.pack(anchor='w', padx=5, pady=5)
+
+if metrics.enabled:
+    # Timings of loading, redisplays, filters and saves, refreshed every
+    # second and logged every minute
+    metrics_label = ttk.Label(root, text=metrics.summary(), relief='sunken', anchor='w')
+    metrics_label.pack(side='bottom', fill='x', before=load_frame)
+    root.after(1000, refresh_metrics)
+    root.after(LOG_INTERVAL_MS, log_metrics)
+
+# Load jobs in the background; the filters are filled in once loading finishes
+start_loading()
+
+# Undo/redo of status changes and edits
+root.bind('<Control-z>', undo_change)
+root.bind('<Control-y>', redo_change)
+root.bind('<Control-Z>', redo_change)  # Ctrl+Shift+Z
+
+root.protocol("WM_DELETE_WINDOW", on_close)
 root.mainloop()
 
 
@@ -1,42 +1,202 @@
+import importlib
 import sys
-import csv
-import pandas as pd
-from datetime import datetime
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget, QPushButton, QLineEdit, QDialog, QLabel, QHBoxLayout
-from PyQt5.QtGui import QColor, QFont
-from fpdf import FPDF
+import threading
+import time
+
+STARTED = time.perf_counter()  # Start of the imports, for --profile-startup
+
+from PyQt5.QtWidgets import QApplication, QMainWindow, QTableView, QHeaderView, QAbstractItemView, QVBoxLayout, QWidget, QPushButton, QLineEdit, QDialog, QLabel, QHBoxLayout, QProgressBar, QGroupBox, QComboBox, QFileDialog, QMessageBox, QShortcut, QCompleter, QListWidget, QListWidgetItem
+from PyQt5.QtCore import QEvent, Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont, QKeySequence
+from archive import JobArchive, KnownJobNumbers
+from concurrency import ConflictError
+from export import EXPORT_FIELDS, EXPORT_FORMATS, export_jobs, parse_timestamp
+from history import UndoHistory
+from jobstore import JobStore
+from job_import import import_jobs
+from metrics import LOG_INTERVAL_MS, metrics, timed
+from job_record import FIELDNAMES
+from rollups import JobRollups, summary_lines
+from schema import rejected_path, validate_job
+from shop_clock import ShopClock
+from job_model import COLUMNS, JobTableModel
+from search_index import SearchIndex
+from vocabulary import VOCABULARY_FIELDS, Vocabulary
+
+SYNC_INTERVAL_MS = 2000  # How often to pick up changes from other workstations
+
+
+class StartupProfile:
+    # Time spent in each stage of startup, printed to stderr when work2.py
+    # is run with --profile-startup
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.last = STARTED
+        self.phases = []
+
+    def mark(self, phase):
+        # Ends the current phase; it is named for what happened during it
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def note(self, phase, seconds):
+        # Part of the phase just ended, shown under it
+        self.phases.append((phase, seconds))
+
+    def report(self):
+        if not self.enabled:
+            return
+        for phase, seconds in self.phases:
+            print(f"{phase:<28}{seconds * 1000:9.1f} ms", file=sys.stderr)
+        print(f"{'total':<28}{(self.last - STARTED) * 1000:9.1f} ms", file=sys.stderr)
+
+
+class CsvLoadThread(QThread):
+    # Reads the jobs off the GUI thread and hands each chunk back as a signal;
+    # the store itself is only touched from the GUI thread
+    chunkLoaded = pyqtSignal(object, object, float)  # fieldnames, rows, progress
+    loadFinished = pyqtSignal(bool)  # True if the load was cancelled
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        # numpy (through columnar) is only needed once jobs arrive; importing
+        # it here keeps it off the GUI thread while the window is already up
+        started = time.perf_counter()
+        importlib.import_module("columnar")
+        self.import_seconds = time.perf_counter() - started
+        # Cancelled only if it stopped before the last chunk, not if Cancel
+        # came after the whole file was read
+        for fieldnames, rows, progress in self.store.read_chunks():
+            if self.cancel_event.is_set():
+                self.loadFinished.emit(True)
+                return
+            self.chunkLoaded.emit(fieldnames, rows, progress)
+        self.loadFinished.emit(False)
 
 
 class JobManagementApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, file_path="jobs.csv", profile_startup=False):
         super().__init__()
+        self.startup = StartupProfile(profile_startup)
+        self.startup.mark("imports")
 
+        # jobs.csv, or a SQLite database such as jobs.db
+        self.file_path = file_path
         self.initUI()
 
     def initUI(self):
         self.setWindowTitle("Job Management App")
         self.setGeometry(100, 100, 800, 600)
 
+        # All job data lives in the store; the CSV is read once, in the background
+        self.store = JobStore(self.file_path)
+        self.columns = None  # JobColumns, attached once the first jobs arrive (see attach_columns)
+        self.load_thread = None
+        self.search_index = SearchIndex().attach(self.store)
+        self.rollups = JobRollups().attach(self.store)
+        self.vocabulary = Vocabulary().attach(self.store)  # Clients, locations and phone numbers in use
+        self.history = UndoHistory(self.store)  # Undo/redo of changes made in this window
+        self.archive = JobArchive(self.file_path)  # Old Done jobs (see jobs.py archive), read on demand
+        self.clock = ShopClock()  # Days In Shop are counted to this date
+
         self.centralWidget = QWidget(self)
         self.setCentralWidget(self.centralWidget)
 
         self.layout = QVBoxLayout(self.centralWidget)
 
-        # Create a table widget to display data
-        self.tableWidget = QTableWidget(self)
-        self.tableWidget.setColumnCount(11)  # Adjust column count according to your data
-        self.tableWidget.setHorizontalHeaderLabels(["Sign off Date", "Name", "Phone Number", "Location", "Production Date", "Price", "Notes", "Job Number", "Status", "Days In Shop", "Edit"])
-
-        # Hide the vertical header (row index)
-        self.tableWidget.verticalHeader().setVisible(False)
-
-        self.layout.addWidget(self.tableWidget)
+        # Show load progress with a way to stop a slow load
+        load_layout = QHBoxLayout()
+        self.load_progress = QProgressBar(self)
+        self.load_progress.setRange(0, 100)
+        self.cancel_load_button = QPushButton("Cancel Loading", self)
+        self.cancel_load_button.clicked.connect(self.cancel_loading)
+        load_layout.addWidget(self.load_progress)
+        load_layout.addWidget(self.cancel_load_button)
+        self.layout.addLayout(load_layout)
+
+        # Shop-wide totals, kept up to date by the rollups as jobs change
+        self.dashboard = QGroupBox("Dashboard", self)
+        dashboard_layout = QVBoxLayout(self.dashboard)
+        self.dashboard_labels = [QLabel(self.dashboard) for _ in summary_lines(self.rollups.summary())]
+        for label in self.dashboard_labels:
+            dashboard_layout.addWidget(label)
+        self.layout.addWidget(self.dashboard)
+
+        # A burst of changes (e.g. a sync) redraws the dashboard once
+        self.dashboard_timer = QTimer(self)
+        self.dashboard_timer.setSingleShot(True)
+        self.dashboard_timer.setInterval(200)
+        self.dashboard_timer.timeout.connect(self.refresh_dashboard)
+        self.store.add_listener(lambda event, job, job_number: self.dashboard_timer.start())
+
+        # Create a table view to display data; the model only renders visible rows
+        self.model = JobTableModel(self)
+        self.tableView = QTableView(self)
+        self.tableView.setModel(self.model)
+        self.tableView.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tableView.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        # Double-click a row to edit the job
+        self.tableView.doubleClicked.connect(lambda index: self.edit_job(index.row()))
+
+        # Hide the vertical header (row index) and keep rows a fixed height
+        self.tableView.verticalHeader().setVisible(False)
+        self.tableView.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+
+        # Only sample a few hundred rows when sizing columns to their contents
+        self.tableView.horizontalHeader().setResizeContentsPrecision(200)
+
+        # Click a header to sort by that column, again to reverse, and a third
+        # time to go back to Not Done and oldest first. The model only renders
+        # the rows on screen, so the view is windowed however many jobs match.
+        self.sort_by = None
+        self.sort_descending = False
+        self.tableView.horizontalHeader().setSectionsClickable(True)
+        self.tableView.horizontalHeader().sectionClicked.connect(self.sort_by_column)
+
+        self.layout.addWidget(self.tableView)
+
+        # Create a button to edit the selected job
+        self.edit_job_button = QPushButton("Edit Selected Job", self)
+        self.edit_job_button.clicked.connect(self.edit_selected_job)
+        self.layout.addWidget(self.edit_job_button)
 
         # Create a button to add a new job
         self.add_job_button = QPushButton("Add New Job", self)
         self.add_job_button.clicked.connect(self.add_new_job)
         self.layout.addWidget(self.add_job_button)
 
+        # Batch actions on every selected row (Ctrl/Shift-click to select
+        # several); each batch is saved as one change
+        batch_layout = QHBoxLayout()
+        self.mark_done_button = QPushButton("Mark Selected Done", self)
+        self.mark_done_button.clicked.connect(lambda: self.mark_selected_jobs("Done"))
+        self.mark_not_done_button = QPushButton("Mark Selected Not Done", self)
+        self.mark_not_done_button.clicked.connect(lambda: self.mark_selected_jobs("Not Done"))
+        self.bulk_edit_button = QPushButton("Edit Field of Selected Jobs", self)
+        self.bulk_edit_button.clicked.connect(self.bulk_edit_selected_jobs)
+        self.import_button = QPushButton("Import Jobs from CSV", self)
+        self.import_button.clicked.connect(self.import_jobs_from_csv)
+        for button in (self.mark_done_button, self.mark_not_done_button, self.bulk_edit_button, self.import_button):
+            batch_layout.addWidget(button)
+        self.layout.addLayout(batch_layout)
+
+        # Ctrl+Z and Ctrl+Y / Ctrl+Shift+Z (every platform binding) undo and
+        # redo edits and status changes; text fields keep their own undo
+        # while they have focus
+        for key, action in ((QKeySequence.Undo, self.undo_change), (QKeySequence.Redo, self.redo_change)):
+            for key_sequence in QKeySequence.keyBindings(key):
+                QShortcut(key_sequence, self, action)
+
         # Create input field for searching by Job Number
         self.job_number_label = QLabel("Search by Job Number:")
         self.layout.addWidget(self.job_number_label)
@@ -48,188 +208,292 @@ class JobManagementApp(QMainWindow):
         self.search_button.clicked.connect(self.search_by_job_number)
         self.layout.addWidget(self.search_button)
 
+        # Create a search-as-you-type field over all job fields
+        self.live_search_label = QLabel("Search all fields:")
+        self.layout.addWidget(self.live_search_label)
+
+        self.live_search_input = QLineEdit(self)
+        self.live_search_input.setPlaceholderText("e.g., name, phone, location or notes")
+        self.layout.addWidget(self.live_search_input)
+
+        # Debounce: only search once typing pauses
+        self.live_search_timer = QTimer(self)
+        self.live_search_timer.setSingleShot(True)
+        self.live_search_timer.setInterval(150)
+        self.live_search_timer.timeout.connect(self.run_live_search)
+        self.live_search_input.textChanged.connect(self.live_search_timer.start)
+
+        # Pick up jobs saved on other workstations sharing the same file
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setInterval(SYNC_INTERVAL_MS)
+        self.sync_timer.timeout.connect(self.sync_with_other_workstations)
+
+        # Age every job by a day at midnight, without reloading
+        self.day_timer = QTimer(self)
+        self.day_timer.setSingleShot(True)
+        self.day_timer.timeout.connect(self.on_day_rollover)
+
         self.print_pdf_button = QPushButton("Print PDF", self)
         self.print_pdf_button.clicked.connect(self.print_pdf)
         self.layout.addWidget(self.print_pdf_button)
 
-        # Load and display data from the CSV file
-        self.load_and_display_data()
-
-        # Adjust column sizes to fit contents
-        self.tableWidget.resizeColumnsToContents()
+        self.archive_button = QPushButton("Archived Jobs", self)
+        self.archive_button.clicked.connect(self.show_archive)
+        self.layout.addWidget(self.archive_button)
+
+        if metrics.enabled:
+            # Timings of loading, redisplays, filters, saves and printing (see
+            # metrics), refreshed every second and logged every minute
+            self.metrics_label = QLabel(metrics.summary())
+            self.statusBar().addPermanentWidget(self.metrics_label)
+            self.metrics_timer = QTimer(self)
+            self.metrics_timer.timeout.connect(lambda: self.metrics_label.setText(metrics.summary()))
+            self.metrics_timer.start(1000)
+            self.metrics_log_timer = QTimer(self)
+            self.metrics_log_timer.timeout.connect(metrics.log_snapshot)
+            self.metrics_log_timer.start(LOG_INTERVAL_MS)
+
+        self.export_button = QPushButton("Export...", self)
+        self.export_button.clicked.connect(self.export_view)
+        self.layout.addWidget(self.export_button)
 
         # Set font size for labels and buttons
         font = QFont()
         font.setPointSize(14)  # Adjust the font size as needed
         self.job_number_label.setFont(font)
+        self.live_search_label.setFont(font)
         self.add_job_button.setFont(font)
+        self.edit_job_button.setFont(font)
         self.search_button.setFont(font)
 
         self.showMaximized()
 
+        # Load and display data from the CSV file once the window shell has
+        # been painted
+        QTimer.singleShot(0, self.start_loading)
+
+    def start_loading(self):
+        self.startup.mark("window shell")
+        # Editing waits until every job (and the journal) has been read
+        for button in (self.edit_job_button, self.add_job_button, self.print_pdf_button, self.mark_done_button,
+                       self.mark_not_done_button, self.bulk_edit_button, self.import_button):
+            button.setEnabled(False)
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.cancel_load_button.show()
+
+        self.load_started = time.perf_counter()
+        self.store.begin_load()
+        self.model.set_jobs([], [])
+        self.load_thread = CsvLoadThread(self.store, self)
+        self.load_thread.chunkLoaded.connect(self.on_chunk_loaded)
+        self.load_thread.loadFinished.connect(self.on_load_finished)
+        self.load_thread.start()
+
+    def cancel_loading(self):
+        self.load_thread.cancel()
+
+    def attach_columns(self):
+        # The load thread imports columnar before it sends the first chunk
+        from columnar import JobColumns
+        if self.columns is None:
+            self.columns = JobColumns().attach(self.store)
+        return JobColumns
+
+    def on_chunk_loaded(self, fieldnames, rows, progress):
+        first_chunk = self.model.rowCount() == 0
+        JobColumns = self.attach_columns()
+        self.store.add_chunk(fieldnames, rows)
+
+        # Stream the chunk into the view; it is sorted once loading finishes
+        jobs, days_in_shop = JobColumns(rows).select(today=self.clock.today)
+        self.model.append_jobs(jobs, days_in_shop)
+        if first_chunk:
+            # Adjust column sizes to fit contents
+            self.tableView.resizeColumnsToContents()
+        self.load_progress.setValue(int(progress * 100))
+
+    def on_load_finished(self, cancelled):
+        self.cancel_load_button.hide()
+        if cancelled:
+            # Partial data stays visible but read-only, and is never saved
+            self.load_progress.setFormat("Loading cancelled - showing partial data")
+            return
+
+        self.startup.mark("CSV parse")
+        self.startup.note("  of which deferred imports", self.load_thread.import_seconds)
+        self.load_progress.hide()
+        self.attach_columns()
+        self.store.finish_load()
+        self.load_and_display_data()
+        metrics.record("load", time.perf_counter() - self.load_started)
+        self.startup.mark("model build")
+        if self.startup.enabled:
+            # Reported when the table next paints (see eventFilter)
+            self.tableView.viewport().installEventFilter(self)
+        for button in (self.edit_job_button, self.add_job_button, self.print_pdf_button, self.mark_done_button,
+                       self.mark_not_done_button, self.bulk_edit_button, self.import_button):
+            button.setEnabled(True)
+        self.sync_timer.start()
+        self.day_timer.start(self.clock.ms_until_rollover())
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint and watched is self.tableView.viewport():
+            watched.removeEventFilter(self)
+            self.startup.mark("first paint")
+            self.startup.report()
+        return super().eventFilter(watched, event)
+
+    def refresh_dashboard(self):
+        for label, line in zip(self.dashboard_labels, summary_lines(self.rollups.summary(self.clock.today))):
+            label.setText(line)
+
+    def sync_with_other_workstations(self):
+        # Only the jobs changed elsewhere are re-read; the view is re-sorted
+        # from the columns, keeping the selection and scroll position
+        try:
+            changes = self.store.sync()
+        except OSError:
+            return  # Shared drive unavailable; try again next time
+        if changes:
+            self.redisplay_keeping_position()
+
+    def on_day_rollover(self):
+        # Shift the ages shown instead of recomputing them; the model only
+        # moves the rows that the shift put out of order
+        days = self.clock.check()
+        if days:
+            self.model.shift_days(days, resort=self.sort_by is None)
+            if self.sort_by == "Days In Shop":
+                self.redisplay_keeping_position()
+            self.refresh_dashboard()
+        self.day_timer.start(self.clock.ms_until_rollover())
+
+    def redisplay_keeping_position(self):
+        # Re-sort the view from the columns, keeping the selection and scroll position
+        selected_rows = self.tableView.selectionModel().selectedRows()
+        selected_job = self.model.job_at(selected_rows[0].row()) if selected_rows else None
+        scroll_position = self.tableView.verticalScrollBar().value()
+        self.sort_and_display_data()
+        self.tableView.verticalScrollBar().setValue(scroll_position)
+        if selected_job is not None:
+            row = next((row for row, job in enumerate(self.model.jobs) if job is selected_job), None)
+            if row is not None:
+                self.tableView.selectRow(row)
+
+    def closeEvent(self, event):
+        # Fold the change journal back into the jobs file before exiting
+        if self.load_thread is not None and self.load_thread.isRunning():
+            self.load_thread.cancel()
+            self.load_thread.wait()
+        try:
+            with metrics.timer("save"):
+                self.store.save()
+        except TimeoutError as e:
+            # Every change is already in the journal; the next start replays it
+            QMessageBox.warning(self, "Jobs File Busy", f"{e}. Your changes are kept and will be saved next time.")
+        metrics.log_snapshot()
+        super().closeEvent(event)
+
     def print_pdf(self):
-        # Load data from the CSV file
-        data = self.load_data_from_csv("jobs.csv")
-
-        # Filter jobs that are not done
-        not_done_jobs = [job for job in data if job["Status"] == "Not Done"]
-
-        # Create a Pandas DataFrame from the filtered data
-        df = pd.DataFrame(not_done_jobs)
-
-        # Remove the time portion from the "Production Date"
-        df['Production Date'] = pd.to_datetime(df['Production Date']).dt.strftime('%Y-%m-%d')
-
-        # Calculate "Days In Shop" and add it to the DataFrame
-        df['Days In Shop'] = (pd.Timestamp.now() - pd.to_datetime(df['Production Date'])).dt.days
-
-        # Create a PDF document with landscape orientation
-        pdf = FPDF(orientation='L')  # Landscape orientation
-        pdf.add_page()
-        pdf.set_font("Arial", size=10)
-
-        # Initialize a list to store maximum column widths
-        max_col_widths = [pdf.get_string_width(col) + 6 for col in df.columns]  # 6 is for padding
-
-        # Iterate over the DataFrame to find the maximum width for each column
-        for _, row in df.iterrows():
-            for col in df.columns:
-                col_width = pdf.get_string_width(str(row[col])) + 6  # 6 is for padding
-                max_col_widths[df.columns.get_loc(col)] = max(max_col_widths[df.columns.get_loc(col)], col_width)
-
-        # Calculate the total page width
-        total_width = sum(max_col_widths)
-
-        # Calculate the column widths based on the maximum widths and total width
-        col_widths = [(w / total_width) * pdf.w for w in max_col_widths]
-
-        # Remove the "Status" column from the DataFrame
-        df = df.drop(columns=["Status"])
-
-        # Add a table to the PDF with adjusted column widths and text wrapping
-        pdf.set_fill_color(255, 255, 255)  # Set fill color to white
-        pdf.set_text_color(0, 0, 0)  # Set text color to black
-
-        # Print the header row
-        for col in df.columns:
-            pdf.cell(col_widths[df.columns.get_loc(col)], 10, txt=col, border=1, fill=1)
-        pdf.ln()
-
-        # Define a function to get the background color based on days in shop
-        def get_background_color(days_in_shop):
-            max_days = 30
-            g = int(255 - (255 * days_in_shop / max_days))
-            r = int(255 * days_in_shop / max_days)
-            b = 0
-            return r, g, b
-
-        # Print each job's data side by side with a color gradient for "Days In Shop"
-        for _, row in df.iterrows():
-            for col in df.columns:
-                cell_text = str(row[col])
-                # If the column is "Days In Shop," apply the background color gradient
-                if col == "Days In Shop":
-                    days_in_shop = int(row[col])
-                    r, g, b = get_background_color(days_in_shop)
-                    pdf.set_fill_color(r, g, b)
-                    pdf.cell(col_widths[df.columns.get_loc(col)], 10, txt=cell_text, border=1, fill=1)
-                    pdf.set_fill_color(255, 255, 255)  # Reset fill color to white
-                else:
-                    pdf.cell(col_widths[df.columns.get_loc(col)], 10, txt=cell_text, border=1)
-            pdf.ln()
-
-        # Save the PDF to a file
-        pdf_file_path = "not_done_jobs.pdf"
-        pdf.output(pdf_file_path)
+        # Ask for optional report filters; blank fields match everything
+        report_dialog = QDialog(self)
+        report_dialog.setWindowTitle("Print Not Done Jobs")
 
-    def load_and_display_data(self):
-        # Load data from the CSV file
-        data = self.load_data_from_csv("jobs.csv")  # Replace with your CSV file name
+        form_layout = QVBoxLayout()
 
-        # Calculate "Days In Shop" and display data
-        sorted_data = self.sort_and_display_data(data)
+        labels = ["Location:", "Client:", "Production Date from (YYYY-MM-DD):", "Production Date to (YYYY-MM-DD):"]
+        placeholders = ["All locations", "All clients", "e.g., 2023-09-01", "e.g., 2023-09-30"]
+        fields = ["Location", "Name", None, None]
 
-    def load_data_from_csv(self, file_path):
+        input_fields = []
+        for label, placeholder, field in zip(labels, placeholders, fields):
+            label_widget = QLabel(label)
+            input_widget = QLineEdit()
+            input_widget.setPlaceholderText(placeholder)
+            self.add_completer(input_widget, field)
+            input_fields.append(input_widget)
+            form_layout.addWidget(label_widget)
+            form_layout.addWidget(input_widget)
+
+        # Create buttons for printing and canceling
+        button_layout = QHBoxLayout()
+        print_button = QPushButton("Print")
+        cancel_button = QPushButton("Cancel")
+
+        print_button.clicked.connect(report_dialog.accept)
+        cancel_button.clicked.connect(report_dialog.reject)
+
+        button_layout.addWidget(print_button)
+        button_layout.addWidget(cancel_button)
+
+        dialog_layout = QVBoxLayout()
+        dialog_layout.addLayout(form_layout)
+        dialog_layout.addLayout(button_layout)
+
+        report_dialog.setLayout(dialog_layout)
+
+        if report_dialog.exec_() != QDialog.Accepted:
+            return
+
+        location, client, start_date, end_date = (field.text().strip() for field in input_fields)
         try:
-            with open(file_path, mode='r') as file:
-                csv_reader = csv.DictReader(file)
-                return list(csv_reader)
-        except FileNotFoundError:
-            return []
-
-    def sort_and_display_data(self, data):
-        # Separate data into "Not Done" and "Done" groups
-        not_done_jobs = []
-        done_jobs = []
-
-        for record in data:
-            production_date = datetime.strptime(record["Production Date"], '%Y-%m-%d')
-            days_in_shop = (datetime.now() - production_date).days
-            record["Days In Shop"] = str(days_in_shop)
-
-            if record["Status"] == "Not Done":
-                not_done_jobs.append(record)
-            else:
-                done_jobs.append(record)
-
-        # Sort both groups by "Days In Shop" in descending order
-        not_done_jobs.sort(key=lambda x: int(x["Days In Shop"]), reverse=True)
-        done_jobs.sort(key=lambda x: int(x["Days In Shop"]), reverse=True)
-
-        # Display the combined and sorted data
-        sorted_data = not_done_jobs + done_jobs
-        self.display_data(sorted_data)
-
-    def display_data(self, data):
-        self.tableWidget.setRowCount(len(data))
-
-        for row, record in enumerate(data):
-            for col, value in enumerate(record.values()):
-                item = QTableWidgetItem(value)
-                self.tableWidget.setItem(row, col, item)
-
-            # Set "Days In Shop" cell text to blank for done jobs
-            if record["Status"] == "Done":
-                item = QTableWidgetItem("")  # Blank text for "Days In Shop"
-                self.tableWidget.setItem(row, 9, item)
-
-            # Calculate background color for "Days In Shop" based on a gradient scale
-            days_in_shop = int(record["Days In Shop"])
-            bg_color = self.get_background_color(days_in_shop)
-            self.tableWidget.item(row, 9).setBackground(bg_color)
-
-            # Grey out the row for done jobs
-            if record["Status"] == "Done":
-                for col in range(10):  # Assuming 10 columns
-                    self.tableWidget.item(row, col).setBackground(QColor(220, 220, 220))  # Grey background
-
-            # Create an "Edit" button for each row
-            edit_button = QPushButton("Edit")
-            edit_button.clicked.connect(lambda checked, row=row: self.edit_job(row))
-            self.tableWidget.setCellWidget(row, 10, edit_button)
-
-    def get_background_color(self, days_in_shop):
-        # Define the maximum days for the gradient scale
-        max_days = 30
-
-        # Set to red if days_in_shop exceeds max_days
-        if days_in_shop > max_days:
-            return QColor(255, 0, 0)  # Red
-
-        # Calculate a gradient color based on the number of days
-        min_color = QColor(0, 255, 0)  # Green (for 0 days)
-        max_color = QColor(255, 0, 0)  # Red (for max_days)
-
-        # Interpolate between min_color and max_color based on days_in_shop
-        r = self.interpolate_color(min_color.red(), max_color.red(), days_in_shop, max_days)
-        g = self.interpolate_color(min_color.green(), max_color.green(), days_in_shop, max_days)
-        b = self.interpolate_color(min_color.blue(), max_color.blue(), days_in_shop, max_days)
-
-        return QColor(r, g, b)
-
-    def interpolate_color(self, start, end, value, max_value):
-        # Interpolate a color component (e.g., red, green, or blue) based on a value and a maximum value
-        return int(start + (end - start) * (value / max_value))
+            # fpdf is slow to import and only needed here
+            from report import write_not_done_report
+            # Filter jobs that are not done, longest in the shop first
+            with metrics.timer("print_pdf"):
+                write_not_done_report(self.columns, "not_done_jobs.pdf", location=location, client=client,
+                                      start_date=start_date, end_date=end_date, today=self.clock.today)
+        except (ValueError, ImportError) as e:
+            self.show_error_message(f"Error printing the report: {str(e)}")
+
+    def load_and_display_data(self):
+        # Calculate "Days In Shop" and display data from the in-memory columns
+        self.sort_and_display_data()
+
+    @timed("filter")
+    def sort_and_display_data(self):
+        # "Not Done" jobs first, each group by "Days In Shop" in descending
+        # order, computed in one vectorized pass over the columns; or by the
+        # column whose header was clicked, from its cached sort order
+        job_numbers = None
+        query = self.live_search_input.text().strip()
+        if query:
+            # Only show live search hits (None while the index is building)
+            job_numbers = self.search_index.search(query)
+        sorted_data, days_in_shop = self.columns.select(job_numbers=job_numbers, today=self.clock.today,
+                                                        sort_by=self.sort_by, descending=self.sort_descending)
+        self.display_data(sorted_data, days_in_shop)
+
+    def sort_by_column(self, section):
+        if not self.store.loaded:
+            return
+        column = COLUMNS[section]
+        if self.sort_by != column:
+            self.sort_by, self.sort_descending = column, False
+        elif not self.sort_descending:
+            self.sort_descending = True
+        else:
+            self.sort_by, self.sort_descending = None, False
+        header = self.tableView.horizontalHeader()
+        header.setSortIndicatorShown(self.sort_by is not None)
+        header.setSortIndicator(section, Qt.DescendingOrder if self.sort_descending else Qt.AscendingOrder)
+        self.redisplay_keeping_position()
+
+    def run_live_search(self):
+        if not self.store.loaded:
+            return
+        query = self.live_search_input.text().strip()
+        if query and self.search_index.search(query) is None:
+            # The index is still being built; try again shortly
+            self.live_search_timer.start()
+            return
+        self.sort_and_display_data()
+
+    @timed("display")
+    def display_data(self, data, days_in_shop):
+        # Hand the rows to the model; cells are rendered as they scroll into view
+        self.model.set_jobs(data, days_in_shop)
 
     def search_by_job_number(self):
         job_number = self.job_number_input.text()
@@ -241,19 +505,13 @@ class JobManagementApp(QMainWindow):
             self.show_job_not_found_message()
 
     def find_job_by_number(self, job_number):
-        # Load data from the CSV file
-        data = self.load_data_from_csv("jobs.csv")  # Replace with your CSV file name
-
-        # Search for the job by Job Number
-        for record in data:
-            if record["Job Number"] == job_number:
-                return record
-
-        return None
+        # Look the job up in the Job Number index, then in the archive
+        return self.store.get(job_number) or self.archive.find(job_number)
 
     def show_job_details(self, job_data):
         job_details_dialog = QDialog(self)
-        job_details_dialog.setWindowTitle("Job Details")
+        archived = job_data["Job Number"] not in self.store
+        job_details_dialog.setWindowTitle("Archived Job Details" if archived else "Job Details")
 
         layout = QVBoxLayout()
 
@@ -264,6 +522,99 @@ class JobManagementApp(QMainWindow):
         job_details_dialog.setLayout(layout)
         job_details_dialog.exec_()
 
+    def show_archive(self):
+        # Read-only list of one archive period at a time; a period is only
+        # read from disk when it is picked
+        periods = self.archive.periods()
+        if not periods:
+            QMessageBox.information(self, "Archived Jobs", "No jobs have been archived yet.")
+            return
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Archived Jobs")
+        dialog.resize(800, 500)
+        period_input = QComboBox(dialog)
+        period_input.addItems(periods)
+        model = JobTableModel(dialog)
+        table = QTableView(dialog)
+        table.setModel(model)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.doubleClicked.connect(lambda index: self.show_job_details(model.job_at(index.row())))
+
+        def show_period(period):
+            jobs = [job for job in self.archive.load(period).values() if job["Job Number"] not in self.store]
+            jobs.sort(key=lambda job: (job.production_date is None, job.production_date or 0, job["Job Number"]))
+            model.set_jobs(jobs, [0] * len(jobs))
+
+        period_input.currentTextChanged.connect(show_period)
+        show_period(periods[0])
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Period:"))
+        layout.addWidget(period_input)
+        layout.addWidget(table)
+        dialog.setLayout(layout)
+        dialog.exec_()
+
+    def export_view(self):
+        # Write the jobs shown (live search and sort order included) to CSV,
+        # JSONL, Parquet or XLSX, with the columns ticked, optionally only
+        # the ones added or edited since a given time
+        if not self.store.loaded:
+            return
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Export Jobs")
+        format_input = QComboBox(dialog)
+        format_input.addItems(EXPORT_FORMATS)
+        field_list = QListWidget(dialog)
+        for field in EXPORT_FIELDS:
+            item = QListWidgetItem(field, field_list)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+        since_input = QLineEdit(dialog)
+        since_input.setPlaceholderText("All jobs, or e.g. 2023-09-01 or 2023-09-01T17:30")
+        export_button = QPushButton("Export")
+        cancel_button = QPushButton("Cancel")
+        export_button.clicked.connect(dialog.accept)
+        cancel_button.clicked.connect(dialog.reject)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(export_button)
+        button_layout.addWidget(cancel_button)
+        dialog_layout = QVBoxLayout()
+        dialog_layout.addWidget(QLabel("Format:"))
+        dialog_layout.addWidget(format_input)
+        dialog_layout.addWidget(QLabel("Columns:"))
+        dialog_layout.addWidget(field_list)
+        dialog_layout.addWidget(QLabel("Changed since:"))
+        dialog_layout.addWidget(since_input)
+        dialog_layout.addLayout(button_layout)
+        dialog.setLayout(dialog_layout)
+
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        export_format = format_input.currentText()
+        fields = [field_list.item(row).text() for row in range(field_list.count())
+                  if field_list.item(row).checkState() == Qt.Checked]
+        if not fields:
+            self.show_error_message("Pick at least one column to export.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Jobs", f"jobs.{export_format}",
+                                                   f"{export_format.upper()} files (*.{export_format})")
+        if not file_path:
+            return
+        try:
+            jobs = self.model.jobs
+            if since_input.text().strip():
+                changed = {job["Job Number"] for job in self.store.changed_since(parse_timestamp(since_input.text()))}
+                jobs = [job for job in jobs if job["Job Number"] in changed]
+            with metrics.timer("export"):
+                count = export_jobs(jobs, file_path, fields, export_format, self.clock.today)
+        except (OSError, ValueError, ImportError) as e:
+            self.show_error_message(f"Error exporting jobs: {str(e)}")
+            return
+        QMessageBox.information(self, "Export Jobs", f"Exported {count} jobs to {file_path}.")
+
     def show_job_not_found_message(self):
         not_found_dialog = QDialog(self)
         not_found_dialog.setWindowTitle("Job Not Found")
@@ -288,10 +639,11 @@ class JobManagementApp(QMainWindow):
         placeholders = ["e.g., 2023-09-18", "e.g., John Doe", "e.g., 123-456-7890", "e.g., New York, NY", "e.g., 2023-09-18", "e.g., 500", "e.g., Additional details", "e.g., 12345", "e.g., Done"]
 
         input_fields = []
-        for label, placeholder in zip(labels, placeholders):
+        for label, placeholder, field in zip(labels, placeholders, FIELDNAMES):
             label_widget = QLabel(label)
             input_widget = QLineEdit()
             input_widget.setPlaceholderText(placeholder)
+            self.add_completer(input_widget, field)
             input_fields.append(input_widget)
             form_layout.addWidget(label_widget)
             form_layout.addWidget(input_widget)
@@ -318,12 +670,8 @@ class JobManagementApp(QMainWindow):
         result = add_job_dialog.exec_()
 
         if result == QDialog.Accepted:
-            # Retrieve user-entered data
-            new_job_data = {}
-            for label, input_field in zip(labels, input_fields):
-                field_name = label.split(":")[0].strip()  # Extract field name from label
-                field_value = input_field.text()
-                new_job_data[field_name] = field_value
+            # Retrieve user-entered data; the inputs are in FIELDNAMES order
+            new_job_data = {field: input_field.text() for field, input_field in zip(FIELDNAMES, input_fields)}
 
             # Validate and add the new job to the CSV
             if self.validate_and_add_job(new_job_data):
@@ -331,27 +679,33 @@ class JobManagementApp(QMainWindow):
                 self.load_and_display_data()
 
     def validate_and_add_job(self, new_job_data):
-        # Validate the new job data here (e.g., check if fields are not empty, date formats are correct, etc.)
-        # You can implement your own validation logic based on your requirements.
-
-        # For demonstration purposes, let's assume basic validation where fields must not be empty.
-        for key, value in new_job_data.items():
-            if not value:
-                self.show_error_message("Please fill in all fields.")
-                return False
+        # Every field must be filled in and valid; all problems are listed at
+        # once, and the job is saved normalized (e.g. "done" -> "Done")
+        job, problems = validate_job(new_job_data, existing=KnownJobNumbers(self.store, self.archive),
+                                     required=FIELDNAMES)
+        if problems:
+            self.show_error_message("Please correct the job:\n" + "\n".join(problems))
+            return False
 
-        # Assuming all validation passed, add the new job to the CSV file
-        file_path = "jobs.csv"  # Replace with your CSV file path
         try:
-            with open(file_path, mode='a', newline='') as file:
-                fieldnames = new_job_data.keys()
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                writer.writerow(new_job_data)
+            self.store.insert(job)
             return True
         except Exception as e:
             self.show_error_message(f"Error adding the job: {str(e)}")
             return False
 
+    def add_completer(self, input_widget, field):
+        # Suggest the clients, locations and phone numbers already in use.
+        # The vocabulary keeps them sorted ignoring case, so the completer can
+        # binary search instead of scanning every value.
+        if field not in VOCABULARY_FIELDS:
+            input_widget.setCompleter(None)
+            return
+        completer = QCompleter(self.vocabulary.values(field), input_widget)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setModelSorting(QCompleter.CaseInsensitivelySortedModel)
+        input_widget.setCompleter(completer)
+
     def show_error_message(self, message):
         error_dialog = QDialog(self)
         error_dialog.setWindowTitle("Error")
@@ -361,14 +715,21 @@ class JobManagementApp(QMainWindow):
         error_dialog.setLayout(layout)
         error_dialog.exec_()
 
+    def edit_selected_job(self):
+        selected_rows = self.tableView.selectionModel().selectedRows()
+        if selected_rows:
+            self.edit_job(selected_rows[0].row())
+
     def edit_job(self, row):
-        # Get the job data from the selected row
-        job_data = {}
-        for col in range(10):  # Assuming 10 columns
-            header = self.tableWidget.horizontalHeaderItem(col).text()
-            item = self.tableWidget.item(row, col)
-            if header and item:
-                job_data[header] = item.text()
+        if not self.store.loaded:
+            return
+
+        # Get the job data from the selected row. The view can be re-sorted
+        # while the dialog is open, so hold on to the job itself, and note its
+        # version to catch edits saved elsewhere in the meantime.
+        job_data = self.model.job_at(row)
+        job_number = job_data["Job Number"]
+        expected_version = self.store.version(job_number)
 
         # Create a dialog for editing the job
         edit_job_dialog = QDialog(self)
@@ -388,6 +749,7 @@ class JobManagementApp(QMainWindow):
                 input_widget = QLineEdit()
                 input_widget.setPlaceholderText(placeholder)
                 input_widget.setText(job_data.get(field_name, ""))  # Pre-fill with existing values
+                self.add_completer(input_widget, field_name)
                 input_fields.append((field_name, input_widget))  # Store field name along with input widget
                 form_layout.addWidget(label_widget)
                 form_layout.addWidget(input_widget)
@@ -421,36 +783,128 @@ class JobManagementApp(QMainWindow):
                 edited_job_data[field_name] = field_value
 
             # Update the edited job data in the CSV (excluding "Days In Shop")
-            if self.update_job_data(row, edited_job_data):
+            if self.update_job_data(job_number, edited_job_data, expected_version):
                 # Reload and display the updated data
                 self.load_and_display_data()
 
-    def update_job_data(self, row, edited_job_data):
-        # Load data from the CSV file
-        file_path = "jobs.csv"  # Replace with your CSV file path
-        data = self.load_data_from_csv(file_path)
-
-        # Find the corresponding row in the data
-        for record in data:
-            if record["Job Number"] == edited_job_data["Job Number"]:
-                # Update the record with edited values
-                record.update(edited_job_data)
-
-        # Write the updated data back to the CSV file
+    @timed("save")
+    def update_job_data(self, job_number, edited_job_data, expected_version=None):
+        # job_number is the number the job had before editing.
+        # Update the record in the store, which writes it back to the CSV file.
         try:
-            with open(file_path, mode='w', newline='') as file:
-                fieldnames = data[0].keys() if data else edited_job_data.keys()
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(data)
+            self.history.update(job_number, edited_job_data, expected_version=expected_version)
             return True
+        except ConflictError as e:
+            self.show_error_message(f"{str(e)}. Your edit was not saved; please reopen the job.")
+            self.load_and_display_data()
+            return False
         except Exception as e:
             self.show_error_message(f"Error updating the job: {str(e)}")
             return False
 
+    def selected_jobs(self):
+        return [self.model.job_at(index.row()) for index in self.tableView.selectionModel().selectedRows()]
+
+    def mark_selected_jobs(self, status):
+        jobs = self.selected_jobs()
+        self.update_jobs({job["Job Number"]: {"Status": status} for job in jobs})
+
+    def bulk_edit_selected_jobs(self):
+        # Set one field to the same value on every selected job, e.g. move
+        # them all to another Location
+        jobs = self.selected_jobs()
+        if not jobs:
+            return
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Edit {len(jobs)} Jobs")
+        field_input = QComboBox(dialog)
+        field_input.addItems([field for field in FIELDNAMES if field != "Job Number"])
+        value_input = QLineEdit(dialog)
+        field_input.currentTextChanged.connect(lambda field: self.add_completer(value_input, field))
+        self.add_completer(value_input, field_input.currentText())
+        save_button = QPushButton("Save")
+        cancel_button = QPushButton("Cancel")
+        save_button.clicked.connect(dialog.accept)
+        cancel_button.clicked.connect(dialog.reject)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(save_button)
+        button_layout.addWidget(cancel_button)
+        dialog_layout = QVBoxLayout()
+        dialog_layout.addWidget(QLabel("Field:"))
+        dialog_layout.addWidget(field_input)
+        dialog_layout.addWidget(QLabel("New value:"))
+        dialog_layout.addWidget(value_input)
+        dialog_layout.addLayout(button_layout)
+        dialog.setLayout(dialog_layout)
+
+        if dialog.exec_() == QDialog.Accepted:
+            field = field_input.currentText()
+            self.update_jobs({job["Job Number"]: {field: value_input.text()} for job in jobs})
+
+    def update_jobs(self, changes_by_job_number):
+        # One transaction and one write for the whole batch, then one refresh
+        if not changes_by_job_number:
+            return
+        expected_versions = {job_number: self.store.version(job_number) for job_number in changes_by_job_number}
+        try:
+            with metrics.timer("save"):
+                self.history.update_many(changes_by_job_number, expected_versions)
+        except ConflictError as e:
+            self.show_error_message(f"{str(e)}. None of the selected jobs were changed.")
+        except (KeyError, ValueError, TimeoutError) as e:
+            self.show_error_message(f"Error updating the jobs: {str(e)}")
+        self.redisplay_keeping_position()
+
+    def undo_change(self):
+        self.change_history(self.history.undo, "undo")
+
+    def redo_change(self):
+        self.change_history(self.history.redo, "redo")
+
+    def change_history(self, action, name):
+        # Undo/redo only touch the fields and jobs the change did, through the
+        # store, then re-sort the view keeping the selection
+        if not self.store.loaded:
+            return
+        try:
+            if action() is None:
+                return
+        except ConflictError as e:
+            self.show_error_message(f"{str(e)}. Could not {name}; nothing was changed.")
+        except (KeyError, ValueError, TimeoutError) as e:
+            self.show_error_message(f"Could not {name}: {str(e)}")
+        self.redisplay_keeping_position()
+
+    def import_jobs_from_csv(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import Jobs", "", "CSV files (*.csv)")
+        if not file_path:
+            return
+        try:
+            added, errors, duplicates = import_jobs(file_path, self.store, rejected_path(file_path),
+                                                    KnownJobNumbers(self.store, self.archive))
+        except (OSError, ValueError, TimeoutError) as e:
+            self.show_error_message(f"Error importing jobs: {str(e)}")
+            return
+        self.redisplay_keeping_position()
+        message = f"Imported {len(added)} jobs."
+        if duplicates:
+            message += f"\nSkipped {len(duplicates)} already existing Job Numbers: {', '.join(duplicates[:20])}"
+        if errors:
+            message += f"\nSkipped {len(errors)} invalid rows:\n" + "\n".join(errors[:20])
+            message += f"\nThey were set aside in {rejected_path(file_path)} to fix and import again."
+        QMessageBox.information(self, "Import Jobs", message)
+
+
 def main():
     app = QApplication(sys.argv)
-    window = JobManagementApp()
+    # Optional arguments: the jobs file to open (jobs.csv or e.g. jobs.db),
+    # --profile-startup to print how long each stage of startup took, and
+    # --metrics / --profile-slow=MS to time actions (see metrics)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    file_path = args[0] if args else "jobs.csv"
+    metrics.configure(sys.argv[1:], log_path=file_path + ".metrics.log")
+    window = JobManagementApp(file_path, profile_startup="--profile-startup" in sys.argv)
     window.show()
     sys.exit(app.exec_())
 